@@ -7,7 +7,6 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Callable, List, Optional, Tuple, Union
 
-import numpy as np
 import pytz
 import requests
 
@@ -20,7 +19,6 @@ from mirix.constants import (
     FUNC_FAILED_HEARTBEAT_MESSAGE,
     LLM_MAX_TOKENS,
     MAX_CHAINING_STEPS,
-    MAX_EMBEDDING_DIM,
     MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
     MIRIX_CORE_TOOL_MODULE_NAME,
     MIRIX_EXTRA_TOOL_MODULE_NAME,
@@ -77,14 +75,17 @@ from mirix.services.helpers.agent_manager_helper import (
     compile_memory_metadata_block,
 )
 from mirix.services.knowledge_vault_manager import KnowledgeVaultManager
+from mirix.services.memory_retrieval import fetch_concurrently
 from mirix.services.message_manager import MessageManager
 from mirix.services.procedural_memory_manager import ProceduralMemoryManager
+from mirix.services.retrieval_cache import normalize_topic, retrieval_cache
 from mirix.services.resource_memory_manager import ResourceMemoryManager
 from mirix.services.semantic_memory_manager import SemanticMemoryManager
 from mirix.services.step_manager import StepManager
 from mirix.services.tool_execution_sandbox import ToolExecutionSandbox
+from mirix.services.topic_extraction import extract_topics, split_topics
 from mirix.services.user_manager import UserManager
-from mirix.settings import summarizer_settings
+from mirix.settings import settings, summarizer_settings
 from mirix.system import (
     get_contine_chaining,
     get_token_limit_warning,
@@ -1632,44 +1633,72 @@ class Agent(BaseAgent):
 
         return MirixUsageStatistics(**total_usage.model_dump(), step_count=step_count)
 
-    def _format_source_info(self, raw_memory_references: Optional[List[str]]) -> str:
+    # sources shown per memory in the prompt, to avoid clutter
+    MAX_SOURCES_PER_MEMORY = 3
+
+    def _get_raw_memory_sources(self, memories) -> dict:
         """
-        Format source information from raw_memory_references.
+        Resolve the sources shown by _format_source_info for all `memories`
+        with one query.
 
         Args:
-            raw_memory_references: List of raw_memory IDs
+            memories: Memory items with optional raw_memory_references
 
         Returns:
-            Formatted string with source information, e.g., " [Sources: Chrome: github.com, Safari: docs.python.org]"
+            Dict of raw_memory ID -> source details (see RawMemoryManager.get_raw_memory_sources)
         """
-        if not raw_memory_references:
-            return ""
+        raw_memory_ids = [
+            ref_id
+            for memory in memories
+            for ref_id in (getattr(memory, "raw_memory_references", None) or [])[
+                : self.MAX_SOURCES_PER_MEMORY
+            ]
+        ]
+        if not raw_memory_ids:
+            return {}
 
         # Lazy load raw_memory_manager
         if self.raw_memory_manager is None:
             from mirix.services.raw_memory_manager import RawMemoryManager
             self.raw_memory_manager = RawMemoryManager()
 
+        try:
+            return self.raw_memory_manager.get_raw_memory_sources(
+                raw_memory_ids, user_id=self.user.id
+            )
+        except Exception:
+            # Silently skip if raw_memory retrieval fails
+            return {}
+
+    def _format_source_info(
+        self, raw_memory_references: Optional[List[str]], raw_memory_sources: dict
+    ) -> str:
+        """
+        Format source information from raw_memory_references.
+
+        Args:
+            raw_memory_references: List of raw_memory IDs
+            raw_memory_sources: Source details resolved by _get_raw_memory_sources
+
+        Returns:
+            Formatted string with source information, e.g., " [Sources: Chrome: github.com, Safari: docs.python.org]"
+        """
+        if not raw_memory_references:
+            return ""
+
         sources = []
-        for ref_id in raw_memory_references[:3]:  # Limit to first 3 sources to avoid clutter
-            try:
-                raw_mem = self.raw_memory_manager.get_raw_memory_by_id(
-                    raw_memory_id=ref_id,
-                    user_id=self.user.id
-                )
-                if raw_mem:
-                    # Format: "App: URL" or just "App" if no URL
-                    if raw_mem.source_url:
-                        # Extract domain from URL
-                        from urllib.parse import urlparse
-                        parsed = urlparse(raw_mem.source_url)
-                        domain = parsed.netloc or parsed.path.split('/')[0]
-                        sources.append(f"{raw_mem.source_app}: {domain}")
-                    else:
-                        sources.append(raw_mem.source_app)
-            except Exception:
-                # Silently skip if raw_memory retrieval fails
-                continue
+        for ref_id in raw_memory_references[: self.MAX_SOURCES_PER_MEMORY]:
+            raw_mem = raw_memory_sources.get(ref_id)
+            if raw_mem:
+                # Format: "App: URL" or just "App" if no URL
+                if raw_mem["source_url"]:
+                    # Extract domain from URL
+                    from urllib.parse import urlparse
+                    parsed = urlparse(raw_mem["source_url"])
+                    domain = parsed.netloc or parsed.path.split('/')[0]
+                    sources.append(f"{raw_mem['source_app']}: {domain}")
+                else:
+                    sources.append(raw_mem["source_app"])
 
         if sources:
             return f" [Sources: {', '.join(sources)}]"
@@ -1707,66 +1736,211 @@ class Agent(BaseAgent):
         else:
             retrieved_memories["key_words"] = key_words
 
-        search_method = "bm25"
+        search_method = settings.memory_search_method
 
-        # Prepare embedding for semantic search
-        if key_words != "" and search_method == "embedding":
-            embedded_text = embedding_model(
-                self.agent_state.embedding_config
-            ).get_text_embedding(key_words)
-            embedded_text = np.array(embedded_text)
-            embedded_text = np.pad(
-                embedded_text,
-                (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]),
-                mode="constant",
-            ).tolist()
-        else:
-            embedded_text = None
+        # Several ";"-separated topics are searched together, one query per
+        # table instead of one per topic
+        topic_queries = split_topics(key_words)
+        if len(topic_queries) < 2:
+            topic_queries = None
 
-        # Retrieve core memory
-        if (
-            self.agent_state.name == "core_memory_agent"
-            or "core" not in retrieved_memories
-        ):
+        # Embeddings for semantic search, computed below only if some memory
+        # type is not in the retrieval cache
+        embedded_text = None
+        embedded_queries = None
+
+        is_reflexion_agent = self.agent_state.name == "reflexion_agent"
+
+        def fetch_core():
             current_persisted_memory = Memory(
                 blocks=[
                     self.block_manager.get_block_by_id(block.id, actor=self.user)
                     for block in self.block_manager.get_blocks(actor=self.user)
                 ]
             )
-            core_memory = current_persisted_memory.compile()
-            retrieved_memories["core"] = core_memory
+            return current_persisted_memory.compile()
 
-        if (
-            self.agent_state.name == "knowledge_vault"
-            or "knowledge_vault" not in retrieved_memories
+        def fetch_knowledge_vault():
+            if self.agent_state.name == "knowledge_vault" or is_reflexion_agent:
+                sensitivity_filter = {}
+            else:
+                sensitivity_filter = {"sensitivity": ["low", "medium"]}
+            items = self.knowledge_vault_manager.list_knowledge(
+                agent_state=self.agent_state,
+                actor=self.user,
+                embedded_text=embedded_text,
+                query=key_words,
+                search_field="caption",
+                search_method=search_method,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                queries=topic_queries,
+                embedded_queries=embedded_queries,
+                timezone_str=timezone_str,
+                **sensitivity_filter,
+            )
+            total = self.knowledge_vault_manager.get_total_number_of_items(
+                actor=self.user
+            )
+            return items, total
+
+        def fetch_episodic():
+            recent = self.episodic_memory_manager.list_episodic_memory(
+                agent_state=self.agent_state,
+                actor=self.user,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                timezone_str=timezone_str,
+            )
+            relevant = self.episodic_memory_manager.list_episodic_memory(
+                agent_state=self.agent_state,
+                actor=self.user,
+                embedded_text=embedded_text,
+                query=key_words,
+                search_field="details",
+                search_method=search_method,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                queries=topic_queries,
+                embedded_queries=embedded_queries,
+                timezone_str=timezone_str,
+            )
+            total = self.episodic_memory_manager.get_total_number_of_items(
+                actor=self.user
+            )
+            return recent, relevant, total
+
+        def fetch_resource():
+            items = self.resource_memory_manager.list_resources(
+                agent_state=self.agent_state,
+                actor=self.user,
+                query=key_words,
+                embedded_text=embedded_text,
+                search_field="summary",
+                search_method=search_method,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                queries=topic_queries,
+                embedded_queries=embedded_queries,
+                timezone_str=timezone_str,
+            )
+            total = self.resource_memory_manager.get_total_number_of_items(
+                actor=self.user
+            )
+            return items, total
+
+        def fetch_procedural():
+            items = self.procedural_memory_manager.list_procedures(
+                agent_state=self.agent_state,
+                actor=self.user,
+                query=key_words,
+                embedded_text=embedded_text,
+                search_field="summary",
+                search_method=search_method,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                queries=topic_queries,
+                embedded_queries=embedded_queries,
+                timezone_str=timezone_str,
+            )
+            total = self.procedural_memory_manager.get_total_number_of_items(
+                actor=self.user
+            )
+            return items, total
+
+        def fetch_semantic():
+            items = self.semantic_memory_manager.list_semantic_items(
+                agent_state=self.agent_state,
+                actor=self.user,
+                query=key_words,
+                embedded_text=embedded_text,
+                search_field="details",
+                search_method=search_method,
+                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
+                queries=topic_queries,
+                embedded_queries=embedded_queries,
+                timezone_str=timezone_str,
+            )
+            total = self.semantic_memory_manager.get_total_number_of_items(
+                actor=self.user
+            )
+            return items, total
+
+        # Each agent always refreshes its own memory type; the others are
+        # fetched only if the caller did not pass them in.
+        fetchers = {}
+        for memory_type, owner, fetch in (
+            ("core", "core_memory_agent", fetch_core),
+            ("knowledge_vault", "knowledge_vault", fetch_knowledge_vault),
+            ("episodic", "episodic_memory_agent", fetch_episodic),
+            ("resource", "resource_memory_agent", fetch_resource),
+            ("procedural", "procedural_memory_agent", fetch_procedural),
+            ("semantic", "semantic_memory_agent", fetch_semantic),
         ):
-            if (
-                self.agent_state.name == "knowledge_vault"
-                or self.agent_state.name == "reflexion_agent"
-            ):
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(
-                    agent_state=self.agent_state,
-                    actor=self.user,
-                    embedded_text=embedded_text,
-                    query=key_words,
-                    search_field="caption",
-                    search_method=search_method,
-                    limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                    timezone_str=timezone_str,
-                )
+            if self.agent_state.name == owner or memory_type not in retrieved_memories:
+                fetchers[memory_type] = fetch
+
+        # Serve memory types whose table was not written since the same query
+        # was last answered from the retrieval cache
+        topic = normalize_topic(key_words)
+        retrieval_queries = {
+            memory_type: (search_method, topic, timezone_str)
+            for memory_type in fetchers
+        }
+        if "core" in retrieval_queries:
+            retrieval_queries["core"] = ()
+        if "knowledge_vault" in retrieval_queries:
+            # the sensitivity filter depends on the agent
+            retrieval_queries["knowledge_vault"] += (
+                self.agent_state.name == "knowledge_vault" or is_reflexion_agent,
+            )
+
+        fetched = {}
+        write_versions = {}
+        to_fetch = {}
+        for memory_type, fetch in fetchers.items():
+            cached = retrieval_cache.get(
+                self.user.id, memory_type, retrieval_queries[memory_type]
+            )
+            if cached is not None:
+                fetched[memory_type] = cached
             else:
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(
-                    agent_state=self.agent_state,
-                    actor=self.user,
-                    embedded_text=embedded_text,
-                    query=key_words,
-                    search_field="caption",
-                    search_method=search_method,
-                    limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                    timezone_str=timezone_str,
-                    sensitivity=["low", "medium"],
+                write_versions[memory_type] = retrieval_cache.version(
+                    self.user.id, memory_type
                 )
+                to_fetch[memory_type] = fetch
+
+        # Prepare embedding for semantic search
+        if to_fetch and key_words != "" and search_method in ("embedding", "hybrid"):
+            model = embedding_model(self.agent_state.embedding_config)
+            if topic_queries:
+                # every topic embedded in one request
+                embedded_queries = model.get_text_embeddings(topic_queries)
+            else:
+                embedded_text = model.get_text_embedding(key_words)
+
+        # The queries run concurrently; the prompt is assembled below in a
+        # fixed order, so it does not depend on which one finishes first.
+        for memory_type, value in fetch_concurrently(to_fetch).items():
+            retrieval_cache.put(
+                self.user.id,
+                memory_type,
+                retrieval_queries[memory_type],
+                value,
+                write_versions[memory_type],
+            )
+            fetched[memory_type] = value
+        failed_memory_types = [
+            memory_type
+            for memory_type in fetchers
+            if memory_type not in fetched and memory_type not in retrieved_memories
+        ]
+        for memory_type in failed_memory_types:
+            # degrade to an empty section, rendered as "Empty"
+            retrieved_memories[memory_type] = None
+
+        # Retrieve core memory
+        if "core" in fetched:
+            retrieved_memories["core"] = fetched["core"]
+
+        # Retrieve knowledge vault
+        if "knowledge_vault" in fetched:
+            current_knowledge_vault, knowledge_vault_total = fetched["knowledge_vault"]
 
             knowledge_vault_memory = ""
             if len(current_knowledge_vault) > 0:
@@ -1778,23 +1952,21 @@ class Agent(BaseAgent):
 
                     knowledge_vault_memory += f"[{idx}] Knowledge Vault Item ID: {knowledge_vault_item.id}; Caption: {knowledge_vault_item.caption}\n"
             retrieved_memories["knowledge_vault"] = {
-                "total_number_of_items": self.knowledge_vault_manager.get_total_number_of_items(
-                    actor=self.user
-                ),
+                "total_number_of_items": knowledge_vault_total,
                 "current_count": len(current_knowledge_vault),
                 "text": knowledge_vault_memory,
             }
 
         # Retrieve episodic memory
-        if (
-            self.agent_state.name == "episodic_memory_agent"
-            or "episodic" not in retrieved_memories
-        ):
-            current_episodic_memory = self.episodic_memory_manager.list_episodic_memory(
-                agent_state=self.agent_state,
-                actor=self.user,
-                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                timezone_str=timezone_str,
+        if "episodic" in fetched:
+            (
+                current_episodic_memory,
+                most_relevant_episodic_memory,
+                episodic_total,
+            ) = fetched["episodic"]
+            # Sources of all the listed events, resolved together
+            raw_memory_sources = self._get_raw_memory_sources(
+                list(current_episodic_memory) + list(most_relevant_episodic_memory)
             )
             episodic_memory = ""
             if len(current_episodic_memory) > 0:
@@ -1806,7 +1978,7 @@ class Agent(BaseAgent):
                     )
                     # Get source information and collect raw_memory_references
                     raw_refs = getattr(event, 'raw_memory_references', None)
-                    source_info = self._format_source_info(raw_refs)
+                    source_info = self._format_source_info(raw_refs, raw_memory_sources)
                     if raw_refs:
                         all_raw_memory_refs.update(raw_refs)
                     if (
@@ -1819,18 +1991,6 @@ class Agent(BaseAgent):
 
             recent_episodic_memory = episodic_memory.strip()
 
-            most_relevant_episodic_memory = (
-                self.episodic_memory_manager.list_episodic_memory(
-                    agent_state=self.agent_state,
-                    actor=self.user,
-                    embedded_text=embedded_text,
-                    query=key_words,
-                    search_field="details",
-                    search_method=search_method,
-                    limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                    timezone_str=timezone_str,
-                )
-            )
             most_relevant_episodic_memory_str = ""
             if len(most_relevant_episodic_memory) > 0:
                 for idx, event in enumerate(most_relevant_episodic_memory):
@@ -1841,7 +2001,7 @@ class Agent(BaseAgent):
                     )
                     # Get source information and collect raw_memory_references
                     raw_refs = getattr(event, 'raw_memory_references', None)
-                    source_info = self._format_source_info(raw_refs)
+                    source_info = self._format_source_info(raw_refs, raw_memory_sources)
                     if raw_refs:
                         all_raw_memory_refs.update(raw_refs)
                     if (
@@ -1853,9 +2013,7 @@ class Agent(BaseAgent):
                         most_relevant_episodic_memory_str += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}{source_info}  (Details: {len(event.details)} Characters)\n"
             relevant_episodic_memory = most_relevant_episodic_memory_str.strip()
             retrieved_memories["episodic"] = {
-                "total_number_of_items": self.episodic_memory_manager.get_total_number_of_items(
-                    actor=self.user
-                ),
+                "total_number_of_items": episodic_total,
                 "recent_count": len(current_episodic_memory),
                 "relevant_count": len(most_relevant_episodic_memory),
                 "recent_episodic_memory": recent_episodic_memory,
@@ -1863,20 +2021,8 @@ class Agent(BaseAgent):
             }
 
         # Retrieve resource memory
-        if (
-            self.agent_state.name == "resource_memory_agent"
-            or "resource" not in retrieved_memories
-        ):
-            current_resource_memory = self.resource_memory_manager.list_resources(
-                agent_state=self.agent_state,
-                actor=self.user,
-                query=key_words,
-                embedded_text=embedded_text,
-                search_field="summary",
-                search_method=search_method,
-                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                timezone_str=timezone_str,
-            )
+        if "resource" in fetched:
+            current_resource_memory, resource_total = fetched["resource"]
             resource_memory = ""
             if len(current_resource_memory) > 0:
                 for idx, resource in enumerate(current_resource_memory):
@@ -1899,28 +2045,14 @@ class Agent(BaseAgent):
                         resource_memory += f"[{idx}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
             resource_memory = resource_memory.strip()
             retrieved_memories["resource"] = {
-                "total_number_of_items": self.resource_memory_manager.get_total_number_of_items(
-                    actor=self.user
-                ),
+                "total_number_of_items": resource_total,
                 "current_count": len(current_resource_memory),
                 "text": resource_memory,
             }
 
         # Retrieve procedural memory
-        if (
-            self.agent_state.name == "procedural_memory_agent"
-            or "procedural" not in retrieved_memories
-        ):
-            current_procedural_memory = self.procedural_memory_manager.list_procedures(
-                agent_state=self.agent_state,
-                actor=self.user,
-                query=key_words,
-                embedded_text=embedded_text,
-                search_field="summary",
-                search_method=search_method,
-                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                timezone_str=timezone_str,
-            )
+        if "procedural" in fetched:
+            current_procedural_memory, procedural_total = fetched["procedural"]
             procedural_memory = ""
             if len(current_procedural_memory) > 0:
                 for idx, procedure in enumerate(current_procedural_memory):
@@ -1943,28 +2075,14 @@ class Agent(BaseAgent):
                         procedural_memory += f"[{idx}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
             procedural_memory = procedural_memory.strip()
             retrieved_memories["procedural"] = {
-                "total_number_of_items": self.procedural_memory_manager.get_total_number_of_items(
-                    actor=self.user
-                ),
+                "total_number_of_items": procedural_total,
                 "current_count": len(current_procedural_memory),
                 "text": procedural_memory,
             }
 
         # Retrieve semantic memory
-        if (
-            self.agent_state.name == "semantic_memory_agent"
-            or "semantic" not in retrieved_memories
-        ):
-            current_semantic_memory = self.semantic_memory_manager.list_semantic_items(
-                agent_state=self.agent_state,
-                actor=self.user,
-                query=key_words,
-                embedded_text=embedded_text,
-                search_field="details",
-                search_method=search_method,
-                limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-                timezone_str=timezone_str,
-            )
+        if "semantic" in fetched:
+            current_semantic_memory, semantic_total = fetched["semantic"]
             semantic_memory = ""
             if len(current_semantic_memory) > 0:
                 for idx, semantic_memory_item in enumerate(current_semantic_memory):
@@ -1988,9 +2106,7 @@ class Agent(BaseAgent):
 
             semantic_memory = semantic_memory.strip()
             retrieved_memories["semantic"] = {
-                "total_number_of_items": self.semantic_memory_manager.get_total_number_of_items(
-                    actor=self.user
-                ),
+                "total_number_of_items": semantic_total,
                 "current_count": len(current_semantic_memory),
                 "text": semantic_memory,
             }
@@ -1998,6 +2114,10 @@ class Agent(BaseAgent):
         # Build the complete system prompt
         memory_system_prompt = self.build_system_prompt(retrieved_memories)
 
+        # Retry the memory types that could not be retrieved on the next call
+        for memory_type in failed_memory_types:
+            retrieved_memories.pop(memory_type)
+
         complete_system_prompt = raw_system + "\n\n" + memory_system_prompt
 
         if key_words:
@@ -2165,7 +2285,8 @@ These keywords have been used to retrieve relevant memories from the database.
 
     def _extract_topics_from_messages(self, messages: List[Message]) -> Optional[str]:
         """
-        Extract topics from a list of messages using LLM.
+        Extract topics from a list of messages, locally or with the LLM
+        depending on the agent's topic extractor.
 
         Args:
             messages (List[Message]): The messages to extract topics from
@@ -2173,6 +2294,26 @@ These keywords have been used to retrieve relevant memories from the database.
         Returns:
             Optional[str]: Extracted topics or None if extraction fails
         """
+        extractor = (self.agent_state.metadata_ or {}).get(
+            "topic_extractor"
+        ) or settings.topic_extractor
+        if extractor == "local":
+            texts = []
+            for message in messages:
+                if isinstance(message.content, str):
+                    texts.append(message.content)
+                else:
+                    texts.extend(
+                        part.text
+                        for part in message.content or []
+                        if getattr(part, "text", None)
+                    )
+            topics = extract_topics(texts, user_id=self.user.id)
+            if topics:
+                self.logger.info(f"Extracted topics locally: {topics}")
+                return topics
+            # nothing to go on in the text (e.g. screenshots only): ask the LLM
+
         try:
             # Add instruction message for topic extraction
             temporary_messages = copy.deepcopy(messages)
@@ -141,6 +141,7 @@ class GrowthAnalysisAgent:
             start_time=start_time,
             end_time=end_time,
             limit=2000,  # 一天最多 2000 条记录
+            include_ocr_text=False,  # 只用到 source_app 和 captured_at
         )
 
     def _get_existing_work_sessions(
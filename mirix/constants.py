@@ -30,8 +30,10 @@ TOOL_CALL_ID_MAX_LEN = 29
 MIN_CONTEXT_WINDOW = 4096
 
 # embeddings
-MAX_EMBEDDING_DIM = 1536  # maximum supported embeding size - do NOT change or else DBs will need to be reset
+MAX_EMBEDDING_DIM = 1536  # maximum supported embedding size; shorter embeddings are stored at their native dimension
 DEFAULT_EMBEDDING_CHUNK_SIZE = 300
+EMBEDDING_BATCH_MAX_TOKENS = 100000  # token budget of one batched embedding request
+EMBEDDING_BATCH_MAX_TEXTS = 256  # inputs per batched embedding request
 
 MAX_CHAINING_STEPS = 10
 MAX_RETRIEVAL_LIMIT_IN_SYSTEM = 10
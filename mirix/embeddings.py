@@ -1,13 +1,14 @@
+import threading
 import uuid
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
-import numpy as np
 import tiktoken
 
 from mirix.constants import (
+    EMBEDDING_BATCH_MAX_TEXTS,
+    EMBEDDING_BATCH_MAX_TOKENS,
     EMBEDDING_TO_TOKENIZER_DEFAULT,
     EMBEDDING_TO_TOKENIZER_MAP,
-    MAX_EMBEDDING_DIM,
 )
 from mirix.schemas.embedding_config import EmbeddingConfig
 from mirix.utils import is_valid_url, printd
@@ -66,6 +67,51 @@ def check_and_split_text(text: str, embedding_model: str) -> List[str]:
     return [text]
 
 
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def http_client():
+    """Process-wide pooled HTTP client shared by the HTTP embedding backends"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+                )
+    return _http_client
+
+
+def batch_texts(
+    texts: List[str],
+    embedding_model: Optional[str] = None,
+    max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_texts: int = EMBEDDING_BATCH_MAX_TEXTS,
+) -> List[List[str]]:
+    """Split texts, in order, into batches that fit one embedding request"""
+    encoding = tiktoken.get_encoding(
+        EMBEDDING_TO_TOKENIZER_MAP.get(embedding_model, EMBEDDING_TO_TOKENIZER_DEFAULT)
+    )
+
+    batches = []
+    batch, batch_tokens = [], 0
+    for text in texts:
+        num_tokens = len(encoding.encode(text, disallowed_special=()))
+        if batch and (
+            batch_tokens + num_tokens > max_tokens or len(batch) >= max_texts
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += num_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 class EmbeddingEndpoint:
     """Implementation for OpenAI compatible endpoint"""
 
@@ -95,33 +141,35 @@ class EmbeddingEndpoint:
         self._base_url = base_url
         self._timeout = timeout
 
-    def _call_api(self, text: str) -> List[float]:
+    def _call_api(self, text: Union[str, List[str]]) -> Any:
         if not is_valid_url(self._base_url):
             raise ValueError(
                 f"Embeddings endpoint does not have a valid URL (set to: '{self._base_url}'). Make sure embedding_endpoint is set correctly in your Mirix config."
             )
-        import httpx
-
         headers = {"Content-Type": "application/json"}
         json_data = {"input": text, "model": self.model_name, "user": self._user}
 
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self._base_url}/embeddings",
-                headers=headers,
-                json=json_data,
-                timeout=self._timeout,
-            )
+        response = http_client().post(
+            f"{self._base_url}/embeddings",
+            headers=headers,
+            json=json_data,
+            timeout=self._timeout,
+        )
 
         response_json = response.json()
+        batched = isinstance(text, list)
 
         if isinstance(response_json, list):
-            # embedding directly in response
+            # embedding(s) directly in response
             embedding = response_json
         elif isinstance(response_json, dict):
             # TEI embedding packaged inside openai-style response
             try:
-                embedding = response_json["data"][0]["embedding"]
+                data = sorted(response_json["data"], key=lambda d: d.get("index", 0))
+                if batched:
+                    embedding = [d["embedding"] for d in data]
+                else:
+                    embedding = data[0]["embedding"]
             except (KeyError, IndexError):
                 raise TypeError(
                     f"Got back an unexpected payload from text embedding function, response=\n{response_json}"
@@ -137,6 +185,17 @@ class EmbeddingEndpoint:
     def get_text_embedding(self, text: str) -> List[float]:
         return self._call_api(text)
 
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batch_texts(texts, self.model_name):
+            batch_embeddings = self._call_api(batch)
+            if len(batch_embeddings) != len(batch):
+                raise TypeError(
+                    f"Expected {len(batch)} embeddings from text embedding function, got {len(batch_embeddings)}"
+                )
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
 
 class AzureOpenAIEmbedding:
     def __init__(self, api_endpoint: str, api_key: str, api_version: str, model: str):
@@ -155,6 +214,13 @@ class AzureOpenAIEmbedding:
         )
         return embeddings
 
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batch_texts(texts, self.model):
+            data = self.client.embeddings.create(input=batch, model=self.model).data
+            embeddings.extend(d.embedding for d in sorted(data, key=lambda d: d.index))
+        return embeddings
+
 
 class OllamaEmbeddings:
     # Format:
@@ -169,36 +235,117 @@ class OllamaEmbeddings:
         self.ollama_additional_kwargs = ollama_additional_kwargs
 
     def get_text_embedding(self, text: str):
-        import httpx
-
         headers = {"Content-Type": "application/json"}
         json_data = {"model": self.model, "prompt": text}
         json_data.update(self.ollama_additional_kwargs)
 
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self.base_url}/api/embeddings",
+        response = http_client().post(
+            f"{self.base_url}/api/embeddings",
+            headers=headers,
+            json=json_data,
+        )
+
+        response_json = response.json()
+        return response_json["embedding"]
+
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        # Format (Ollama >= 0.3, one request per batch):
+        # curl http://localhost:11434/api/embed -d '{
+        #   "model": "mxbai-embed-large",
+        #   "input": ["Llamas are members of the camelid family", "..."]
+        # }'
+        headers = {"Content-Type": "application/json"}
+        embeddings = []
+        for batch in batch_texts(texts, self.model):
+            json_data = {"model": self.model, "input": batch}
+            json_data.update(self.ollama_additional_kwargs)
+
+            response = http_client().post(
+                f"{self.base_url}/api/embed",
                 headers=headers,
                 json=json_data,
             )
 
-        response_json = response.json()
-        return response_json["embedding"]
+            if response.status_code == 404:
+                # older Ollama servers only have the single-prompt endpoint
+                embeddings.extend(self.get_text_embedding(text) for text in batch)
+            else:
+                response.raise_for_status()
+                embeddings.extend(response.json()["embeddings"])
+        return embeddings
+
+
+class LlamaIndexEmbedding:
+    """Adds token-budgeted `get_text_embeddings` to a LlamaIndex embedding model"""
+
+    def __init__(self, model, model_name: Optional[str] = None):
+        self._model = model
+        self._model_name = model_name
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        return self._model.get_text_embedding(text)
+
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batch_texts(texts, self._model_name):
+            embeddings.extend(self._model.get_text_embedding_batch(batch))
+        return embeddings
 
 
 def query_embedding(embedding_model, query_text: str):
-    """Generate padded embedding for querying database"""
-    query_vec = embedding_model.get_text_embedding(query_text)
-    query_vec = np.array(query_vec)
-    query_vec = np.pad(
-        query_vec, (0, MAX_EMBEDDING_DIM - query_vec.shape[0]), mode="constant"
-    ).tolist()
-    return query_vec
+    """Generate embedding for querying database, at the native dimension of the model"""
+    return embedding_model.get_text_embedding(query_text)
+
+
+# Ready embedding clients by (config fingerprint, user, cache setting)
+_embedding_models: Dict[tuple, Any] = {}
+_embedding_models_lock = threading.Lock()
 
 
 def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
-    """Return LlamaIndex embedding model to use for embeddings"""
+    """
+    Return the embedding model to use for embeddings, behind the embedding cache.
+
+    Clients are built once per config and reused by every caller; call
+    `clear_embedding_models` when an API key changes.
+    """
+    from mirix.settings import settings
+
+    key = (config.model_dump_json(), str(user_id), settings.embedding_cache)
+    model = _embedding_models.get(key)
+    if model is not None:
+        return model
 
+    with _embedding_models_lock:
+        model = _embedding_models.get(key)
+        if model is None:
+            model = _embedding_model(config, user_id)
+            if settings.embedding_cache:
+                from mirix.services.embedding_cache import (
+                    CachedEmbeddingModel,
+                    embedding_cache,
+                )
+
+                model = CachedEmbeddingModel(
+                    model,
+                    config.embedding_endpoint_type,
+                    config.embedding_model,
+                    embedding_cache,
+                )
+            _embedding_models[key] = model
+    return model
+
+
+def clear_embedding_models() -> None:
+    """Drop the memoized embedding clients, e.g. after an API key update"""
+    with _embedding_models_lock:
+        _embedding_models.clear()
+
+
+def _embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
     endpoint_type = config.embedding_endpoint_type
 
     # TODO: refactor to pass in settings from server
@@ -219,7 +366,7 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
             api_key=api_key,
             additional_kwargs=additional_kwargs,
         )
-        return model
+        return LlamaIndexEmbedding(model, config.embedding_model)
 
     elif endpoint_type == "google_ai":
         # Use Google AI (Gemini) for embeddings
@@ -236,7 +383,7 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
             api_key=api_key,
             api_base=config.embedding_endpoint,
         )
-        return model
+        return LlamaIndexEmbedding(model, config.embedding_model)
 
     elif endpoint_type == "azure":
         assert all(
@@ -1,6 +1,8 @@
 from typing import Optional
 
 from mirix.agent import Agent, AgentState
+from mirix.services.memory_retrieval import fetch_concurrently, reciprocal_rank_fusion
+from mirix.settings import settings
 from mirix.utils import convert_timezone_to_utc
 
 
@@ -107,6 +109,7 @@ def search_in_memory(
         search_method: The method to search in the memory. Choose from:
             - 'bm25': BM25 ranking-based full-text search (fast and effective for keyword-based searches)
             - 'embedding': Vector similarity search using embeddings (most powerful, good for conceptual matches)
+            - 'hybrid': Runs 'bm25' and 'embedding' together and merges their rankings (finds both exact keywords and conceptual matches)
 
     Returns:
         str: Query result string
@@ -138,17 +141,19 @@ def search_in_memory(
             self.agent_state.memory.list_block_labels()
         )
 
-    if memory_type == "episodic" or memory_type == "all":
+    limit = settings.search_in_memory_limit
+
+    def search_episodic():
         episodic_memory = self.episodic_memory_manager.list_episodic_memory(
             actor=self.user,
             agent_state=self.agent_state,
             query=query,
             search_field=search_field if search_field != "null" else "summary",
             search_method=search_method,
-            limit=10,
+            limit=limit,
             timezone_str=timezone_str,
         )
-        formatted_results_from_episodic = [
+        return [
             {
                 "memory_type": "episodic",
                 "id": x.id,
@@ -160,10 +165,8 @@ def search_in_memory(
             }
             for x in episodic_memory
         ]
-        if memory_type == "episodic":
-            return formatted_results_from_episodic, len(formatted_results_from_episodic)
 
-    if memory_type == "resource" or memory_type == "all":
+    def search_resource():
         resource_memories = self.resource_memory_manager.list_resources(
             actor=self.user,
             agent_state=self.agent_state,
@@ -172,10 +175,10 @@ def search_in_memory(
             if search_field != "null"
             else ("summary" if search_method == "embedding" else "content"),
             search_method=search_method,
-            limit=10,
+            limit=limit,
             timezone_str=timezone_str,
         )
-        formatted_results_resource = [
+        return [
             {
                 "memory_type": "resource",
                 "id": x.id,
@@ -185,20 +188,18 @@ def search_in_memory(
             }
             for x in resource_memories
         ]
-        if memory_type == "resource":
-            return formatted_results_resource, len(formatted_results_resource)
 
-    if memory_type == "procedural" or memory_type == "all":
+    def search_procedural():
         procedural_memories = self.procedural_memory_manager.list_procedures(
             actor=self.user,
             agent_state=self.agent_state,
             query=query,
             search_field=search_field if search_field != "null" else "summary",
             search_method=search_method,
-            limit=10,
+            limit=limit,
             timezone_str=timezone_str,
         )
-        formatted_results_procedural = [
+        return [
             {
                 "memory_type": "procedural",
                 "id": x.id,
@@ -208,20 +209,18 @@ def search_in_memory(
             }
             for x in procedural_memories
         ]
-        if memory_type == "procedural":
-            return formatted_results_procedural, len(formatted_results_procedural)
 
-    if memory_type == "knowledge_vault" or memory_type == "all":
+    def search_knowledge_vault():
         knowledge_vault_memories = self.knowledge_vault_manager.list_knowledge(
             actor=self.user,
             agent_state=self.agent_state,
             query=query,
             search_field=search_field if search_field != "null" else "caption",
             search_method=search_method,
-            limit=10,
+            limit=limit,
             timezone_str=timezone_str,
         )
-        formatted_results_knowledge_vault = [
+        return [
             {
                 "memory_type": "knowledge_vault",
                 "id": x.id,
@@ -233,23 +232,19 @@ def search_in_memory(
             }
             for x in knowledge_vault_memories
         ]
-        if memory_type == "knowledge_vault":
-            return formatted_results_knowledge_vault, len(
-                formatted_results_knowledge_vault
-            )
 
-    if memory_type == "semantic" or memory_type == "all":
+    def search_semantic():
         semantic_memories = self.semantic_memory_manager.list_semantic_items(
             actor=self.user,
             agent_state=self.agent_state,
             query=query,
             search_field=search_field if search_field != "null" else "summary",
             search_method=search_method,
-            limit=10,
+            limit=limit,
             timezone_str=timezone_str,
         )
         # title, summary, details, source
-        formatted_results_semantic = [
+        return [
             {
                 "memory_type": "semantic",
                 "id": x.id,
@@ -260,25 +255,34 @@ def search_in_memory(
             }
             for x in semantic_memories
         ]
-        if memory_type == "semantic":
-            return formatted_results_semantic, len(formatted_results_semantic)
 
-    else:
+    searches = {
+        "episodic": search_episodic,
+        "resource": search_resource,
+        "procedural": search_procedural,
+        "knowledge_vault": search_knowledge_vault,
+        "semantic": search_semantic,
+    }
+
+    if memory_type in searches:
+        results = searches[memory_type]()
+        return results, len(results)
+
+    if memory_type != "all":
         raise ValueError(
             f"Memory type '{memory_type}' is not supported. Please choose from 'episodic', 'resource', 'procedural', 'knowledge_vault', 'semantic'."
         )
-    return (
-        formatted_results_from_episodic
-        + formatted_results_resource
-        + formatted_results_procedural
-        + formatted_results_knowledge_vault
-        + formatted_results_semantic,
-        len(formatted_results_from_episodic)
-        + len(formatted_results_resource)
-        + len(formatted_results_procedural)
-        + len(formatted_results_knowledge_vault)
-        + len(formatted_results_semantic),
+
+    # The five searches run side by side; a type that fails or times out is
+    # left out. Each type's ranking is normalized to its ranks, so the merged
+    # list interleaves the best results of every type.
+    rankings = fetch_concurrently(searches)
+    results = reciprocal_rank_fusion(
+        list(rankings.values()),
+        settings.search_in_memory_all_limit,
+        key=lambda result: (result["memory_type"], result["id"]),
     )
+    return results, len(results)
 
 
 def list_memory_within_timerange(
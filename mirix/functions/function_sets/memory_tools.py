@@ -63,19 +63,23 @@ def episodic_memory_insert(self: "Agent", items: List[EpisodicEventForLLM]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.episodic_memory_manager.insert_event(
-            actor=self.user,
-            agent_state=self.agent_state,
-            timestamp=item["occurred_at"],
-            event_type=item["event_type"],
-            event_actor=item["actor"],
-            summary=item["summary"],
-            details=item["details"],
-            organization_id=self.user.organization_id,
-            tree_path=item.get("tree_path"),
-            raw_memory_references=item.get("raw_memory_references") or [],
-        )
+    self.episodic_memory_manager.insert_events(
+        actor=self.user,
+        agent_state=self.agent_state,
+        events=[
+            {
+                "timestamp": item["occurred_at"],
+                "event_type": item["event_type"],
+                "event_actor": item["actor"],
+                "summary": item["summary"],
+                "details": item["details"],
+                "tree_path": item.get("tree_path"),
+                "raw_memory_references": item.get("raw_memory_references") or [],
+            }
+            for item in items
+        ],
+        organization_id=self.user.organization_id,
+    )
     response = "Events inserted! Now you need to check if there are repeated events shown in the system prompt."
     return response
 
@@ -138,19 +142,23 @@ def episodic_memory_replace(
     for event_id in event_ids:
         self.episodic_memory_manager.delete_event_by_id(event_id, actor=self.user)
 
-    for new_item in new_items:
-        self.episodic_memory_manager.insert_event(
-            actor=self.user,
-            agent_state=self.agent_state,
-            timestamp=new_item["occurred_at"],
-            event_type=new_item["event_type"],
-            event_actor=new_item["actor"],
-            summary=new_item["summary"],
-            details=new_item["details"],
-            organization_id=self.user.organization_id,
-            tree_path=new_item.get("tree_path"),
-            raw_memory_references=new_item.get("raw_memory_references"),
-        )
+    self.episodic_memory_manager.insert_events(
+        actor=self.user,
+        agent_state=self.agent_state,
+        events=[
+            {
+                "timestamp": new_item["occurred_at"],
+                "event_type": new_item["event_type"],
+                "event_actor": new_item["actor"],
+                "summary": new_item["summary"],
+                "details": new_item["details"],
+                "tree_path": new_item.get("tree_path"),
+                "raw_memory_references": new_item.get("raw_memory_references"),
+            }
+            for new_item in new_items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def check_episodic_memory(
@@ -199,18 +207,22 @@ def resource_memory_insert(self: "Agent", items: List[ResourceMemoryItemBase]):
         Optional[str]: None is always returned as this function does not produce a response.
     """
 
-    for item in items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item["title"],
-            summary=item["summary"],
-            resource_type=item["resource_type"],
-            content=item["content"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get("tree_path"),
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.resource_memory_manager.insert_resources(
+        actor=self.user,
+        agent_state=self.agent_state,
+        resources=[
+            {
+                "title": item["title"],
+                "summary": item["summary"],
+                "resource_type": item["resource_type"],
+                "content": item["content"],
+                "tree_path": item.get("tree_path"),
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def resource_memory_update(
@@ -229,18 +241,22 @@ def resource_memory_update(
             resource_id=old_id, actor=self.user
         )
 
-    for item in new_items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item["title"],
-            summary=item["summary"],
-            resource_type=item["resource_type"],
-            content=item["content"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get("tree_path"),
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.resource_memory_manager.insert_resources(
+        actor=self.user,
+        agent_state=self.agent_state,
+        resources=[
+            {
+                "title": item["title"],
+                "summary": item["summary"],
+                "resource_type": item["resource_type"],
+                "content": item["content"],
+                "tree_path": item.get("tree_path"),
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in new_items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase]):
@@ -253,17 +269,21 @@ def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item["entry_type"],
-            summary=item["summary"],
-            steps=item["steps"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get("tree_path"),
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        procedures=[
+            {
+                "entry_type": item["entry_type"],
+                "summary": item["summary"],
+                "steps": item["steps"],
+                "tree_path": item.get("tree_path"),
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id,
+    )
 
 
 def procedural_memory_update(
@@ -284,17 +304,21 @@ def procedural_memory_update(
             procedure_id=old_id, actor=self.user
         )
 
-    for item in new_items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item["entry_type"],
-            summary=item["summary"],
-            steps=item["steps"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get("tree_path"),
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        procedures=[
+            {
+                "entry_type": item["entry_type"],
+                "summary": item["summary"],
+                "steps": item["steps"],
+                "tree_path": item.get("tree_path"),
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in new_items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id,
+    )
 
 
 def check_semantic_memory(
@@ -341,18 +365,22 @@ def semantic_memory_insert(self: "Agent", items: List[SemanticMemoryItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item["name"],
-            summary=item["summary"],
-            details=item["details"],
-            source=item["source"],
-            tree_path=item["tree_path"],
-            organization_id=self.user.organization_id,
-            actor=self.user,
-            raw_memory_references=item.get("raw_memory_references") or [],
-        )
+    self.semantic_memory_manager.insert_semantic_items(
+        actor=self.user,
+        agent_state=self.agent_state,
+        items=[
+            {
+                "name": item["name"],
+                "summary": item["summary"],
+                "details": item["details"],
+                "source": item["source"],
+                "tree_path": item["tree_path"],
+                "raw_memory_references": item.get("raw_memory_references") or [],
+            }
+            for item in items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def semantic_memory_update(
@@ -376,20 +404,23 @@ def semantic_memory_update(
             semantic_memory_id=old_id, actor=self.user
         )
 
-    new_ids = []
-    for item in new_items:
-        inserted_item = self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item["name"],
-            summary=item["summary"],
-            details=item["details"],
-            source=item["source"],
-            actor=self.user,
-            tree_path=item["tree_path"],
-            organization_id=self.user.organization_id,
-            raw_memory_references=item.get("raw_memory_references"),
-        )
-        new_ids.append(inserted_item.id)
+    inserted_items = self.semantic_memory_manager.insert_semantic_items(
+        actor=self.user,
+        agent_state=self.agent_state,
+        items=[
+            {
+                "name": item["name"],
+                "summary": item["summary"],
+                "details": item["details"],
+                "source": item["source"],
+                "tree_path": item["tree_path"],
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in new_items
+        ],
+        organization_id=self.user.organization_id,
+    )
+    new_ids = [inserted_item.id for inserted_item in inserted_items]
 
     message_to_return = (
         "Semantic memory with the following ids have been deleted: "
@@ -409,18 +440,22 @@ def knowledge_vault_insert(self: "Agent", items: List[KnowledgeVaultItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item["entry_type"],
-            source=item["source"],
-            sensitivity=item["sensitivity"],
-            secret_value=item["secret_value"],
-            caption=item["caption"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        actor=self.user,
+        agent_state=self.agent_state,
+        items=[
+            {
+                "entry_type": item["entry_type"],
+                "source": item["source"],
+                "sensitivity": item["sensitivity"],
+                "secret_value": item["secret_value"],
+                "caption": item["caption"],
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def knowledge_vault_update(
@@ -441,18 +476,22 @@ def knowledge_vault_update(
             knowledge_vault_item_id=old_id, actor=self.user
         )
 
-    for item in new_items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item["entry_type"],
-            source=item["source"],
-            sensitivity=item["sensitivity"],
-            secret_value=item["secret_value"],
-            caption=item["caption"],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            raw_memory_references=item.get("raw_memory_references"),
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        actor=self.user,
+        agent_state=self.agent_state,
+        items=[
+            {
+                "entry_type": item["entry_type"],
+                "source": item["source"],
+                "sensitivity": item["sensitivity"],
+                "secret_value": item["secret_value"],
+                "caption": item["caption"],
+                "raw_memory_references": item.get("raw_memory_references"),
+            }
+            for item in new_items
+        ],
+        organization_id=self.user.organization_id,
+    )
 
 
 def trigger_memory_update_with_instruction(
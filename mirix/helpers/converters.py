@@ -1,4 +1,3 @@
-import base64
 from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
@@ -8,6 +7,7 @@ from anthropic.types.beta.messages import (
 )
 from sqlalchemy import Dialect
 
+from mirix.helpers.vector_codec import decode_vector, encode_vector, is_encoded_vector
 from mirix.schemas.agent import AgentStepState
 from mirix.schemas.embedding_config import EmbeddingConfig
 from mirix.schemas.enums import ProviderType, ToolRuleType
@@ -286,22 +286,21 @@ def deserialize_message_content(data: Optional[List[Dict]]) -> List[MessageConte
 def serialize_vector(
     vector: Optional[Union[List[float], np.ndarray]],
 ) -> Optional[bytes]:
-    """Convert a NumPy array or list into a base64-encoded byte string."""
+    """Convert a NumPy array or list into raw float32 bytes with a small header."""
     if vector is None:
         return None
-    if isinstance(vector, list):
-        vector = np.array(vector, dtype=np.float32)
 
-    return base64.b64encode(vector.tobytes())
+    return encode_vector(vector)
 
 
 def deserialize_vector(data: Optional[bytes], dialect: Dialect) -> Optional[np.ndarray]:
-    """Convert a base64-encoded byte string back into a NumPy array."""
+    """Convert stored bytes back into a NumPy array, without copying them."""
     if not data:
         return None
 
-    if dialect.name == "sqlite":
-        data = base64.b64decode(data)
+    if dialect.name == "sqlite" or is_encoded_vector(data):
+        # SQLite rows may still hold the base64 format of older versions
+        return decode_vector(data)
 
     return np.frombuffer(data, dtype=np.float32)
 
@@ -0,0 +1,65 @@
+"""
+Tokenization shared by every keyword search over memories.
+
+The in-process BM25 indexes, the SQLite FTS5 tables and the PostgreSQL
+full-text search all see text through `clean_text_for_search`: ASCII and
+CJK punctuation become spaces, text is lowercased, and every run of
+Chinese or Japanese characters - which has no spaces to split on - is
+replaced by its overlapping character bigrams ("数据库" -> "数据 据库").
+A CJK query then matches on whole index terms instead of needing a
+substring scan, and text without CJK characters is tokenized exactly as
+before.
+
+`segment_cjk` is also registered as the `mirix_cjk_segment` SQL function
+on SQLite connections (orm/sqlite_functions.py) and created in PostgreSQL
+with the same behaviour (orm/pg_text_search.py), so the database indexes
+hold the same terms the queries are built from.
+"""
+
+import re
+import string
+from typing import List
+
+# Hiragana, katakana, CJK extension A, CJK unified and compatibility ideographs
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+
+_CJK_RUN_RE = re.compile(f"[{CJK_RANGES}]+")
+# CJK symbols and punctuation, and the fullwidth ASCII punctuation
+_CJK_PUNCTUATION_RE = re.compile(
+    "[\u3000-\u303f\uff01-\uff0f\uff1a-\uff20\uff3b-\uff40\uff5b-\uff65]"
+)
+_PUNCTUATION_TABLE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+
+def _bigrams(match: re.Match) -> str:
+    run = match.group()
+    if len(run) == 1:
+        return f" {run} "
+    return " " + " ".join(run[i : i + 2] for i in range(len(run) - 1)) + " "
+
+
+def segment_cjk(text: str) -> str:
+    """Replace every CJK run of `text` by its character bigrams, space separated."""
+    if not text:
+        return text
+    return _CJK_RUN_RE.sub(_bigrams, text)
+
+
+def clean_text_for_search(text: str) -> str:
+    """Lowercased text with punctuation removed, CJK segmented, whitespace normalized."""
+    if not text:
+        return ""
+    text = _CJK_PUNCTUATION_RE.sub(" ", text.translate(_PUNCTUATION_TABLE))
+    return re.sub(r"\s+", " ", segment_cjk(text.lower()).strip())
+
+
+def tokenize_for_search(text: str) -> List[str]:
+    """
+    Search terms of `text`. Single characters are dropped, except a CJK
+    character standing alone, which is a word of its own.
+    """
+    return [
+        token
+        for token in clean_text_for_search(text).split()
+        if len(token) > 1 or _CJK_RUN_RE.match(token)
+    ]
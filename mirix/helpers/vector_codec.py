@@ -0,0 +1,91 @@
+"""
+On-disk encoding of embedding vectors in SQLite BLOB columns.
+
+Vectors are stored as a 12 byte header followed by the raw little-endian
+values:
+
+    magic  b"\\x93MXV"   4 bytes, never valid base64
+    version              1 byte
+    dtype                1 byte, see `_DTYPES`
+    padding              2 bytes
+    dim                  uint32, little-endian
+
+Older databases store `base64(float32 bytes)` instead. `decode_vector`
+accepts both, so a database can be migrated in place while it is in use
+(see mirix/orm/vector_migration.py, run at startup).
+"""
+
+import base64
+import struct
+from typing import List, Optional, Union
+
+import numpy as np
+
+VECTOR_MAGIC = b"\x93MXV"
+VECTOR_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBcxxI")
+HEADER_SIZE = _HEADER.size
+
+_DTYPES = {
+    b"f": np.dtype("<f4"),
+}
+_DTYPE_CODES = {dtype: code for code, dtype in _DTYPES.items()}
+
+
+def is_encoded_vector(data) -> bool:
+    """Whether `data` is in the headered format rather than legacy base64."""
+    return data is not None and len(data) >= HEADER_SIZE and data[:4] == VECTOR_MAGIC
+
+
+def encode_vector(
+    vector: Union[List[float], np.ndarray], dtype: np.dtype = np.dtype("<f4")
+) -> bytes:
+    """Encode a vector as header + raw little-endian values."""
+    dtype = np.dtype(dtype)
+    array = np.asarray(vector, dtype=dtype)
+    if array.ndim != 1:
+        raise ValueError(f"Expected a 1-D vector, got shape {array.shape}")
+    header = _HEADER.pack(
+        VECTOR_MAGIC, VECTOR_FORMAT_VERSION, _DTYPE_CODES[dtype], array.shape[0]
+    )
+    return header + array.tobytes()
+
+
+def decode_vector(data) -> Optional[np.ndarray]:
+    """
+    Decode a stored vector, in either format.
+
+    Headered vectors are returned as a read-only view of `data` without
+    copying. Returns None for empty or malformed data.
+    """
+    if data is None or len(data) == 0:
+        return None
+
+    if is_encoded_vector(data):
+        _, version, code, dim = _HEADER.unpack_from(data)
+        dtype = _DTYPES.get(code)
+        if version != VECTOR_FORMAT_VERSION or dtype is None:
+            return None
+        if len(data) != HEADER_SIZE + dim * dtype.itemsize:
+            return None
+        return np.frombuffer(data, dtype=dtype, count=dim, offset=HEADER_SIZE)
+
+    try:
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+    except Exception:
+        return None
+
+
+def vector_dims(data) -> Optional[int]:
+    """Dimension of a stored vector, read from its header without decoding it."""
+    if data is None or len(data) == 0:
+        return None
+
+    if is_encoded_vector(data):
+        return _HEADER.unpack_from(data)[3]
+
+    # legacy base64 of float32 values
+    tail = bytes(data[-2:])
+    padding = len(tail) - len(tail.rstrip(b"="))
+    return (len(data) * 3 // 4 - padding) // 4
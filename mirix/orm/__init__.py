@@ -12,6 +12,7 @@ from mirix.orm.pattern import Pattern
 from mirix.orm.project import Project
 from mirix.orm.provider import Provider
 from mirix.orm.raw_memory import RawMemoryItem
+from mirix.orm.raw_memory_reference import RawMemoryReference
 from mirix.orm.sandbox_config import (
     AgentEnvironmentVariable,
     SandboxConfig,
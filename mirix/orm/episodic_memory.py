@@ -2,12 +2,12 @@ import datetime as dt
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import JSON, Column, DateTime, Index, String, text
+from sqlalchemy import JSON, Column, DateTime, Index, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
+from mirix.orm.raw_memory_reference import track_raw_memory_references
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
 from mirix.schemas.episodic_memory import EpisodicEvent as PydanticEpisodicEvent
 from mirix.settings import settings
@@ -96,46 +96,22 @@ class EpisodicEvent(SqlalchemyBase, OrganizationMixin, UserMixin):
     if settings.mirix_pg_uri_no_default:
         from pgvector.sqlalchemy import Vector
 
-        details_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
-        summary_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
+        details_embedding = mapped_column(Vector(), nullable=True)
+        summary_embedding = mapped_column(Vector(), nullable=True)
     else:
         details_embedding = Column(CommonVector, nullable=True)
         summary_embedding = Column(CommonVector, nullable=True)
 
-    # Full-text search indexes - handled by migration script
-    # PostgreSQL: GIN indexes on tsvector expressions
-    # SQLite: FTS5 virtual table with triggers
+    # Full-text search indexes
+    # PostgreSQL: GIN indexes on tsvector expressions (see mirix/orm/pg_text_search.py)
+    # SQLite: FTS5 virtual table with triggers (see mirix/orm/sqlite_fts.py)
     __table_args__ = tuple(
         filter(
             None,
             [
-                # PostgreSQL full-text search indexes
-                Index(
-                    "ix_episodic_memory_summary_fts",
-                    text("to_tsvector('english', summary)"),
-                    postgresql_using="gin",
-                    postgresql_where=text("summary IS NOT NULL"),
-                )
-                if settings.mirix_pg_uri_no_default
-                else None,
-                Index(
-                    "ix_episodic_memory_details_fts",
-                    text("to_tsvector('english', details)"),
-                    postgresql_using="gin",
-                    postgresql_where=text("details IS NOT NULL"),
-                )
-                if settings.mirix_pg_uri_no_default
-                else None,
-                Index(
-                    "ix_episodic_memory_combined_fts",
-                    text(
-                        "to_tsvector('english', coalesce(summary, '') || ' ' || coalesce(details, ''))"
-                    ),
-                    postgresql_using="gin",
-                )
-                if settings.mirix_pg_uri_no_default
-                else None,
-                # Standard indexes for SQLite (FTS5 virtual table handled separately)
+                # Newest-first listing and its keyset pages (services/pagination.py)
+                Index("ix_episodic_memory_user_occurred_at", "user_id", "occurred_at", "id"),
+                # Standard indexes for SQLite (FTS5 virtual table lives in sqlite_fts.py)
                 Index("ix_episodic_memory_summary_sqlite", "summary")
                 if not settings.mirix_pg_uri_no_default
                 else None,
@@ -162,3 +138,6 @@ class EpisodicEvent(SqlalchemyBase, OrganizationMixin, UserMixin):
         Relationship to the User that owns this episodic event.
         """
         return relationship("User", lazy="selectin")
+
+
+track_raw_memory_references(EpisodicEvent, "episodic")
@@ -5,7 +5,6 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import JSON, Column, DateTime, Float, Integer, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
@@ -161,7 +160,7 @@ class Goal(SqlalchemyBase, OrganizationMixin, UserMixin):
         from pgvector.sqlalchemy import Vector
 
         description_embedding = mapped_column(
-            Vector(MAX_EMBEDDING_DIM),
+            Vector(),
             nullable=True,
             doc="Vector embedding of goal description for semantic search",
         )
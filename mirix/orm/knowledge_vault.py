@@ -5,9 +5,9 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import JSON, Column, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
+from mirix.orm.raw_memory_reference import track_raw_memory_references
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
 from mirix.schemas.knowledge_vault import (
     KnowledgeVaultItem as PydanticKnowledgeVaultItem,
@@ -104,7 +104,7 @@ class KnowledgeVaultItem(SqlalchemyBase, OrganizationMixin, UserMixin):
     if settings.mirix_pg_uri_no_default:
         from pgvector.sqlalchemy import Vector
 
-        caption_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
+        caption_embedding = mapped_column(Vector(), nullable=True)
     else:
         caption_embedding = Column(CommonVector, nullable=True)
 
@@ -124,3 +124,6 @@ class KnowledgeVaultItem(SqlalchemyBase, OrganizationMixin, UserMixin):
         Relationship to the User that owns this knowledge vault item.
         """
         return relationship("User", lazy="selectin")
+
+
+track_raw_memory_references(KnowledgeVaultItem, "knowledge_vault")
@@ -5,7 +5,6 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import JSON, Column, DateTime, Float, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
@@ -141,7 +140,7 @@ class Pattern(SqlalchemyBase, OrganizationMixin, UserMixin):
         from pgvector.sqlalchemy import Vector
 
         description_embedding = mapped_column(
-            Vector(MAX_EMBEDDING_DIM),
+            Vector(),
             nullable=True,
             doc="Vector embedding of pattern description for semantic search",
         )
@@ -0,0 +1,210 @@
+"""
+PostgreSQL full-text search over the memory tables.
+
+The memory managers' `bm25` search on PostgreSQL ranks rows with
+ts_rank_cd over tsvector expressions. Those expressions are built here,
+together with the GIN indexes on them, so that queries and indexes always
+use the same expression and the planner can serve searches from the
+indexes.
+
+Text goes through `mirix_cjk_segment`, the SQL twin of
+`helpers.search_tokenizer.segment_cjk`, which rewrites runs of Chinese and
+Japanese characters - one giant token to the default parser - into their
+character bigrams. Queries are tokenized with `tokenize_for_search` and
+so use the same terms. The `mirix` text search configuration is a copy of
+`english`; it exists so the dictionaries can be changed (e.g. to a CJK
+segmentation extension) without touching the queries.
+
+The substring (`ilike '%term%'`) searches of the paginated memory listings
+are served by pg_trgm GIN indexes on the columns of `TRIGRAM_TABLES`.
+
+SQLite deployments use the FTS5 tables of sqlite_fts.py instead.
+"""
+
+from typing import Dict
+
+from mirix.helpers.search_tokenizer import CJK_RANGES
+from mirix.log import get_logger
+from mirix.orm.sqlite_fts import TRIGRAM_TABLES
+
+logger = get_logger(__name__)
+
+PG_TEXT_SEARCH_CONFIG = "mirix"
+
+# Table -> searchable field -> SQL expression of its text. The order of the
+# fields is the order of the A/B/C/D weights of the all-fields search.
+PG_TEXT_SEARCH_FIELDS: Dict[str, Dict[str, str]] = {
+    "episodic_memory": {
+        "summary": "summary",
+        "details": "details",
+        "actor": "actor",
+        "event_type": "event_type",
+    },
+    "semantic_memory": {
+        "name": "name",
+        "summary": "summary",
+        "details": "details",
+        "source": "source",
+    },
+    "procedural_memory": {
+        "summary": "summary",
+        "steps": "regexp_replace(steps::text, '[\"\\[\\],]', ' ', 'g')",
+        "entry_type": "entry_type",
+    },
+    "resource_memory": {
+        "title": "title",
+        "summary": "summary",
+        "content": "content",
+        "resource_type": "resource_type",
+    },
+    "knowledge_vault": {
+        "caption": "caption",
+        "secret_value": "secret_value",
+    },
+}
+
+# Fields searched on their own often enough to get an index; short
+# categorical fields are only searched through the all-fields index.
+_INDEXED_FIELDS: Dict[str, tuple] = {
+    "episodic_memory": ("summary", "details"),
+    "semantic_memory": ("name", "summary", "details"),
+    "procedural_memory": ("summary", "steps"),
+    "resource_memory": ("title", "summary", "content"),
+    "knowledge_vault": ("caption",),
+}
+
+# Indexes of earlier versions, on expressions no query used
+_LEGACY_INDEXES = (
+    "ix_episodic_memory_summary_fts",
+    "ix_episodic_memory_details_fts",
+    "ix_episodic_memory_combined_fts",
+)
+
+
+def tsquery_sql(parameter: str = "tsquery") -> str:
+    """A tsquery bound to `:parameter`, parsed with the `mirix` configuration."""
+    return f"to_tsquery('{PG_TEXT_SEARCH_CONFIG}', :{parameter})"
+
+
+TSQUERY_SQL = tsquery_sql()
+
+
+# CJK_RANGES with \\u escapes, for PostgreSQL regular expressions
+_CJK_RANGES_SQL = "".join(
+    char if char == "-" else f"\\u{ord(char):04x}" for char in CJK_RANGES
+)
+
+
+CJK_SEGMENT_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION mirix_cjk_segment(input text) RETURNS text
+LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE AS $$
+DECLARE
+    piece text;
+    output text := '';
+BEGIN
+    FOR piece IN
+        SELECT m[1]
+        FROM regexp_matches(input, '([{_CJK_RANGES_SQL}]+|[^{_CJK_RANGES_SQL}]+)', 'g') AS m
+    LOOP
+        IF piece ~ '^[{_CJK_RANGES_SQL}]' THEN
+            IF length(piece) = 1 THEN
+                output := output || ' ' || piece || ' ';
+            ELSE
+                FOR i IN 1 .. length(piece) - 1 LOOP
+                    output := output || ' ' || substr(piece, i, 2);
+                END LOOP;
+                output := output || ' ';
+            END IF;
+        ELSE
+            output := output || piece;
+        END IF;
+    END LOOP;
+    RETURN output;
+END
+$$
+"""
+
+
+def field_tsvector(table_name: str, field: str) -> str:
+    """The tsvector expression of one searchable field."""
+    expression = PG_TEXT_SEARCH_FIELDS[table_name][field]
+    return (
+        f"to_tsvector('{PG_TEXT_SEARCH_CONFIG}', "
+        f"mirix_cjk_segment(coalesce({expression}, '')))"
+    )
+
+
+def weighted_tsvector(table_name: str) -> str:
+    """The tsvector of all searchable fields, weighted A, B, C, D in order."""
+    return " || ".join(
+        f"setweight({field_tsvector(table_name, field)}, '{weight}')"
+        for field, weight in zip(PG_TEXT_SEARCH_FIELDS[table_name], "ABCD")
+    )
+
+
+def search_tsvector(table_name: str, search_field: str) -> str:
+    """The tsvector a search over `search_field` ('' or unknown: all fields) matches."""
+    if search_field in PG_TEXT_SEARCH_FIELDS[table_name]:
+        return field_tsvector(table_name, search_field)
+    return weighted_tsvector(table_name)
+
+
+def ensure_pg_text_search(engine) -> None:
+    """
+    Create the segmentation function, the `mirix` text search configuration
+    and the GIN indexes of every memory table. Safe to call on every startup.
+    """
+    with engine.begin() as connection:
+        connection.exec_driver_sql(CJK_SEGMENT_FUNCTION_SQL)
+        connection.exec_driver_sql(f"""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_ts_config WHERE cfgname = '{PG_TEXT_SEARCH_CONFIG}'
+                ) THEN
+                    CREATE TEXT SEARCH CONFIGURATION {PG_TEXT_SEARCH_CONFIG}
+                        (COPY = pg_catalog.english);
+                END IF;
+            END
+            $$
+        """)
+        for index_name in _LEGACY_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+
+        for table_name, fields in _INDEXED_FIELDS.items():
+            expressions = {
+                f"ix_{table_name}_tsv": weighted_tsvector(table_name),
+                **{
+                    f"ix_{table_name}_{field}_tsv": field_tsvector(table_name, field)
+                    for field in fields
+                },
+            }
+            for index_name, expression in expressions.items():
+                connection.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} "
+                    f"ON {table_name} USING gin (({expression}))"
+                )
+    logger.info("PostgreSQL text search indexes are in place")
+
+    _ensure_trigram_indexes(engine)
+
+
+def _ensure_trigram_indexes(engine) -> None:
+    """pg_trgm GIN indexes for the substring searches, if the extension is available."""
+    try:
+        with engine.begin() as connection:
+            connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except Exception as e:
+        logger.warning(
+            f"pg_trgm is unavailable ({e}); substring searches will scan the tables"
+        )
+        return
+
+    with engine.begin() as connection:
+        for table_name, columns in TRIGRAM_TABLES.items():
+            for column_name in columns:
+                connection.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{column_name}_trgm "
+                    f"ON {table_name} USING gin ({column_name} gin_trgm_ops)"
+                )
+    logger.info("PostgreSQL trigram indexes are in place")
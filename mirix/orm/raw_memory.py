@@ -2,10 +2,9 @@ import datetime as dt
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, String
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
@@ -117,7 +116,7 @@ class RawMemoryItem(SqlalchemyBase, OrganizationMixin, UserMixin):
         from pgvector.sqlalchemy import Vector
 
         ocr_text_embedding = mapped_column(
-            Vector(MAX_EMBEDDING_DIM),
+            Vector(),
             nullable=True,
             doc="OCR文本的向量嵌入 / Vector embedding of OCR text for semantic search",
         )
@@ -128,6 +127,8 @@ class RawMemoryItem(SqlalchemyBase, OrganizationMixin, UserMixin):
             doc="OCR文本的向量嵌入 / Vector embedding of OCR text for semantic search",
         )
 
+    __table_args__ = (Index("ix_raw_memory_user_captured_at", "user_id", "captured_at", "id"),)
+
     @declared_attr
     def organization(cls) -> Mapped["Organization"]:
         """
@@ -0,0 +1,125 @@
+"""
+Link table from raw memory items to the derived memories that cite them.
+
+Each memory table keeps the ids of the raw memories it was derived from in
+its `raw_memory_references` JSON array. Finding the memories that cite one
+raw memory from those arrays means reading every row, so the same relation
+is mirrored, one row per (raw memory, memory) pair, into
+`raw_memory_reference`. Its primary key serves the raw memory -> memories
+lookup; `ix_raw_memory_reference_memory` serves the other direction, which
+is what keeps the table up to date.
+
+The rows are written by mapper events on the memory models registered with
+`track_raw_memory_references`, so every insert, update and delete that goes
+through the ORM keeps them in sync with the JSON arrays.
+`backfill_raw_memory_references` fills the table from the arrays of
+databases created before it existed.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import Index, String, event, func, select
+from sqlalchemy.orm import Mapped, attributes, mapped_column
+
+from mirix.log import get_logger
+from mirix.orm.base import Base
+
+logger = get_logger(__name__)
+
+# memory_type -> ORM class whose `raw_memory_references` are mirrored
+TRACKED_MEMORY_MODELS: Dict[str, type] = {}
+
+
+class RawMemoryReference(Base):
+    """One raw memory item cited by one memory."""
+
+    __tablename__ = "raw_memory_reference"
+    __table_args__ = (
+        Index("ix_raw_memory_reference_memory", "memory_type", "memory_id"),
+    )
+
+    raw_memory_id: Mapped[str] = mapped_column(
+        String, primary_key=True, doc="ID of the cited raw memory item"
+    )
+    memory_type: Mapped[str] = mapped_column(
+        String,
+        primary_key=True,
+        doc="episodic, semantic, procedural, resource or knowledge_vault",
+    )
+    memory_id: Mapped[str] = mapped_column(
+        String, primary_key=True, doc="ID of the citing memory"
+    )
+
+
+def _link_rows(memory_type: str, memory_id: str, raw_memory_ids: Iterable) -> List[dict]:
+    # the arrays may repeat an id, the link table holds each pair once
+    return [
+        {"raw_memory_id": str(raw_id), "memory_type": memory_type, "memory_id": memory_id}
+        for raw_id in dict.fromkeys(raw_memory_ids or [])
+        if raw_id
+    ]
+
+
+def _insert_links(connection, memory_type: str, target) -> None:
+    rows = _link_rows(memory_type, target.id, target.raw_memory_references)
+    if rows:
+        connection.execute(RawMemoryReference.__table__.insert(), rows)
+
+
+def _delete_links(connection, memory_type: str, memory_id: str) -> None:
+    link_table = RawMemoryReference.__table__
+    connection.execute(
+        link_table.delete().where(
+            link_table.c.memory_type == memory_type,
+            link_table.c.memory_id == memory_id,
+        )
+    )
+
+
+def track_raw_memory_references(model: type, memory_type: str) -> None:
+    """Mirror the `raw_memory_references` of `model` into the link table."""
+    TRACKED_MEMORY_MODELS[memory_type] = model
+
+    @event.listens_for(model, "after_insert")
+    def insert_raw_memory_references(mapper, connection, target):
+        _insert_links(connection, memory_type, target)
+
+    @event.listens_for(model, "after_update")
+    def update_raw_memory_references(mapper, connection, target):
+        if not attributes.get_history(target, "raw_memory_references").has_changes():
+            return
+        _delete_links(connection, memory_type, target.id)
+        _insert_links(connection, memory_type, target)
+
+    @event.listens_for(model, "after_delete")
+    def delete_raw_memory_references(mapper, connection, target):
+        _delete_links(connection, memory_type, target.id)
+
+
+def backfill_raw_memory_references(engine) -> int:
+    """
+    Fill an empty link table from the JSON arrays of the tracked memory
+    tables. Returns the number of links written; a table that already has
+    rows is left alone, the mapper events keep it current.
+    """
+    with engine.begin() as connection:
+        existing = connection.execute(
+            select(func.count()).select_from(RawMemoryReference.__table__)
+        ).scalar()
+        if existing:
+            return 0
+
+        written = 0
+        for memory_type, model in TRACKED_MEMORY_MODELS.items():
+            rows = []
+            for memory_id, raw_memory_ids in connection.execute(
+                select(model.id, model.raw_memory_references)
+            ):
+                rows.extend(_link_rows(memory_type, memory_id, raw_memory_ids))
+            if rows:
+                connection.execute(RawMemoryReference.__table__.insert(), rows)
+                written += len(rows)
+
+    if written:
+        logger.info("Backfilled %d raw memory references", written)
+    return written
@@ -2,12 +2,12 @@ import datetime as dt
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import JSON, Column, DateTime, String
+from sqlalchemy import JSON, Column, DateTime, Index, String
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from mirix.constants import MAX_EMBEDDING_DIM
 from mirix.orm.custom_columns import CommonVector, EmbeddingConfigColumn
 from mirix.orm.mixins import OrganizationMixin, UserMixin
+from mirix.orm.raw_memory_reference import track_raw_memory_references
 from mirix.orm.sqlalchemy_base import SqlalchemyBase
 from mirix.schemas.semantic_memory import (
     SemanticMemoryItem as PydanticSemanticMemoryItem,
@@ -115,14 +115,16 @@ class SemanticMemoryItem(SqlalchemyBase, OrganizationMixin, UserMixin):
     if settings.mirix_pg_uri_no_default:
         from pgvector.sqlalchemy import Vector
 
-        details_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
-        name_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
-        summary_embedding = mapped_column(Vector(MAX_EMBEDDING_DIM), nullable=True)
+        details_embedding = mapped_column(Vector(), nullable=True)
+        name_embedding = mapped_column(Vector(), nullable=True)
+        summary_embedding = mapped_column(Vector(), nullable=True)
     else:
         details_embedding = Column(CommonVector, nullable=True)
         name_embedding = Column(CommonVector, nullable=True)
         summary_embedding = Column(CommonVector, nullable=True)
 
+    __table_args__ = (Index("ix_semantic_memory_user_updated_at", "user_id", "updated_at", "id"),)
+
     @declared_attr
     def organization(cls) -> Mapped["Organization"]:
         """
@@ -139,3 +141,6 @@ class SemanticMemoryItem(SqlalchemyBase, OrganizationMixin, UserMixin):
         Relationship to the User that owns this semantic memory item.
         """
         return relationship("User", lazy="selectin")
+
+
+track_raw_memory_references(SemanticMemoryItem, "semantic")
@@ -5,9 +5,9 @@ from enum import Enum
 from functools import wraps
 from typing import TYPE_CHECKING, List, Literal, Optional, Tuple, Union
 
-from sqlalchemy import String, and_, desc, func, or_, select
+from sqlalchemy import String, and_, desc, func, inspect, or_, select
 from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError, TimeoutError
-from sqlalchemy.orm import Mapped, Session, mapped_column
+from sqlalchemy.orm import Mapped, Session, defer, mapped_column
 
 from mirix.log import get_logger
 from mirix.orm.base import Base, CommonSqlalchemyMetaMixins
@@ -27,6 +27,35 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+def defer_embeddings(model_class) -> list:
+    """
+    Loader options leaving the `*_embedding` vector columns of `model_class`
+    unloaded. Rows read for display or lexical ranking never use their
+    vectors, which make up most of a memory row; `to_pydantic` returns None
+    for them. Add `undefer(...)` to the query where the vectors are needed.
+    """
+    return [
+        defer(getattr(model_class, attribute.key))
+        for attribute in inspect(model_class).column_attrs
+        if attribute.key.endswith("_embedding")
+    ]
+
+
+class _WithoutAttributes:
+    """Read-only view of `item` with the attributes in `keys` read as None."""
+
+    __slots__ = ("_item", "_keys")
+
+    def __init__(self, item, keys):
+        self._item = item
+        self._keys = keys
+
+    def __getattr__(self, name):
+        if name in self._keys:
+            return None
+        return getattr(self._item, name)
+
+
 def handle_db_timeout(func):
     """Decorator to handle SQLAlchemy TimeoutError and wrap it in a custom exception."""
 
@@ -678,7 +707,18 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
         )
 
     def to_pydantic(self) -> "BaseModel":
-        """converts to the basic pydantic model counterpart"""
+        """converts to the basic pydantic model counterpart
+
+        Columns a loader option left unloaded (see `defer_embeddings`) come out
+        as None rather than being loaded one row at a time.
+        """
+        state = inspect(self)
+        if state.has_identity:
+            deferred = (state.unloaded - state.expired_attributes) & set(
+                state.mapper.column_attrs.keys()
+            )
+            if deferred:
+                return self.__pydantic_model__.model_validate(_WithoutAttributes(self, deferred))
         return self.__pydantic_model__.model_validate(self)
 
     def to_record(self) -> "BaseModel":
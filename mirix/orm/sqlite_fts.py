@@ -0,0 +1,413 @@
+"""
+SQLite FTS5 shadow tables for the memory tables.
+
+Every memory table gets an external-content FTS5 table named
+``<table>_fts`` that indexes the table's searchable text columns. The FTS
+table stores only the inverted index; the text itself is read from the
+base table through its implicit ``rowid``. Triggers on the base table keep
+the index in sync, so application code never writes to the FTS tables.
+
+The FTS tables index the text as `mirix_cjk_segment` (see
+helpers/search_tokenizer.py) rewrites it, so that Chinese and Japanese
+runs are indexed as character bigrams instead of one token per run: their
+content is a ``<table>_fts_source`` view applying the function, and the
+triggers apply it to the rows they index.
+
+Memory tables listed in the frontend are also searched by substring
+(``ilike '%term%'``). For those, a second external-content table
+``<table>_trgm`` uses the FTS5 trigram tokenizer, so that substrings of
+three or more characters are looked up in an index instead of scanning
+every row (see `substring_filter` in services/utils.py). The same tables
+prune the candidates of the `fuzzy_match` search (services/fuzzy_search.py).
+
+PostgreSQL deployments do not use any of this - they rely on the GIN
+tsvector and pg_trgm indexes of pg_text_search.py.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Optional, Sequence
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import column, select, table, text
+
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+# Base table -> indexed text columns. The order of the columns matters: it is
+# the order of the weights passed to bm25() below.
+FTS5_TABLES: Dict[str, List[str]] = {
+    "episodic_memory": ["summary", "details", "actor", "event_type"],
+    "semantic_memory": ["name", "summary", "details", "source"],
+    "procedural_memory": ["summary", "steps", "entry_type"],
+    "resource_memory": ["title", "summary", "content", "resource_type"],
+    "knowledge_vault": ["caption", "secret_value", "entry_type", "source"],
+    "raw_memory": ["ocr_text", "source_app", "source_url"],
+}
+
+# Base table -> columns searched by substring in the paginated listings and
+# by the fuzzy_match search
+TRIGRAM_TABLES: Dict[str, List[str]] = {
+    "episodic_memory": ["id", "summary", "details", "event_type", "actor"],
+    "semantic_memory": ["id", "name", "summary", "details"],
+    "procedural_memory": ["id", "summary", "entry_type"],
+    "resource_memory": ["id", "title", "summary", "content", "resource_type"],
+    "knowledge_vault": ["caption"],
+    "raw_memory": ["id", "source_app", "source_url", "ocr_text"],
+}
+
+# The trigram tokenizer only indexes substrings of this many characters
+TRIGRAM_MIN_LENGTH = 3
+
+# Column weights for bm25(), mirroring the A/B/C/D setweight() used by the
+# PostgreSQL full-text search in the memory managers.
+_COLUMN_WEIGHTS = [4.0, 2.0, 1.0, 0.5]
+
+# Engine -> names of the FTS5 and trigram tables of its database. Each
+# engine is checked once, or set up by ensure_fts5_tables.
+_search_tables: "WeakKeyDictionary[object, FrozenSet[str]]" = WeakKeyDictionary()
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def fts_source_name(table_name: str) -> str:
+    return f"{table_name}_fts_source"
+
+
+def trigram_table_name(table_name: str) -> str:
+    return f"{table_name}_trgm"
+
+
+def _find_search_tables(engine) -> FrozenSet[str]:
+    if engine.dialect.name != "sqlite":
+        return frozenset()
+    with engine.connect() as connection:
+        names = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).scalars()
+        return frozenset(
+            name for name in names if name.endswith("_fts") or name.endswith("_trgm")
+        )
+
+
+def _tables_of(bind) -> FrozenSet[str]:
+    # a Connection, e.g. from session.get_bind(), shares its engine's tables
+    engine = getattr(bind, "engine", bind)
+    tables = _search_tables.get(engine)
+    if tables is None:
+        tables = _search_tables[engine] = _find_search_tables(engine)
+    return tables
+
+
+def is_fts5_enabled(bind, table_name: str) -> bool:
+    """Whether the database of `bind` has the FTS5 table of `table_name`."""
+    return fts_table_name(table_name) in _tables_of(bind)
+
+
+def is_trigram_enabled(bind, table_name: str) -> bool:
+    """Whether the database of `bind` has the trigram table of `table_name`."""
+    return trigram_table_name(table_name) in _tables_of(bind)
+
+
+def _fts5_supported(connection, tokenize: str = "unicode61") -> bool:
+    try:
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS temp.mirix_fts5_probe "
+            f"USING fts5(x, tokenize='{tokenize}')"
+        )
+        connection.exec_driver_sql("DROP TABLE IF EXISTS temp.mirix_fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def _create_statements(table_name: str, columns: Sequence[str]) -> List[str]:
+    fts_name = fts_table_name(table_name)
+    source_name = fts_source_name(table_name)
+    column_list = ", ".join(columns)
+    source_columns = ", ".join(f"mirix_cjk_segment({c}) AS {c}" for c in columns)
+
+    return [
+        f"""CREATE VIEW IF NOT EXISTS {source_name} AS
+            SELECT rowid AS doc_rowid, {source_columns} FROM {table_name}""",
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5(
+            {column_list},
+            content='{source_name}',
+            content_rowid='doc_rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+    ] + _trigger_statements(fts_name, table_name, columns, "mirix_cjk_segment({})")
+
+
+def _create_trigram_statements(table_name: str, columns: Sequence[str]) -> List[str]:
+    trgm_name = trigram_table_name(table_name)
+    column_list = ", ".join(columns)
+
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {trgm_name} USING fts5(
+            {column_list},
+            content='{table_name}',
+            content_rowid='rowid',
+            tokenize='trigram case_sensitive 0'
+        )""",
+    ] + _trigger_statements(trgm_name, table_name, columns, "{}")
+
+
+def _trigger_statements(
+    fts_name: str, table_name: str, columns: Sequence[str], value: str
+) -> List[str]:
+    """Triggers keeping `fts_name` in sync; `value` formats each indexed column."""
+    column_list = ", ".join(columns)
+    new_values = ", ".join(value.format(f"new.{c}") for c in columns)
+    old_values = ", ".join(value.format(f"old.{c}") for c in columns)
+
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {table_name} BEGIN
+            INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {table_name} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE ON {table_name} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+        END""",
+    ]
+
+
+def ensure_fts5_tables(engine) -> bool:
+    """
+    Create the FTS5 tables and sync triggers for all memory tables.
+
+    Tables that are created for the first time are populated from the
+    existing rows with the FTS5 'rebuild' command. Safe to call on every
+    startup.
+
+    Returns:
+        True if FTS5 is available and the tables are in place.
+    """
+    enabled = _create_fts5_tables(engine)
+    if enabled:
+        _ensure_trigram_tables(engine)
+    # searches check the tables of the engine they run on
+    _search_tables[engine] = _find_search_tables(engine)
+    return enabled
+
+
+def _create_fts5_tables(engine) -> bool:
+    """Create the FTS5 tables and their triggers; False if unsupported."""
+    with engine.begin() as connection:
+        if not _fts5_supported(connection):
+            logger.warning(
+                "SQLite was compiled without FTS5; 'fts5_match' searches will fall back to 'bm25'"
+            )
+            return False
+
+        existing = {
+            row[0]
+            for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+            )
+        }
+
+        for table_name, columns in FTS5_TABLES.items():
+            if table_name not in existing:
+                continue
+            fts_name = fts_table_name(table_name)
+            if fts_name in existing and fts_source_name(table_name) not in existing:
+                # Indexed before CJK segmentation: drop it and index again
+                for suffix in ("ai", "ad", "au"):
+                    connection.exec_driver_sql(
+                        f"DROP TRIGGER IF EXISTS {fts_name}_{suffix}"
+                    )
+                connection.exec_driver_sql(f"DROP TABLE {fts_name}")
+                existing.discard(fts_name)
+            for statement in _create_statements(table_name, columns):
+                connection.exec_driver_sql(statement)
+            if fts_name not in existing:
+                # Index rows that were written before the FTS table existed
+                connection.exec_driver_sql(
+                    f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"
+                )
+                logger.info(f"Built FTS5 index {fts_name}")
+    return True
+
+
+def _ensure_trigram_tables(engine) -> bool:
+    """Create the trigram tables and their triggers; False if unsupported."""
+    with engine.begin() as connection:
+        if not _fts5_supported(connection, "trigram"):
+            logger.warning(
+                "SQLite has no FTS5 trigram tokenizer (needs 3.34+); "
+                "substring searches will scan the tables"
+            )
+            return False
+
+        existing = {
+            row[0]
+            for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        for table_name, columns in TRIGRAM_TABLES.items():
+            if table_name not in existing:
+                continue
+            trgm_name = trigram_table_name(table_name)
+            for statement in _create_trigram_statements(table_name, columns):
+                connection.exec_driver_sql(statement)
+            if trgm_name not in existing:
+                # Index rows that were written before the trigram table existed
+                connection.exec_driver_sql(
+                    f"INSERT INTO {trgm_name}({trgm_name}) VALUES ('rebuild')"
+                )
+                logger.info(f"Built FTS5 trigram index {trgm_name}")
+    return True
+
+
+def rebuild_fts5_tables(engine) -> None:
+    """
+    Rebuild every FTS5 and trigram index from its base table.
+
+    The FTS tables are keyed by the implicit rowid of the base tables, which
+    a VACUUM is allowed to renumber, so run this after vacuuming the DB.
+    """
+    with engine.begin() as connection:
+        for table_name in FTS5_TABLES:
+            if not is_fts5_enabled(engine, table_name):
+                continue
+            fts_name = fts_table_name(table_name)
+            connection.exec_driver_sql(
+                f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"
+            )
+        for table_name in TRIGRAM_TABLES:
+            if not is_trigram_enabled(engine, table_name):
+                continue
+            trgm_name = trigram_table_name(table_name)
+            connection.exec_driver_sql(
+                f"INSERT INTO {trgm_name}({trgm_name}) VALUES ('rebuild')"
+            )
+
+
+def build_fts5_match_expression(
+    tokens: Sequence[str], column: Optional[str] = None
+) -> Optional[str]:
+    """
+    Turn cleaned query tokens (`tokenize_for_search`) into an FTS5 MATCH
+    expression.
+
+    Every token is quoted so that FTS5 operators in user input are treated as
+    plain text, and tokens are OR-ed together to get BM25 semantics (a
+    document matching any term is a candidate, more matches rank higher).
+    """
+    quoted = []
+    for token in tokens:
+        token = re.sub(r'"', "", token).strip()
+        if token:
+            quoted.append(f'"{token}"')
+    if not quoted:
+        return None
+
+    expression = " OR ".join(quoted)
+    if column:
+        return f"{{{column}}} : ({expression})"
+    return expression
+
+
+def fts5_search(
+    session,
+    table_name: str,
+    tokens: Sequence[str],
+    user_id: str,
+    search_field: str = "",
+    limit: Optional[int] = 50,
+    filters: Optional[Dict[str, Sequence[str]]] = None,
+) -> List[str]:
+    """
+    Rank rows of a memory table with FTS5 and return their ids, best first.
+
+    Args:
+        session: Database session
+        table_name: Base memory table (a key of FTS5_TABLES)
+        tokens: Cleaned query tokens
+        user_id: Only rows owned by this user are returned
+        search_field: Restrict matching to one indexed column, or '' for all
+        limit: Maximum number of ids to return
+        filters: Optional extra ``column IN (...)`` filters on the base table
+
+    Returns:
+        List of row ids ordered by bm25() relevance
+    """
+    columns = FTS5_TABLES[table_name]
+    column = search_field if search_field in columns else None
+    match_expression = build_fts5_match_expression(tokens, column)
+    if match_expression is None:
+        return []
+
+    fts_name = fts_table_name(table_name)
+    weights = ", ".join(
+        str(_COLUMN_WEIGHTS[min(i, len(_COLUMN_WEIGHTS) - 1)])
+        for i in range(len(columns))
+    )
+
+    params = {"match": match_expression, "user_id": user_id}
+    filter_sql = ""
+    for i, (filter_column, values) in enumerate((filters or {}).items()):
+        placeholders = []
+        for j, value in enumerate(values):
+            placeholders.append(f":f{i}_{j}")
+            params[f"f{i}_{j}"] = value
+        if not placeholders:
+            return []
+        filter_sql += f" AND m.{filter_column} IN ({', '.join(placeholders)})"
+
+    limit_sql = ""
+    if limit:
+        limit_sql = " LIMIT :limit_val"
+        params["limit_val"] = limit
+
+    # bm25() returns lower-is-better scores
+    sql = text(f"""
+        SELECT m.id
+        FROM {fts_name}
+        JOIN {table_name} AS m ON m.rowid = {fts_name}.rowid
+        WHERE {fts_name} MATCH :match
+            AND m.user_id = :user_id{filter_sql}
+        ORDER BY bm25({fts_name}, {weights}), m.created_at DESC
+        {limit_sql}
+    """)
+
+    return [row[0] for row in session.execute(sql, params)]
+
+
+def trigram_rowids(table_name: str, substring: str):
+    """
+    SELECT of the rowids of `table_name` rows with `substring` in any of its
+    TRIGRAM_TABLES columns, case-insensitively. `substring` needs at least
+    TRIGRAM_MIN_LENGTH characters.
+    """
+    return _trigram_match(table_name, _quote_trigram(substring))
+
+
+def trigram_any_rowids(table_name: str, column_name: str, trigrams: Sequence[str]):
+    """
+    SELECT of the rowids of `table_name` rows whose `column_name` contains
+    any of `trigrams` (three-character strings), case-insensitively.
+    """
+    alternatives = " OR ".join(_quote_trigram(trigram) for trigram in trigrams)
+    return _trigram_match(table_name, f"{{{column_name}}} : ({alternatives})")
+
+
+def _quote_trigram(substring: str) -> str:
+    # a quoted FTS5 string matches as a substring under the trigram tokenizer
+    return '"' + substring.replace('"', '""') + '"'
+
+
+def _trigram_match(table_name: str, expression: str):
+    trgm_name = trigram_table_name(table_name)
+    return select(table(trgm_name, column("rowid")).c.rowid).where(
+        text(f"{trgm_name} MATCH :trigram_pattern").bindparams(
+            trigram_pattern=expression
+        )
+    )
@@ -1,4 +1,3 @@
-import base64
 import sqlite3
 from typing import Optional, Union
 
@@ -7,6 +6,8 @@ from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
 from mirix.constants import MAX_EMBEDDING_DIM
+from mirix.helpers.search_tokenizer import segment_cjk
+from mirix.helpers.vector_codec import decode_vector, encode_vector, vector_dims
 
 
 def adapt_array(arr):
@@ -21,10 +22,7 @@ def adapt_array(arr):
     elif not isinstance(arr, np.ndarray):
         raise ValueError(f"Unsupported type: {type(arr)}")
 
-    # Convert to bytes and then base64 encode
-    bytes_data = arr.tobytes()
-    base64_data = base64.b64encode(bytes_data)
-    return sqlite3.Binary(base64_data)
+    return sqlite3.Binary(encode_vector(arr))
 
 
 def convert_array(text):
@@ -38,16 +36,8 @@ def convert_array(text):
     if isinstance(text, np.ndarray):
         return text
 
-    # Handle both bytes and sqlite3.Binary
-    binary_data = bytes(text) if isinstance(text, sqlite3.Binary) else text
-
-    try:
-        # First decode base64
-        decoded_data = base64.b64decode(binary_data)
-        # Then convert to numpy array
-        return np.frombuffer(decoded_data, dtype=np.float32)
-    except Exception:
-        return None
+    # Raw float32 with a header, or base64 written by older versions
+    return decode_vector(text)
 
 
 def verify_embedding_dimension(
@@ -70,7 +60,7 @@ def verify_embedding_dimension(
 
 def validate_and_transform_embedding(
     embedding: Union[bytes, sqlite3.Binary, list, np.ndarray],
-    expected_dim: int = MAX_EMBEDDING_DIM,
+    expected_dim: Optional[int] = MAX_EMBEDDING_DIM,
     dtype: np.dtype = np.float32,
 ) -> Optional[np.ndarray]:
     """
@@ -78,7 +68,7 @@ def validate_and_transform_embedding(
 
     Args:
         embedding: Input embedding in various possible formats
-        expected_dim: Expected embedding dimension (default 4096)
+        expected_dim: Expected embedding dimension, or None to accept any
         dtype: NumPy dtype for the embedding (default float32)
 
     Returns:
@@ -100,8 +90,11 @@ def validate_and_transform_embedding(
     else:
         raise ValueError(f"Unsupported embedding type: {type(embedding)}")
 
+    if vec is None:
+        raise ValueError("Malformed embedding")
+
     # Validate dimension
-    if vec.shape[0] != expected_dim:
+    if expected_dim is not None and vec.shape[0] != expected_dim:
         raise ValueError(
             f"Invalid embedding dimension: got {vec.shape[0]}, expected {expected_dim}"
         )
@@ -109,14 +102,18 @@ def validate_and_transform_embedding(
     return vec
 
 
-def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
+def cosine_distance(embedding1, embedding2, expected_dim=None):
     """
     Calculate cosine distance between two embeddings
 
+    Embeddings are stored at the native dimension of their model, so two
+    embeddings of different dimensions are not comparable; queries filter
+    them out with `vector_dims`.
+
     Args:
         embedding1: First embedding
         embedding2: Second embedding
-        expected_dim: Expected embedding dimension (default 4096)
+        expected_dim: Expected embedding dimension (default: any)
 
     Returns:
         float: Cosine distance
@@ -130,6 +127,8 @@ def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
         vec2 = validate_and_transform_embedding(embedding2, expected_dim)
     except ValueError:
         return 0.0
+    if vec1.shape != vec2.shape:
+        return 0.0
 
     similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
     distance = float(1.0 - similarity)
@@ -142,6 +141,12 @@ def register_functions(dbapi_connection, connection_record):
     """Register SQLite functions"""
     if isinstance(dbapi_connection, sqlite3.Connection):
         dbapi_connection.create_function("cosine_distance", 2, cosine_distance)
+        # same name and meaning as the pgvector function
+        dbapi_connection.create_function("vector_dims", 1, vector_dims)
+        # CJK bigrams for the FTS5 tables, see orm/sqlite_fts.py
+        dbapi_connection.create_function(
+            "mirix_cjk_segment", 1, segment_cjk, deterministic=True
+        )
 
 
 @event.listens_for(Engine, "connect")
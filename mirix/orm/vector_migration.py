@@ -0,0 +1,323 @@
+"""
+Rewrite stored embeddings into the current storage format.
+
+- SQLite: raw float32 with a header (mirix.helpers.vector_codec) instead of
+  the legacy base64 encoding;
+- SQLite and PostgreSQL: the native dimension of the embedding model instead
+  of zero-padding to MAX_EMBEDDING_DIM. On PostgreSQL the `vector(1536)`
+  columns are first relaxed to `vector`, which is a metadata-only change.
+
+Searches only compare vectors of the query's dimension, so padded rows are
+invisible to them until they are migrated: `ensure_native_vectors` runs at
+startup and migrates every vector column not yet recorded in
+`vector_column_migration`. scripts/migrate_vector_blobs.py runs the same
+migration by hand.
+
+The padding is found from `embedding_config.embedding_dim` when it is
+consistent with the stored vector, and from the run of trailing zeros
+otherwise (rounded up to a multiple of 64, like every common model size).
+
+The migration works in small batches, each committed in its own short
+transaction, and only rewrites rows nobody changed since they were read, so
+it is safe to run while Mirix is writing and to interrupt and run again.
+"""
+
+import json
+import sqlite3
+import time
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from mirix.constants import MAX_EMBEDDING_DIM
+from mirix.helpers.vector_codec import VECTOR_MAGIC, decode_vector, encode_vector
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+# Model dimensions are multiples of this; used when the config is unhelpful
+DIM_GRANULARITY = 64
+
+MIGRATION_TABLE = "vector_column_migration"
+
+
+def native_dim(vector, config_dim=None) -> int:
+    """Length of `vector` without the zero padding added by older versions."""
+    size = len(vector)
+    if config_dim and 0 < config_dim < size and not np.any(vector[config_dim:]):
+        return config_dim
+
+    nonzero = np.flatnonzero(vector)
+    if len(nonzero) == 0:
+        return size
+    dim = -(-(int(nonzero[-1]) + 1) // DIM_GRANULARITY) * DIM_GRANULARITY
+    return min(dim, size)
+
+
+def _config_dim(embedding_config):
+    if not embedding_config:
+        return None
+    if isinstance(embedding_config, str):
+        try:
+            embedding_config = json.loads(embedding_config)
+        except ValueError:
+            return None
+    return embedding_config.get("embedding_dim")
+
+
+# --------------------------
+# SQLite
+# --------------------------
+
+
+def find_vector_columns(conn) -> List[Tuple[str, str, bool]]:
+    """(table, column, has_embedding_config) of every CommonVector column."""
+    tables = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+    ]
+    columns = []
+    for table in tables:
+        table_columns = list(conn.execute(f'PRAGMA table_info("{table}")'))
+        has_config = any(name == "embedding_config" for _, name, *_ in table_columns)
+        for _, name, declared_type, *_ in table_columns:
+            if name.endswith("_embedding") and declared_type.upper() == "BINARY":
+                columns.append((table, name, has_config))
+    return columns
+
+
+def _candidates_sql(column):
+    # legacy encoding, or possibly padded
+    return (
+        f'"{column}" IS NOT NULL AND (substr("{column}", 1, 4) != ? '
+        f'OR vector_dims("{column}") = {MAX_EMBEDDING_DIM})'
+    )
+
+
+def count_candidates(conn, table, column):
+    return conn.execute(
+        f'SELECT count(*) FROM "{table}" WHERE {_candidates_sql(column)}',
+        (VECTOR_MAGIC,),
+    ).fetchone()[0]
+
+
+def migrate_column(conn, table, column, has_config, batch_size):
+    """Convert one column; returns (converted, unreadable) row counts."""
+    config = "embedding_config" if has_config else "NULL"
+    converted = unreadable = 0
+    last_rowid = -1
+    while True:
+        rows = conn.execute(
+            f'SELECT rowid, "{column}", {config} FROM "{table}" WHERE rowid > ? '
+            f"AND {_candidates_sql(column)} ORDER BY rowid LIMIT ?",
+            (last_rowid, VECTOR_MAGIC, batch_size),
+        ).fetchall()
+        if not rows:
+            return converted, unreadable
+
+        updates = []
+        for rowid, data, embedding_config in rows:
+            vector = decode_vector(data)
+            if vector is None:
+                unreadable += 1
+                continue
+            vector = vector[: native_dim(vector, _config_dim(embedding_config))]
+            encoded = encode_vector(vector)
+            if encoded != bytes(data):
+                updates.append((sqlite3.Binary(encoded), rowid, data))
+        last_rowid = rows[-1][0]
+
+        with conn:
+            # only rows nobody rewrote since they were read
+            cursor = conn.executemany(
+                f'UPDATE "{table}" SET "{column}" = ? WHERE rowid = ? AND "{column}" = ?',
+                updates,
+            )
+        converted += max(cursor.rowcount, 0)
+
+
+def _migrated_columns(conn):
+    with conn:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} ("
+            "table_name TEXT NOT NULL, column_name TEXT NOT NULL, "
+            "PRIMARY KEY (table_name, column_name))"
+        )
+    return set(conn.execute(f"SELECT table_name, column_name FROM {MIGRATION_TABLE}"))
+
+
+def migrate_sqlite_vectors(conn, batch_size: int = 500, only_pending: bool = False):
+    """
+    Migrate the vector columns of the sqlite3 connection `conn`, which needs
+    the server's SQL functions (orm/sqlite_functions.register_functions).
+
+    Yields (table, column, converted, unreadable) per column. With
+    `only_pending`, columns recorded as migrated by an earlier run are skipped.
+    """
+    done = _migrated_columns(conn)
+    for table, column, has_config in find_vector_columns(conn):
+        if only_pending and (table, column) in done:
+            continue
+        converted, unreadable = migrate_column(
+            conn, table, column, has_config, batch_size
+        )
+        with conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO {MIGRATION_TABLE} VALUES (?, ?)",
+                (table, column),
+            )
+        yield table, column, converted, unreadable
+
+
+# --------------------------
+# PostgreSQL
+# --------------------------
+
+
+def find_pg_vector_columns(connection) -> List[Tuple[str, str, bool, bool]]:
+    """(table, column, has_embedding_config, has_typmod) of every pgvector column."""
+    return [
+        tuple(row)
+        for row in connection.execute(
+            text(
+                "SELECT c.relname, a.attname, EXISTS ("
+                "  SELECT 1 FROM pg_attribute e"
+                "  WHERE e.attrelid = c.oid AND e.attname = 'embedding_config'"
+                "  AND NOT e.attisdropped"
+                "), a.atttypmod > 0 "
+                "FROM pg_attribute a "
+                "JOIN pg_class c ON c.oid = a.attrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "JOIN pg_type t ON t.oid = a.atttypid "
+                "WHERE t.typname = 'vector' AND c.relkind = 'r' AND NOT a.attisdropped "
+                "AND n.nspname = current_schema()"
+            )
+        )
+    ]
+
+
+def count_pg_candidates(connection, table, column):
+    return connection.execute(
+        text(
+            f'SELECT count(*) FROM "{table}" '
+            f'WHERE vector_dims("{column}") = {MAX_EMBEDDING_DIM}'
+        )
+    ).scalar()
+
+
+def migrate_pg_column(connection, table, column, has_config, batch_size) -> int:
+    """Relax `vector(n)` to `vector` and trim the padded rows; returns rows converted."""
+    connection.execute(
+        text(f'ALTER TABLE "{table}" ALTER COLUMN "{column}" TYPE vector')
+    )
+    connection.commit()
+
+    config = "embedding_config" if has_config else "NULL"
+    converted = 0
+    last_id = ""
+    while True:
+        rows = connection.execute(
+            text(
+                f'SELECT id, "{column}"::text, {config} FROM "{table}" '
+                f'WHERE id > :last_id AND vector_dims("{column}") = {MAX_EMBEDDING_DIM} '
+                f"ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size},
+        ).fetchall()
+        if not rows:
+            return converted
+        last_id = rows[-1][0]
+
+        for row_id, value, embedding_config in rows:
+            vector = np.array(json.loads(value), dtype=np.float32)
+            dim = native_dim(vector, _config_dim(embedding_config))
+            if dim == len(vector):
+                continue
+            result = connection.execute(
+                text(
+                    f'UPDATE "{table}" SET "{column}" = CAST(:vector AS vector) '
+                    f'WHERE id = :id AND "{column}"::text = :old'
+                ),
+                {
+                    "vector": json.dumps(vector[:dim].tolist()),
+                    "id": row_id,
+                    "old": value,
+                },
+            )
+            converted += result.rowcount
+        connection.commit()
+
+
+def migrate_pg_vectors(connection, batch_size: int = 500, only_pending: bool = False):
+    """PostgreSQL twin of `migrate_sqlite_vectors`, on a SQLAlchemy connection."""
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} ("
+            "table_name TEXT NOT NULL, column_name TEXT NOT NULL, "
+            "PRIMARY KEY (table_name, column_name))"
+        )
+    )
+    connection.commit()
+    done = set(
+        connection.execute(
+            text(f"SELECT table_name, column_name FROM {MIGRATION_TABLE}")
+        )
+    )
+    for table, column, has_config, has_typmod in find_pg_vector_columns(connection):
+        # a typed column predates native dimensions, whatever the record says
+        if only_pending and (table, column) in done and not has_typmod:
+            continue
+        converted = migrate_pg_column(connection, table, column, has_config, batch_size)
+        connection.execute(
+            text(
+                f"INSERT INTO {MIGRATION_TABLE} VALUES (:table, :column) "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {"table": table, "column": column},
+        )
+        connection.commit()
+        yield table, column, converted, 0
+
+
+def ensure_native_vectors(engine, batch_size: int = 500) -> int:
+    """
+    Migrate the vector columns no earlier startup has migrated. Returns the
+    number of rows converted. Databases written by this version only record
+    their columns; upgraded ones are converted once, online.
+    """
+    start = time.time()
+    total = 0
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            results = list(
+                migrate_pg_vectors(connection, batch_size, only_pending=True)
+            )
+    else:
+        raw = engine.raw_connection()
+        try:
+            results = list(
+                migrate_sqlite_vectors(
+                    raw.driver_connection, batch_size, only_pending=True
+                )
+            )
+        finally:
+            raw.close()
+
+    for table, column, converted, unreadable in results:
+        total += converted
+        if converted:
+            logger.info(
+                f"Stored {table}.{column} at native dimensions: "
+                f"{converted} rows converted"
+            )
+        if unreadable:
+            logger.error(
+                f"{table}.{column}: {unreadable} unreadable vectors left unchanged"
+            )
+    if total:
+        logger.info(f"Vector migration done in {time.time() - start:.1f}s")
+    return total
@@ -80,26 +80,12 @@ class SemanticMemoryItem(SemanticMemoryItemBase):
         None, description="The embedding configuration used by the event"
     )
 
-    # need to validate both details_embedding and summary_embedding to ensure they are the same size
     @field_validator("details_embedding", "summary_embedding", "name_embedding")
     @classmethod
-    def pad_embeddings(cls, embedding: List[float]) -> List[float]:
-        """Pad embeddings to `MAX_EMBEDDING_SIZE`. This is necessary to ensure all stored embeddings are the same size."""
-        import numpy as np
-
-        if embedding:
-            if len(embedding) > MAX_EMBEDDING_DIM:
-                # Truncate if too long
-                return embedding[:MAX_EMBEDDING_DIM]
-            elif len(embedding) < MAX_EMBEDDING_DIM:
-                # Pad if too short
-                np_embedding = np.array(embedding)
-                padded_embedding = np.pad(
-                    np_embedding,
-                    (0, MAX_EMBEDDING_DIM - np_embedding.shape[0]),
-                    mode="constant",
-                )
-                return padded_embedding.tolist()
+    def truncate_embeddings(cls, embedding: List[float]) -> List[float]:
+        """Truncate embeddings to `MAX_EMBEDDING_DIM`. Shorter embeddings are stored at their native dimension."""
+        if embedding and len(embedding) > MAX_EMBEDDING_DIM:
+            return embedding[:MAX_EMBEDDING_DIM]
         return embedding
 
 
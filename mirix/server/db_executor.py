@@ -0,0 +1,45 @@
+"""
+Thread pool for the blocking database work of the FastAPI endpoints.
+
+The endpoints are `async def`, but the managers use synchronous SQLAlchemy
+sessions: called directly, a slow query holds the event loop, and with it
+every SSE stream and request in flight. `run_db` runs such calls on a
+dedicated pool instead. The loop stays free to stream, and a burst of memory
+browsing queues on these threads rather than on the default executor that
+runs the agent's `send_message`.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from mirix.settings import settings
+
+# Thread name prefix of the pool
+DB_POOL = "DatabaseAccess"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.db_executor_workers),
+                    thread_name_prefix=DB_POOL,
+                )
+    return _executor
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run `func(*args, **kwargs)` on the database pool and await its result."""
+    loop = asyncio.get_running_loop()
+    # like asyncio.to_thread, the call sees the context variables of the request
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_db_executor(), call)
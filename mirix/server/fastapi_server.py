@@ -16,10 +16,12 @@ from pydantic import BaseModel
 
 from ..agent.agent_wrapper import AgentWrapper
 from ..functions.mcp_client import StdioServerConfig, get_mcp_client_manager
+from ..orm.errors import NoResultFound
 from ..services.mcp_marketplace import get_mcp_marketplace
 from ..services.mcp_tool_registry import get_mcp_tool_registry
 from ..services.mech_manager import MechManager
 from ..agent.app_constants import PROJECTS_MD_PATH
+from .db_executor import run_db
 
 # Initialize MechManager
 mech_manager = MechManager(PROJECTS_MD_PATH)
@@ -58,33 +60,38 @@ def get_user_or_default(agent_wrapper, user_id: Optional[str] = None):
         return agent_wrapper.client.server.user_manager.get_default_user()
 
 
-def fetch_raw_memory_details(raw_memory_references: List[str]) -> List[Dict]:
+def fetch_raw_memory_details(items: List[Any]) -> List[List[Dict]]:
     """
-    Fetch detailed information for raw_memory references.
+    Fetch detailed information for the raw_memory references of each item.
     Reusable across all memory type endpoints.
 
+    The references of all the items are resolved together, with one query
+    (RawMemoryManager.get_raw_memory_sources) instead of one per reference.
+
     Args:
-        raw_memory_references: List of raw_memory IDs
+        items: Memory items (or blocks) with an optional raw_memory_references list
 
     Returns:
-        List of dicts containing raw_memory details
+        For each item, a list of dicts containing raw_memory details
     """
-    from mirix.orm.raw_memory import RawMemoryItem
-    from mirix.server.server import db_context
+    from mirix.services.raw_memory_manager import RawMemoryManager
+
+    reference_lists = [getattr(item, "raw_memory_references", None) or [] for item in items]
+    raw_memory_ids = [raw_id for references in reference_lists for raw_id in references]
+    sources = RawMemoryManager().get_raw_memory_sources(raw_memory_ids) if raw_memory_ids else {}
 
     raw_memory_details = []
-    if raw_memory_references:
-        with db_context() as session:
-            for raw_id in raw_memory_references:
-                raw_mem = session.get(RawMemoryItem, raw_id)
-                if raw_mem:
-                    raw_memory_details.append({
-                        "id": raw_mem.id,
-                        "source_app": raw_mem.source_app,
-                        "source_url": raw_mem.source_url,
-                        "captured_at": raw_mem.captured_at.isoformat() if raw_mem.captured_at else None,
-                        "ocr_text": raw_mem.ocr_text[:200] if raw_mem.ocr_text else "",
-                    })
+    for references in reference_lists:
+        details = []
+        for raw_id in references:
+            source = sources.get(raw_id)
+            if source:
+                captured_at = source["captured_at"]
+                details.append({
+                    **source,
+                    "captured_at": captured_at.isoformat() if captured_at else None,
+                })
+        raw_memory_details.append(details)
     return raw_memory_details
 
 
@@ -631,10 +638,17 @@ async def startup_event():
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring server status"""
+    from mirix.services.embedding_cache import embedding_cache
+    from mirix.services.retrieval_cache import retrieval_cache
+    from mirix.services.retrieval_engine import memory_retrieval_engine
+
     return {
         "status": "healthy",
         "agent_initialized": agent is not None,
         "timestamp": datetime.now().isoformat(),
+        "embedding_cache": embedding_cache.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "memory_search": memory_retrieval_engine.stats(),
     }
 
 
@@ -871,7 +885,7 @@ async def send_streaming_message_endpoint(request: MessageRequest):
             async def run_agent():
                 try:
                     # find the current active user
-                    users = agent.client.server.user_manager.list_users()
+                    users = await run_db(agent.client.server.user_manager.list_users)
                     active_user = next(
                         (user for user in users if user.status == "active"), None
                     )
@@ -998,28 +1012,25 @@ async def send_streaming_message_endpoint(request: MessageRequest):
                                 raw_memory_manager = RawMemoryManager()
 
                                 # Get current user for permission check
-                                users = agent.client.server.user_manager.list_users()
+                                users = await run_db(agent.client.server.user_manager.list_users)
                                 active_user = next((u for u in users if u.status == "active"), None)
                                 current_user = active_user if active_user else (users[0] if users else None)
 
                                 if current_user:
+                                    # one query for all the references
+                                    sources = await run_db(
+                                        raw_memory_manager.get_raw_memory_sources,
+                                        memory_refs,
+                                        current_user.id,
+                                    )
                                     for ref_id in memory_refs:
-                                        try:
-                                            raw_mem = raw_memory_manager.get_raw_memory_by_id(
-                                                raw_memory_id=ref_id,
-                                                user_id=current_user.id
-                                            )
-                                            if raw_mem:
-                                                memory_details.append({
-                                                    "id": raw_mem.id,
-                                                    "source_app": raw_mem.source_app,
-                                                    "source_url": raw_mem.source_url,
-                                                    "captured_at": raw_mem.captured_at.isoformat() if raw_mem.captured_at else None,
-                                                    "ocr_text": raw_mem.ocr_text,
-                                                })
-                                        except Exception as e:
-                                            print(f"[DEBUG] Failed to fetch raw_memory {ref_id}: {e}")
-                                            continue
+                                        source = sources.get(ref_id)
+                                        if source:
+                                            captured_at = source["captured_at"]
+                                            memory_details.append({
+                                                **source,
+                                                "captured_at": captured_at.isoformat() if captured_at else None,
+                                            })
 
                             result_queue.put({
                                 "type": "final",
@@ -1147,7 +1158,7 @@ async def get_personas(user_id: Optional[str] = None):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1166,7 +1177,7 @@ async def update_persona(request: UpdatePersonaRequest):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1189,7 +1200,7 @@ async def apply_persona_template(request: ApplyPersonaTemplateRequest):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1231,7 +1242,7 @@ async def get_core_memory_persona(user_id: Optional[str] = None):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1459,7 +1470,7 @@ async def get_current_timezone():
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1483,7 +1494,7 @@ async def set_timezone(request: SetTimezoneRequest):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1600,6 +1611,12 @@ async def update_api_key(request: ApiKeyRequest):
                     f"API key '{request.key_name}' saved to .env file successfully"
                 )
 
+        if result["success"]:
+            # Rebuild embedding clients with the new key on next use
+            from mirix.embeddings import clear_embedding_models
+
+            clear_embedding_models()
+
         return ApiKeyUpdateResponse(
             success=result["success"], message=result["message"]
         )
@@ -1658,15 +1675,22 @@ async def get_episodic_memory(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
 ):
-    """Get episodic memory with search and pagination support"""
+    """
+    Get episodic memory with search and pagination support. Pages are
+    addressed by `page`, or by `cursor` (the `next_cursor` of the previous
+    page) which keeps deep pages as fast as the first one. `total` is cached
+    until the memory is written; `exact_total` counts again.
+    """
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1678,21 +1702,21 @@ async def get_episodic_memory(
         offset = (page - 1) * limit
 
         # Use the new paginated method with search support
-        result = episodic_manager.list_episodic_items_paginated(
+        result = await run_db(
+            episodic_manager.list_episodic_items_paginated,
             actor=target_user,
             search_query=search,
             limit=limit,
             offset=offset,
+            cursor=cursor,
+            exact_total=exact_total,
         )
 
         # Transform to frontend format
         episodic_items = []
-        for event in result["items"]:
-            # Fetch raw_memory_references details if they exist
-            raw_memory_details = []
-            if hasattr(event, 'raw_memory_references') and event.raw_memory_references:
-                raw_memory_details = fetch_raw_memory_details(event.raw_memory_references)
-
+        # Fetch raw_memory details of all items at once
+        raw_memory_details_by_item = await run_db(fetch_raw_memory_details, result["items"])
+        for event, raw_memory_details in zip(result["items"], raw_memory_details_by_item):
             episodic_items.append(
                 {
                     "id": event.id,
@@ -1712,8 +1736,11 @@ async def get_episodic_memory(
             "total": result["total"],
             "page": result["page"],
             "pages": result["pages"],
+            "next_cursor": result["next_cursor"],
         }
 
+    except NoResultFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error retrieving episodic memory: {str(e)}")
         # Return empty list if no memory or error
@@ -1725,7 +1752,9 @@ async def get_semantic_memory(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
 ):
     """
     Get semantic memory (knowledge) with search and pagination support.
@@ -1733,6 +1762,8 @@ async def get_semantic_memory(
     Args:
         search: Optional search query (searches in name, summary, details)
         page: Page number (1-indexed, default: 1)
+        cursor: Optional `next_cursor` of the previous page, replaces `page`
+        exact_total: Count the matching items instead of using a cached total
         limit: Maximum number of items to return per page (default: 50)
         user_id: Optional user ID (unused, kept for backward compatibility)
 
@@ -1740,15 +1771,16 @@ async def get_semantic_memory(
         Dictionary containing:
             - items: List of semantic memory items
             - total: Total count of matching items
-            - page: Current page number
+            - page: Current page number (None when paging by cursor)
             - pages: Total number of pages
+            - next_cursor: Cursor of the next page, None on the last one
     """
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1762,22 +1794,22 @@ async def get_semantic_memory(
         offset = (page - 1) * limit
 
         # Use the new paginated method with search support
-        result = semantic_manager.list_semantic_items_paginated(
+        result = await run_db(
+            semantic_manager.list_semantic_items_paginated,
             actor=target_user,
             search_query=search,
             limit=limit,
             offset=offset,
+            cursor=cursor,
+            exact_total=exact_total,
             timezone_str=target_user.timezone,
         )
 
         # Transform items to frontend format
         semantic_items_list = []
-        for item in result["items"]:
-            # Fetch raw_memory details if references exist
-            raw_memory_details = []
-            if hasattr(item, 'raw_memory_references') and item.raw_memory_references:
-                raw_memory_details = fetch_raw_memory_details(item.raw_memory_references)
-
+        # Fetch raw_memory details of all items at once
+        raw_memory_details_by_item = await run_db(fetch_raw_memory_details, result["items"])
+        for item, raw_memory_details in zip(result["items"], raw_memory_details_by_item):
             semantic_items_list.append(
                 {
                     "id": item.id,
@@ -1796,8 +1828,11 @@ async def get_semantic_memory(
             "total": result["total"],
             "page": result["page"],
             "pages": result["pages"],
+            "next_cursor": result["next_cursor"],
         }
 
+    except NoResultFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error retrieving semantic memory: {str(e)}")
         import traceback
@@ -1810,15 +1845,17 @@ async def get_procedural_memory(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
 ):
-    """Get procedural memory with search and pagination support"""
+    """Get procedural memory with search and pagination support (see get_episodic_memory)"""
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1833,14 +1870,19 @@ async def get_procedural_memory(
             offset = (page - 1) * limit
 
             # Use the new paginated method with search support
-            result = procedural_manager.list_procedural_items_paginated(
+            result = await run_db(
+                procedural_manager.list_procedural_items_paginated,
                 actor=target_user,
                 search_query=search,
                 limit=limit,
                 offset=offset,
+                cursor=cursor,
+                exact_total=exact_total,
             )
 
-            for item in result["items"]:
+            # Fetch raw_memory details of all items at once
+            raw_memory_details_by_item = await run_db(fetch_raw_memory_details, result["items"])
+            for item, raw_memory_details in zip(result["items"], raw_memory_details_by_item):
                 # Parse steps if it's a JSON string
                 steps = item.steps
                 if isinstance(steps, str):
@@ -1866,11 +1908,6 @@ async def get_procedural_memory(
                         else:
                             steps = []
 
-                # Fetch raw_memory details if references exist
-                raw_memory_details = []
-                if hasattr(item, 'raw_memory_references') and item.raw_memory_references:
-                    raw_memory_details = fetch_raw_memory_details(item.raw_memory_references)
-
                 procedural_items_list.append(
                     {
                         "id": item.id,
@@ -1890,12 +1927,17 @@ async def get_procedural_memory(
                 "total": result["total"],
                 "page": result["page"],
                 "pages": result["pages"],
+                "next_cursor": result["next_cursor"],
             }
 
+        except NoResultFound as e:
+            raise HTTPException(status_code=404, detail=str(e))
         except Exception as e:
             print(f"Error retrieving procedural memory: {str(e)}")
             return {"items": [], "total": 0, "page": 1, "pages": 0}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error retrieving procedural memory: {str(e)}")
         return {"items": [], "total": 0, "page": 1, "pages": 0}
@@ -1906,15 +1948,17 @@ async def get_resource_memory(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
 ):
-    """Get resource memory with search and pagination support"""
+    """Get resource memory with search and pagination support (see get_episodic_memory)"""
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -1925,21 +1969,21 @@ async def get_resource_memory(
         offset = (page - 1) * limit
 
         # Use the new paginated method with search support
-        result = resource_manager.list_resource_items_paginated(
+        result = await run_db(
+            resource_manager.list_resource_items_paginated,
             actor=target_user,
             search_query=search,
             limit=limit,
             offset=offset,
+            cursor=cursor,
+            exact_total=exact_total,
         )
 
         # Transform to frontend format
         docs_files = []
-        for resource in result["items"]:
-            # Fetch raw_memory details if references exist
-            raw_memory_details = []
-            if hasattr(resource, 'raw_memory_references') and resource.raw_memory_references:
-                raw_memory_details = fetch_raw_memory_details(resource.raw_memory_references)
-
+        # Fetch raw_memory details of all items at once
+        raw_memory_details_by_item = await run_db(fetch_raw_memory_details, result["items"])
+        for resource, raw_memory_details in zip(result["items"], raw_memory_details_by_item):
             docs_files.append(
                 {
                     "id": resource.id,
@@ -1969,8 +2013,11 @@ async def get_resource_memory(
             "total": result["total"],
             "page": result["page"],
             "pages": result["pages"],
+            "next_cursor": result["next_cursor"],
         }
 
+    except NoResultFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error retrieving resource memory: {str(e)}")
         return {"items": [], "total": 0, "page": 1, "pages": 0}
@@ -1984,24 +2031,22 @@ async def get_core_memory():
 
     try:
         # Get core memory from the main agent
-        core_memory = agent.client.get_in_context_memory(
-            agent.agent_states.agent_state.id
+        core_memory = await run_db(
+            agent.client.get_in_context_memory, agent.agent_states.agent_state.id
         )
 
         core_understanding = []
         total_characters = 0
 
+        # Fetch raw_memory details of all blocks at once
+        raw_memory_details_by_block = await run_db(fetch_raw_memory_details, core_memory.blocks)
+
         # Extract understanding from memory blocks (skip persona block)
-        for block in core_memory.blocks:
+        for block, raw_memory_details in zip(core_memory.blocks, raw_memory_details_by_block):
             if block.value and block.value.strip() and block.label.lower() != "persona":
                 block_chars = len(block.value)
                 total_characters += block_chars
 
-                # Fetch raw_memory details if references exist
-                raw_memory_details = []
-                if hasattr(block, 'raw_memory_references') and block.raw_memory_references:
-                    raw_memory_details = fetch_raw_memory_details(block.raw_memory_references)
-
                 core_item = {
                     "aspect": block.label,
                     "understanding": block.value,
@@ -2032,23 +2077,22 @@ async def get_credentials_memory():
         knowledge_vault_manager = client.server.knowledge_vault_manager
 
         # Get knowledge vault items using correct method name
-        vault_items = knowledge_vault_manager.list_knowledge(
+        current_user = await run_db(
+            agent.client.server.user_manager.get_user_by_id, agent.client.user.id
+        )
+        vault_items = await run_db(
+            knowledge_vault_manager.list_knowledge,
             actor=agent.client.user,
             agent_state=agent.agent_states.knowledge_vault_agent_state,
             limit=50,
-            timezone_str=agent.client.server.user_manager.get_user_by_id(
-                agent.client.user.id
-            ).timezone,
+            timezone_str=current_user.timezone,
         )
 
         # Transform to frontend format with masked content
         credentials = []
-        for item in vault_items:
-            # Fetch raw_memory details if references exist
-            raw_memory_details = []
-            if hasattr(item, 'raw_memory_references') and item.raw_memory_references:
-                raw_memory_details = fetch_raw_memory_details(item.raw_memory_references)
-
+        # Fetch raw_memory details of all items at once
+        raw_memory_details_by_item = await run_db(fetch_raw_memory_details, vault_items)
+        for item, raw_memory_details in zip(vault_items, raw_memory_details_by_item):
             credentials.append(
                 {
                     "id": item.id,
@@ -2074,7 +2118,9 @@ async def get_credentials_memory():
 async def get_raw_memory(
     search: Optional[str] = None,
     page: int = 1,
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
 ):
     """
     Get raw memory items (screenshots with OCR text) with search and pagination support.
@@ -2082,14 +2128,17 @@ async def get_raw_memory(
     Args:
         search: Optional search query (searches in id, source_app, source_url, ocr_text)
         page: Page number (1-indexed, default: 1)
+        cursor: Optional `next_cursor` of the previous page, replaces `page`
+        exact_total: Count the matching items instead of using a cached total
         limit: Maximum number of items to return per page (default: 50, max: 500)
 
     Returns:
         Dictionary containing:
             - items: List of raw memory items
             - total: Total count of matching items
-            - page: Current page number
+            - page: Current page number (None when paging by cursor)
             - pages: Total number of pages
+            - next_cursor: Cursor of the next page, None on the last one
     """
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
@@ -2108,10 +2157,13 @@ async def get_raw_memory(
         offset = (page - 1) * actual_limit
 
         # Use the new list_raw_memories method with search support
-        result = raw_memory_manager.list_raw_memories(
+        result = await run_db(
+            raw_memory_manager.list_raw_memories,
             search_query=search,
             limit=actual_limit,
             offset=offset,
+            cursor=cursor,
+            exact_total=exact_total,
         )
 
         # Transform items to frontend format
@@ -2145,8 +2197,11 @@ async def get_raw_memory(
             "total": result["total"],
             "page": result["page"],
             "pages": result["pages"],
+            "next_cursor": result["next_cursor"],
         }
 
+    except NoResultFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error retrieving raw memory: {str(e)}")
         import traceback
@@ -2166,95 +2221,74 @@ async def get_raw_memory_references(raw_memory_id: str):
         from mirix.orm.procedural_memory import ProceduralMemoryItem
         from mirix.orm.resource_memory import ResourceMemoryItem
         from mirix.orm.knowledge_vault import KnowledgeVaultItem
+        from mirix.orm.raw_memory_reference import RawMemoryReference
         from mirix.server.server import db_context
-        from sqlalchemy import func
+        from sqlalchemy import func, literal, null, select, union_all
         
-        references = {
-            "episodic": [],
-            "semantic": [],
-            "procedural": [],
-            "resource": [],
-            "knowledge_vault": []
+        # memory_type -> (model, title, summary, timestamp, extra field name, extra column)
+        sources = {
+            "episodic": (
+                EpisodicEvent, EpisodicEvent.summary, EpisodicEvent.summary,
+                EpisodicEvent.occurred_at, "event_type", EpisodicEvent.event_type,
+            ),
+            "semantic": (
+                SemanticMemoryItem,
+                func.coalesce(func.nullif(SemanticMemoryItem.name, ""), SemanticMemoryItem.summary),
+                SemanticMemoryItem.summary, SemanticMemoryItem.created_at, None, null(),
+            ),
+            "procedural": (
+                ProceduralMemoryItem, ProceduralMemoryItem.summary, ProceduralMemoryItem.summary,
+                ProceduralMemoryItem.created_at, None, null(),
+            ),
+            "resource": (
+                ResourceMemoryItem, ResourceMemoryItem.title, ResourceMemoryItem.summary,
+                ResourceMemoryItem.created_at, "resource_type", ResourceMemoryItem.resource_type,
+            ),
+            "knowledge_vault": (
+                KnowledgeVaultItem, KnowledgeVaultItem.caption, KnowledgeVaultItem.caption,
+                KnowledgeVaultItem.created_at, "entry_type", KnowledgeVaultItem.entry_type,
+            ),
         }
         
-        with db_context() as session:
-            # Query episodic memory
-            episodic_items = session.query(EpisodicEvent).filter(
-                func.jsonb_array_length(EpisodicEvent.raw_memory_references) > 0
-            ).all()
-            
-            for item in episodic_items:
-                if item.raw_memory_references and raw_memory_id in item.raw_memory_references:
-                    references["episodic"].append({
-                        "id": item.id,
-                        "type": "episodic",
-                        "title": item.summary,
-                        "summary": item.summary,
-                        "timestamp": item.occurred_at.isoformat() if item.occurred_at else None,
-                        "event_type": item.event_type
-                    })
-            
-            # Query semantic memory
-            semantic_items = session.query(SemanticMemoryItem).filter(
-                func.jsonb_array_length(SemanticMemoryItem.raw_memory_references) > 0
-            ).all()
-            
-            for item in semantic_items:
-                if item.raw_memory_references and raw_memory_id in item.raw_memory_references:
-                    references["semantic"].append({
-                        "id": item.id,
-                        "type": "semantic",
-                        "title": item.name or item.summary,
-                        "summary": item.summary,
-                        "timestamp": item.created_at.isoformat() if item.created_at else None
-                    })
-            
-            # Query procedural memory
-            procedural_items = session.query(ProceduralMemoryItem).filter(
-                func.jsonb_array_length(ProceduralMemoryItem.raw_memory_references) > 0
-            ).all()
-            
-            for item in procedural_items:
-                if item.raw_memory_references and raw_memory_id in item.raw_memory_references:
-                    references["procedural"].append({
-                        "id": item.id,
-                        "type": "procedural",
-                        "title": item.summary,
-                        "summary": item.summary,
-                        "timestamp": item.created_at.isoformat() if item.created_at else None
-                    })
-            
-            # Query resource memory
-            resource_items = session.query(ResourceMemoryItem).filter(
-                func.jsonb_array_length(ResourceMemoryItem.raw_memory_references) > 0
-            ).all()
-            
-            for item in resource_items:
-                if item.raw_memory_references and raw_memory_id in item.raw_memory_references:
-                    references["resource"].append({
-                        "id": item.id,
-                        "type": "resource",
-                        "title": item.title,
-                        "summary": item.summary,
-                        "timestamp": item.created_at.isoformat() if item.created_at else None,
-                        "resource_type": item.resource_type
-                    })
-            
-            # Query knowledge vault
-            knowledge_items = session.query(KnowledgeVaultItem).filter(
-                func.jsonb_array_length(KnowledgeVaultItem.raw_memory_references) > 0
-            ).all()
-            
-            for item in knowledge_items:
-                if item.raw_memory_references and raw_memory_id in item.raw_memory_references:
-                    references["knowledge_vault"].append({
-                        "id": item.id,
-                        "type": "knowledge_vault",
-                        "title": item.caption,
-                        "summary": item.caption,
-                        "timestamp": item.created_at.isoformat() if item.created_at else None,
-                        "entry_type": item.entry_type
-                    })
+        # One statement: the link table rows of this raw memory (its primary key
+        # prefix), each joined to the memory it points at by primary key
+        statement = union_all(*(
+            select(
+                literal(memory_type).label("memory_type"),
+                model.id.label("id"),
+                title.label("title"),
+                summary.label("summary"),
+                timestamp.label("timestamp"),
+                extra.label("extra"),
+            )
+            .join_from(
+                RawMemoryReference,
+                model,
+                (RawMemoryReference.memory_type == memory_type)
+                & (RawMemoryReference.memory_id == model.id),
+            )
+            .where(RawMemoryReference.raw_memory_id == raw_memory_id)
+            for memory_type, (model, title, summary, timestamp, _, extra) in sources.items()
+        ))
+        
+        references = {memory_type: [] for memory_type in sources}
+        
+        def fetch_references():
+            with db_context() as session:
+                return session.execute(statement).all()
+
+        for row in await run_db(fetch_references):
+            extra_field = sources[row.memory_type][4]
+            reference = {
+                "id": row.id,
+                "type": row.memory_type,
+                "title": row.title,
+                "summary": row.summary,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            }
+            if extra_field:
+                reference[extra_field] = row.extra
+            references[row.memory_type].append(reference)
         
         # Calculate total count
         total_count = sum(len(refs) for refs in references.values())
@@ -2278,42 +2312,49 @@ async def get_raw_memory_screenshot(raw_memory_id: str):
     from fastapi.responses import FileResponse
     from mirix.orm.raw_memory import RawMemoryItem
     from mirix.server.server import db_context
+    from sqlalchemy import select
     import os
 
-    try:
+    def lookup_screenshot_path():
         with db_context() as session:
-            item = session.get(RawMemoryItem, raw_memory_id)
-
-            if not item:
-                raise HTTPException(status_code=404, detail="Raw memory not found")
-
-            if not item.screenshot_path:
-                raise HTTPException(status_code=404, detail="No screenshot path for this raw memory")
-
-            # Check if file exists
-            if not os.path.exists(item.screenshot_path):
-                raise HTTPException(status_code=404, detail="Screenshot file not found on disk")
-
-            # Determine media type based on file extension
-            ext = os.path.splitext(item.screenshot_path)[1].lower()
-            media_type_map = {
-                '.png': 'image/png',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.gif': 'image/gif',
-                '.webp': 'image/webp',
+            return session.execute(
+                select(RawMemoryItem.screenshot_path).where(RawMemoryItem.id == raw_memory_id)
+            ).first()
+
+    try:
+        row = await run_db(lookup_screenshot_path)
+
+        if not row:
+            raise HTTPException(status_code=404, detail="Raw memory not found")
+
+        screenshot_path = row.screenshot_path
+        if not screenshot_path:
+            raise HTTPException(status_code=404, detail="No screenshot path for this raw memory")
+
+        # Check if file exists
+        if not os.path.exists(screenshot_path):
+            raise HTTPException(status_code=404, detail="Screenshot file not found on disk")
+
+        # Determine media type based on file extension
+        ext = os.path.splitext(screenshot_path)[1].lower()
+        media_type_map = {
+            '.png': 'image/png',
+            '.jpg': 'image/jpeg',
+            '.jpeg': 'image/jpeg',
+            '.gif': 'image/gif',
+            '.webp': 'image/webp',
+        }
+        media_type = media_type_map.get(ext, 'image/png')
+
+        # Return image file with caching headers
+        return FileResponse(
+            screenshot_path,
+            media_type=media_type,
+            headers={
+                "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
+                "Accept-Ranges": "bytes"
             }
-            media_type = media_type_map.get(ext, 'image/png')
-
-            # Return image file with caching headers
-            return FileResponse(
-                item.screenshot_path,
-                media_type=media_type,
-                headers={
-                    "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
-                    "Accept-Ranges": "bytes"
-                }
-            )
+        )
 
     except HTTPException:
         raise
@@ -2419,7 +2460,7 @@ async def clear_conversation_history():
             raise HTTPException(status_code=400, detail="Agent not initialized")
 
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
 
@@ -2465,10 +2506,11 @@ async def export_memories(request: ExportMemoriesRequest):
 
     try:
         # Find the current active user
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         active_user = next((user for user in users if user.status == "active"), None)
         target_user = active_user if active_user else (users[0] if users else None)
-        result = agent.export_memories_to_excel(
+        result = await run_db(
+            agent.export_memories_to_excel,
             actor=target_user,
             file_path=request.file_path,
             memory_types=request.memory_types,
@@ -2840,7 +2882,7 @@ async def get_all_users():
         raise HTTPException(status_code=500, detail="Agent not initialized")
 
     try:
-        users = agent.client.server.user_manager.list_users()
+        users = await run_db(agent.client.server.user_manager.list_users)
         return {"users": [user.model_dump() for user in users]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving users: {str(e)}")
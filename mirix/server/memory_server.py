@@ -351,7 +351,8 @@ async def get_raw_memory(raw_memory_id: str):
         # Retrieve the raw memory item
         raw_memory = raw_memory_manager.get_raw_memory_by_id(
             raw_memory_id=raw_memory_id,
-            user_id=target_user.id
+            user_id=target_user.id,
+            include_embedding=True,
         )
 
         if not raw_memory:
@@ -323,6 +323,11 @@ if not USE_PGLITE and settings.mirix_pg_uri_no_default:
 
     # Create all tables for PostgreSQL
     Base.metadata.create_all(bind=engine)
+
+    # CJK-aware text search configuration and GIN indexes behind 'bm25'
+    from mirix.orm.pg_text_search import ensure_pg_text_search
+
+    ensure_pg_text_search(engine)
 elif not USE_PGLITE:
     # TODO: don't rely on config storage
     sqlite_db_path = os.path.join(config.recall_storage_path, "sqlite.db")
@@ -370,7 +375,28 @@ elif not USE_PGLITE:
 
     Base.metadata.create_all(bind=engine)
 
+    # FTS5 shadow tables backing the 'fts5_match' search method
+    from mirix.orm.sqlite_fts import ensure_fts5_tables
+
+    ensure_fts5_tables(engine)
+
 if not USE_PGLITE:
+    # Link rows of memories written before the raw_memory_reference table existed
+    from mirix.orm.raw_memory_reference import backfill_raw_memory_references
+
+    backfill_raw_memory_references(engine)
+
+    # Searches only match vectors of the query's dimension: store the vectors
+    # older versions zero-padded to MAX_EMBEDDING_DIM at their native size
+    from mirix.orm.vector_migration import ensure_native_vectors
+
+    ensure_native_vectors(engine)
+
+    # create_all only indexes new tables: add indexes declared after a table was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -6,6 +6,10 @@ from mirix.orm.errors import NoResultFound
 from mirix.schemas.block import Block, BlockUpdate, Human, Persona
 from mirix.schemas.block import Block as PydanticBlock
 from mirix.schemas.user import User as PydanticUser
+from mirix.services.memory_change_hooks import (
+    notify_memory_delete,
+    notify_memory_upsert,
+)
 from mirix.utils import enforce_types, list_human_files, list_persona_files
 
 
@@ -32,7 +36,10 @@ class BlockManager:
                 data = block.model_dump(exclude_none=True)
                 block = BlockModel(**data, organization_id=actor.organization_id)
                 block.create(session, actor=actor)
-            return block.to_pydantic()
+                block = block.to_pydantic()
+
+            notify_memory_upsert("core", block.user_id or actor.id, block)
+            return block
 
     @enforce_types
     def update_block(
@@ -51,7 +58,10 @@ class BlockManager:
                 setattr(block, key, value)
 
             block.update(db_session=session, actor=actor)
-            return block.to_pydantic()
+            block = block.to_pydantic()
+
+        notify_memory_upsert("core", block.user_id or actor.id, block)
+        return block
 
     @enforce_types
     def delete_block(self, block_id: str, actor: PydanticUser) -> PydanticBlock:
@@ -59,7 +69,10 @@ class BlockManager:
         with self.session_maker() as session:
             block = BlockModel.read(db_session=session, identifier=block_id)
             block.hard_delete(db_session=session, actor=actor)
-            return block.to_pydantic()
+            block = block.to_pydantic()
+
+        notify_memory_delete("core", block.user_id or actor.id, block.id)
+        return block
 
     @enforce_types
     def get_blocks(
@@ -0,0 +1,330 @@
+"""
+Persistent, incrementally maintained BM25 indexes for the SQLite `bm25`
+search method.
+
+Without an index, every SQLite `bm25` query loads all of a user's memories,
+re-tokenizes them and builds a fresh `rank_bm25.BM25Okapi`. Here each
+(user, memory type, search field) gets an inverted index - postings,
+document lengths and document frequencies - that is built once from the DB,
+kept up to date through the memory change hooks and pickled to disk so it
+survives restarts.
+
+Scoring reproduces `BM25Okapi` exactly (same k1/b/epsilon, same idf floor,
+same tie order), so switching to the index does not change any results; a
+query only touches the postings of its own terms.
+"""
+
+import atexit
+import math
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from mirix.log import get_logger
+from mirix.orm.sqlalchemy_base import defer_embeddings
+from mirix.services.index_registry import PersistentIndexRegistry
+from mirix.services.memory_change_hooks import register_memory_change_listener
+
+logger = get_logger(__name__)
+
+
+class BM25InvertedIndex:
+    """
+    Inverted index over one corpus, scored like `rank_bm25.BM25Okapi`.
+
+    Documents are kept in insertion order; that order is used to break score
+    ties the same way the stable sort over the DB rows used to.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        # doc_id -> term frequencies, in insertion order. Rows that produced
+        # no tokens keep an empty entry so they hold their position.
+        self.doc_freqs: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.doc_seq: Dict[str, int] = {}
+        # term -> {doc_id: tf}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.empty_ids: set = set()
+        self.total_tokens = 0
+        self._next_seq = 0
+        self._idf_cache: Optional[Tuple[Dict[str, float], float]] = None
+
+    @property
+    def corpus_size(self) -> int:
+        return len(self.doc_freqs) - len(self.empty_ids)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.doc_freqs)
+
+    def upsert(self, doc_id: str, tokens: Sequence[str]) -> None:
+        """Add a document or replace its tokens, keeping its position."""
+        self._remove_postings(doc_id)
+        if doc_id not in self.doc_seq:
+            self.doc_seq[doc_id] = self._next_seq
+            self._next_seq += 1
+
+        frequencies = dict(Counter(tokens))
+        # assigning to an existing key keeps the document's position
+        self.doc_freqs[doc_id] = frequencies
+        if not tokens:
+            self.empty_ids.add(doc_id)
+            return
+
+        self.empty_ids.discard(doc_id)
+        self.doc_len[doc_id] = len(tokens)
+        self.total_tokens += len(tokens)
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self._idf_cache = None
+
+    def remove(self, doc_id: str) -> None:
+        self._remove_postings(doc_id)
+        self.doc_freqs.pop(doc_id, None)
+        self.doc_seq.pop(doc_id, None)
+        self.empty_ids.discard(doc_id)
+
+    def _remove_postings(self, doc_id: str) -> None:
+        frequencies = self.doc_freqs.get(doc_id)
+        if frequencies is None:
+            return
+        for term in frequencies:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_tokens -= self.doc_len.pop(doc_id, 0)
+        self._idf_cache = None
+
+    def _idf(self) -> Tuple[Dict[str, float], float]:
+        """Per-term idf with BM25Okapi's floor for negative values."""
+        if self._idf_cache is None:
+            n = self.corpus_size
+            idf: Dict[str, float] = {}
+            idf_sum = 0.0
+            negative_terms = []
+            for term, posting in self.postings.items():
+                freq = len(posting)
+                value = math.log(n - freq + 0.5) - math.log(freq + 0.5)
+                idf[term] = value
+                idf_sum += value
+                if value < 0:
+                    negative_terms.append(term)
+            average_idf = idf_sum / len(idf) if idf else 0.0
+            eps = self.epsilon * average_idf
+            for term in negative_terms:
+                idf[term] = eps
+            self._idf_cache = (idf, average_idf)
+        return self._idf_cache
+
+    def search(
+        self, query_tokens: Sequence[str], limit: Optional[int], fill: bool = True
+    ) -> List[str]:
+        """
+        Return the ids of the top `limit` documents (all if None), best first.
+
+        Documents that share no term with the query score 0 and are only used
+        to fill up the result, in insertion order, exactly like sorting the
+        full BM25Okapi score vector would. With `fill=False` they are left
+        out, e.g. before the rankings of several queries are fused.
+        """
+        if not self.corpus_size:
+            return []
+
+        if not query_tokens:
+            ordered = [d for d in self.doc_freqs if d not in self.empty_ids]
+            return ordered[:limit] if limit is not None else ordered
+
+        idf, _ = self._idf()
+        avgdl = self.total_tokens / self.corpus_size
+        k1, b = self.k1, self.b
+
+        scores: Dict[str, float] = {}
+        for term in query_tokens:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            term_idf = idf.get(term) or 0
+            # Documents without the term would only add 0 to their score, so
+            # only the posting list is visited. The expression mirrors
+            # BM25Okapi.get_scores to get bit-identical scores.
+            for doc_id, q_freq in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_idf * (
+                    q_freq
+                    * (k1 + 1)
+                    / (q_freq + k1 * (1 - b + b * self.doc_len[doc_id] / avgdl))
+                )
+
+        seq = self.doc_seq
+        positive = sorted(
+            (doc_id for doc_id, score in scores.items() if score > 0),
+            key=lambda doc_id: (-scores[doc_id], seq[doc_id]),
+        )
+        if limit is not None and len(positive) >= limit:
+            return positive[:limit]
+
+        result = positive
+        nonzero = {doc_id for doc_id, score in scores.items() if score != 0}
+        for doc_id in self.doc_freqs if fill else ():
+            if limit is not None and len(result) >= limit:
+                return result
+            if doc_id not in nonzero and doc_id not in self.empty_ids:
+                result.append(doc_id)
+
+        negative = sorted(
+            (doc_id for doc_id, score in scores.items() if score < 0),
+            key=lambda doc_id: (-scores[doc_id], seq[doc_id]),
+        )
+        result.extend(negative)
+        return result[:limit] if limit is not None else result
+
+    def to_state(self) -> dict:
+        return {"doc_freqs": self.doc_freqs}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "BM25InvertedIndex":
+        index = cls()
+        for doc_id, frequencies in state["doc_freqs"].items():
+            index.doc_seq[doc_id] = index._next_seq
+            index._next_seq += 1
+            index.doc_freqs[doc_id] = frequencies
+            if not frequencies:
+                index.empty_ids.add(doc_id)
+                continue
+            length = sum(frequencies.values())
+            index.doc_len[doc_id] = length
+            index.total_tokens += length
+            for term, tf in frequencies.items():
+                index.postings.setdefault(term, {})[doc_id] = tf
+        return index
+
+
+class BM25IndexRegistry(PersistentIndexRegistry):
+    """
+    Owns every BM25 index of the process.
+
+    Indexes are keyed by (user_id, memory_type, field_key), where field_key is
+    the search field ('' for the manager's default document text). They are
+    loaded or built on first use and kept current by the change hooks.
+    """
+
+    kind = "bm25"
+    # 2: CJK runs tokenized into character bigrams
+    format_version = 2
+
+    def __init__(self, storage_root: Optional[str] = None):
+        super().__init__(storage_root)
+        self._document_tokens: Dict[str, Callable[[object, str], List[str]]] = {}
+
+    def register_memory_type(
+        self,
+        memory_type: str,
+        model_class,
+        document_tokens: Callable[[object, str], List[str]],
+    ) -> None:
+        """
+        Declare how documents of `memory_type` are tokenized.
+
+        `document_tokens(item, field_key)` must accept both ORM rows and
+        Pydantic items and return the same tokens the manager's in-memory
+        BM25 would use.
+        """
+        self._models[memory_type] = model_class
+        self._document_tokens[memory_type] = document_tokens
+
+    def _build(self, session, key) -> BM25InvertedIndex:
+        user_id, memory_type, field_key = key
+        model_class = self._models[memory_type]
+        document_tokens = self._document_tokens[memory_type]
+
+        index = BM25InvertedIndex()
+        rows = session.execute(
+            select(model_class)
+            .options(*defer_embeddings(model_class))
+            .where(model_class.user_id == user_id)
+        ).scalars()
+        for row in rows:
+            index.upsert(row.id, document_tokens(row, field_key))
+        logger.info(
+            f"Built BM25 index for {memory_type}/{field_key or 'default'} of user {user_id} ({index.corpus_size} documents)"
+        )
+        return index
+
+    def _index_to_state(self, index: BM25InvertedIndex) -> dict:
+        return index.to_state()
+
+    def _index_from_state(self, state: dict) -> BM25InvertedIndex:
+        return BM25InvertedIndex.from_state(state)
+
+    def search(
+        self,
+        session,
+        memory_type: str,
+        user_id: str,
+        field_key: str,
+        query_tokens: Sequence[str],
+        limit: Optional[int],
+        fill: bool = True,
+    ) -> List[str]:
+        """Return the ids of the best matching documents, best first."""
+        key = (user_id, memory_type, field_key)
+        with self._key_lock(key):
+            index = self._get_index(session, key)
+            result = index.search(query_tokens, limit, fill)
+            self._maybe_flush(session, key)
+            return result
+
+    def document_frequencies(
+        self, user_id: str, terms: Sequence[str]
+    ) -> Tuple[Dict[str, int], int]:
+        """
+        Document frequency of each term, and the number of documents, summed
+        over the user's indexes that are already loaded. Never touches the DB.
+        """
+        frequencies = dict.fromkeys(terms, 0)
+        corpus_size = 0
+        with self._lock:
+            indexes = [
+                (key, index)
+                for key, index in self._indexes.items()
+                if key[0] == user_id
+            ]
+        for key, index in indexes:
+            with self._key_lock(key):
+                corpus_size += index.corpus_size
+                for term in frequencies:
+                    frequencies[term] += len(index.postings.get(term, ()))
+        return frequencies, corpus_size
+
+    # MemoryChangeListener
+
+    def on_memory_upsert(self, memory_type: str, user_id: str, item) -> None:
+        document_tokens = self._document_tokens.get(memory_type)
+        if document_tokens is None:
+            return
+        for key, index in self._loaded_indexes(memory_type, user_id):
+            index.upsert(item.id, document_tokens(item, key[2]))
+            self._mark_dirty(key)
+
+    def on_memory_delete(self, memory_type: str, user_id: str, item_id: str) -> None:
+        for key, index in self._loaded_indexes(memory_type, user_id):
+            index.remove(item_id)
+            self._mark_dirty(key)
+
+
+bm25_index_registry = BM25IndexRegistry()
+register_memory_change_listener(bm25_index_registry)
+
+
+@atexit.register
+def _flush_bm25_indexes() -> None:
+    try:
+        bm25_index_registry.flush()
+    except Exception as e:
+        logger.warning(f"Could not flush BM25 indexes on exit: {e}")
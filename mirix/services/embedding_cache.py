@@ -0,0 +1,236 @@
+"""
+Content-addressed cache of text embeddings.
+
+Screen content, memory fields and retrieval topics repeat constantly, so
+the same strings get embedded over and over. Embeddings are cached under
+(endpoint type, model, sha256 of the normalized text) in two tiers:
+
+- an in-memory LRU of `settings.embedding_cache_memory_entries` vectors;
+- a SQLite file, `<recall_storage_path>/embedding_cache.db`, that survives
+  restarts and keeps the newest `settings.embedding_cache_disk_entries`.
+
+`mirix.embeddings.embedding_model` wraps every model in
+`CachedEmbeddingModel`, so all memory managers and the agent share it.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from mirix.helpers.vector_codec import decode_vector, encode_vector
+from mirix.log import get_logger
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+# Puts between two trims of the disk tier
+_TRIM_INTERVAL = 1000
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize `text` and collapse its whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_cache_key(endpoint_type: str, model: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{endpoint_type}:{model}:{digest}"
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + SQLite file) cache of embeddings by key."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_entries: Optional[int] = None,
+        disk_entries: Optional[int] = None,
+    ):
+        self._path = path
+        self._memory_entries = memory_entries
+        self._disk_entries = disk_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_disabled = False
+        self._puts_since_trim = 0
+        self._lock = threading.RLock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def memory_entries(self) -> int:
+        if self._memory_entries is not None:
+            return self._memory_entries
+        return settings.embedding_cache_memory_entries
+
+    @property
+    def disk_entries(self) -> int:
+        if self._disk_entries is not None:
+            return self._disk_entries
+        return settings.embedding_cache_disk_entries
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._disk_disabled:
+            return self._conn
+        try:
+            path = self._path
+            if path is None:
+                from mirix.config import MirixConfig
+
+                path = os.path.join(
+                    MirixConfig.load().recall_storage_path, "embedding_cache.db"
+                )
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_cache_created_at "
+                "ON embedding_cache (created_at)"
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding cache will stay in memory only: {e}")
+            self._disk_disabled = True
+            return None
+        self._conn = conn
+        return conn
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+
+            conn = self._disk()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT embedding FROM embedding_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache lookup failed: {e}")
+            vector = decode_vector(row[0]) if row is not None else None
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, vector)
+            return vector.tolist()
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        data = encode_vector(embedding)
+        with self._lock:
+            self._remember(key, decode_vector(data))
+
+            conn = self._disk()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?)",
+                        (key, data, time.time()),
+                    )
+                self._puts_since_trim += 1
+                if self._puts_since_trim >= _TRIM_INTERVAL:
+                    self._puts_since_trim = 0
+                    self._trim(conn)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not store embedding in cache: {e}")
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT count(*) FROM embedding_cache").fetchone()
+        excess = count - self.disk_entries
+        if excess > 0:
+            with conn:
+                conn.execute(
+                    "DELETE FROM embedding_cache WHERE key IN ("
+                    "SELECT key FROM embedding_cache ORDER BY created_at LIMIT ?)",
+                    (excess,),
+                )
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counters since the process started."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+class CachedEmbeddingModel:
+    """
+    Embedding model wrapper that answers `get_text_embedding` and
+    `get_text_embeddings` from the cache; batch misses go out in one call.
+
+    Everything else is delegated to the wrapped model.
+    """
+
+    def __init__(self, model, endpoint_type: str, model_name: str, cache: EmbeddingCache):
+        self._model = model
+        self._endpoint_type = endpoint_type
+        self._model_name = model_name
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        key = embedding_cache_key(self._endpoint_type, self._model_name, text)
+        embedding = self._cache.get(key)
+        if embedding is None:
+            embedding = self._model.get_text_embedding(text)
+            self._cache.put(key, embedding)
+        return embedding
+
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys = [
+            embedding_cache_key(self._endpoint_type, self._model_name, text)
+            for text in texts
+        ]
+        embeddings = [self._cache.get(key) for key in keys]
+
+        # texts missing from the cache, each embedded once
+        missing: Dict[str, List[int]] = OrderedDict()
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            fetched = self._model.get_text_embeddings(
+                [texts[positions[0]] for positions in missing.values()]
+            )
+            for (key, positions), embedding in zip(missing.items(), fetched):
+                self._cache.put(key, embedding)
+                for i in positions:
+                    embeddings[i] = embedding
+        return embeddings
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,459 @@
+"""
+Memory-mapped embedding matrices for exact SQLite embedding search.
+
+An alternative to the IVF index in vector_index.py, selected with
+`MIRIX_SQLITE_VECTOR_INDEX_BACKEND=matrix`. Every (user, memory type,
+embedding column) gets a sidecar in `<recall_storage_path>/indexes/matrix`:
+
+- `<name>.f32`: a float32 matrix with one L2-normalized embedding per row,
+  memory-mapped, so a restart does not read or decode anything up front;
+- `<name>.log`: the row ids, as an append-only log of `+id` (new row) and
+  `-id` (deleted row) lines;
+- `<name>.json`: dimension, row count, quantization and the fingerprint of
+  the base table at the last flush, used to detect a stale sidecar;
+- `<name>.int8` / `<name>.binary`: optional quantized codes of the rows,
+  see below.
+
+Search is one `matrix @ query` product plus `argpartition`, which gives the
+same results as the `cosine_distance` UDF without decoding a single row.
+Inserts append a row; updates overwrite their row in place.
+
+With `MIRIX_SQLITE_VECTOR_INDEX_QUANTIZATION`, search scans compact codes
+instead of the float32 rows and reranks a shortlist exactly:
+
+- `int8`: one signed byte per dimension plus a float32 scale per row (4x
+  smaller), scored with an int8 x float32 dot product;
+- `binary`: the sign bit of every dimension (32x smaller), scored by the
+  Hamming distance to the signs of the query (XOR + popcount).
+
+Only the shortlisted float32 rows are read, so the float32 file can stay
+out of the page cache. `scripts/benchmark_vector_quantization.py` measures
+the recall of both against exact search on a real database.
+"""
+
+import atexit
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mirix.log import get_logger
+from mirix.services.memory_change_hooks import register_memory_change_listener
+from mirix.services.vector_index import (
+    VectorIndexRegistry,
+    as_unit_vector,
+    top_k_by_similarity,
+)
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+INITIAL_CAPACITY = 1024
+
+# Rewrite the sidecar once this fraction of its rows belongs to deleted ids
+COMPACTION_THRESHOLD = 0.25
+
+# Shortlist size, as a multiple of k, reranked with the float32 rows
+QUANTIZED_RERANK_FACTORS = {"int8": 4, "binary": 32}
+
+# Bytes of codes decoded at once while scanning, about the size of an L2 cache
+_SCAN_CHUNK_BYTES = 1 << 18
+
+# Rows quantized at once when the codes are rebuilt
+_QUANTIZE_CHUNK_SIZE = 8192
+
+QUANTIZATIONS = ("none",) + tuple(QUANTIZED_RERANK_FACTORS)
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return _POPCOUNT_TABLE[bits]
+
+
+def code_dtype(quantization: str, dim: int) -> Optional[np.dtype]:
+    """Layout of one row of codes, or None without quantization."""
+    if quantization == "int8":
+        return np.dtype([("scale", "<f4"), ("code", "i1", (dim,))])
+    if quantization == "binary":
+        return np.dtype((np.uint8, ((dim + 7) // 8,)))
+    if quantization == "none":
+        return None
+    raise ValueError(f"Unknown vector quantization {quantization!r}")
+
+
+def quantize(quantization: str, units: np.ndarray) -> np.ndarray:
+    """Codes of the rows of `units`, in the layout of `code_dtype`."""
+    if quantization == "binary":
+        return np.packbits(units > 0, axis=1)
+
+    codes = np.empty(len(units), dtype=code_dtype(quantization, units.shape[1]))
+    scale = np.abs(units).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    codes["scale"] = scale
+    codes["code"] = np.rint(units / scale[:, None])
+    return codes
+
+
+class EmbeddingMatrix:
+    """Append-only, memory-mapped matrix of unit embeddings and their ids."""
+
+    def __init__(self, path_prefix: str, dim: int, quantization: str = "none"):
+        self.path_prefix = path_prefix
+        self.dim = dim
+        self.quantization = quantization
+        self.code_dtype = code_dtype(quantization, dim)
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.live = np.zeros(0, dtype=bool)
+        self.matrix: Optional[np.memmap] = None
+        self.codes: Optional[np.memmap] = None
+        self._log_file = None
+
+    @property
+    def matrix_path(self) -> str:
+        return f"{self.path_prefix}.f32"
+
+    @property
+    def log_path(self) -> str:
+        return f"{self.path_prefix}.log"
+
+    @property
+    def meta_path(self) -> str:
+        return f"{self.path_prefix}.json"
+
+    def _codes_path(self, quantization: str) -> str:
+        return f"{self.path_prefix}.{quantization}"
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.rows
+
+    @classmethod
+    def create(
+        cls, path_prefix: str, dim: int, quantization: str = "none"
+    ) -> "EmbeddingMatrix":
+        """Start an empty sidecar, replacing any existing files."""
+        matrix = cls(path_prefix, dim, quantization)
+        stale = [matrix.meta_path, matrix.log_path]
+        stale += [matrix._codes_path(q) for q in QUANTIZED_RERANK_FACTORS]
+        for path in stale:
+            if os.path.exists(path):
+                os.remove(path)
+        with open(matrix.matrix_path, "wb") as f:
+            f.truncate(INITIAL_CAPACITY * dim * 4)
+        if matrix.code_dtype is not None:
+            with open(matrix._codes_path(quantization), "wb") as f:
+                f.truncate(INITIAL_CAPACITY * matrix.code_dtype.itemsize)
+        matrix._log_file = open(matrix.log_path, "w", encoding="utf-8")
+        matrix._map(INITIAL_CAPACITY)
+        return matrix
+
+    @classmethod
+    def open(
+        cls,
+        path_prefix: str,
+        dim: int,
+        row_count: int,
+        quantization: str = "none",
+        codes_current: bool = True,
+    ) -> "EmbeddingMatrix":
+        """
+        Map an existing sidecar whose metadata reported `row_count` rows.
+
+        The codes are recomputed from the float32 rows when they are missing
+        or `codes_current` is False (they were written for another setting).
+        """
+        matrix = cls(path_prefix, dim, quantization)
+        with open(matrix.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("+"):
+                    matrix.rows[line[1:]] = len(matrix.ids)
+                    matrix.ids.append(line[1:])
+                elif line.startswith("-"):
+                    row = matrix.rows.pop(line[1:], None)
+                    if row is not None:
+                        matrix.ids[row] = None
+        if len(matrix.ids) != row_count:
+            raise ValueError(
+                f"{matrix.log_path} has {len(matrix.ids)} rows, expected {row_count}"
+            )
+
+        capacity = os.path.getsize(matrix.matrix_path) // (dim * 4)
+        rebuild_codes = False
+        if matrix.code_dtype is not None:
+            codes_path = matrix._codes_path(quantization)
+            size = capacity * matrix.code_dtype.itemsize
+            rebuild_codes = not codes_current or (
+                not os.path.exists(codes_path) or os.path.getsize(codes_path) != size
+            )
+            if rebuild_codes:
+                with open(codes_path, "wb") as f:
+                    f.truncate(size)
+        matrix._map(capacity)
+        matrix.live[: len(matrix.ids)] = [doc_id is not None for doc_id in matrix.ids]
+        if rebuild_codes:
+            count = len(matrix.ids)
+            for start in range(0, count, _QUANTIZE_CHUNK_SIZE):
+                end = min(start + _QUANTIZE_CHUNK_SIZE, count)
+                matrix.codes[start:end] = quantize(quantization, matrix.matrix[start:end])
+        matrix._log_file = open(matrix.log_path, "a", encoding="utf-8")
+        return matrix
+
+    def _map(self, capacity: int) -> None:
+        self.matrix = np.memmap(
+            self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+        if self.code_dtype is not None:
+            self.codes = np.memmap(
+                self._codes_path(self.quantization),
+                dtype=self.code_dtype,
+                mode="r+",
+                shape=(capacity,),
+            )
+        live = np.zeros(capacity, dtype=bool)
+        live[: len(self.live)] = self.live[:capacity]
+        self.live = live
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self.matrix)
+        self.matrix.flush()
+        self.matrix = None
+        with open(self.matrix_path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        if self.codes is not None:
+            self.codes.flush()
+            self.codes = None
+            with open(self._codes_path(self.quantization), "r+b") as f:
+                f.truncate(capacity * self.code_dtype.itemsize)
+        self._map(capacity)
+
+    def _log(self, line: str) -> None:
+        # buffered; flush() makes it durable together with the metadata
+        self._log_file.write(line + "\n")
+
+    def upsert(self, doc_id: str, vector) -> None:
+        """Write the embedding of `doc_id`; unusable vectors remove it."""
+        unit = as_unit_vector(vector)
+        if unit is None or unit.shape[0] != self.dim:
+            self.remove(doc_id)
+            return
+
+        row = self.rows.get(doc_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.matrix):
+                self._grow()
+            self._log(f"+{doc_id}")
+            self.rows[doc_id] = row
+            self.ids.append(doc_id)
+            self.live[row] = True
+        self.matrix[row] = unit
+        if self.codes is not None:
+            self.codes[row] = quantize(self.quantization, unit[None])[0]
+
+    def remove(self, doc_id: str) -> None:
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._log(f"-{doc_id}")
+        self.ids[row] = None
+        self.live[row] = False
+
+    def search(self, query, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top-`k` (id, cosine distance) pairs; `nprobe` is ignored."""
+        unit = as_unit_vector(query)
+        if unit is None or unit.shape[0] != self.dim or k <= 0 or not len(self):
+            return []
+
+        count = len(self.ids)
+        if self.codes is None:
+            scores = self.matrix[:count] @ unit
+            scores[~self.live[:count]] = -np.inf
+            return top_k_by_similarity(scores, self.ids, k)
+
+        approximate = self._approximate_scores(unit, count)
+        approximate[~self.live[:count]] = -np.inf
+        shortlist = k * QUANTIZED_RERANK_FACTORS[self.quantization]
+        if shortlist < count:
+            rows = np.argpartition(-approximate, shortlist - 1)[:shortlist]
+        else:
+            rows = np.arange(count)
+        rows = np.sort(rows[np.isfinite(approximate[rows])])
+        scores = self.matrix[rows] @ unit
+        return top_k_by_similarity(scores, [self.ids[row] for row in rows], k)
+
+    def search_many(
+        self, queries, k: int, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """`search` for several queries; float32 rows are scanned once for all of them."""
+        if self.codes is not None:
+            return [self.search(query, k) for query in queries]
+
+        results: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        units = [as_unit_vector(query) for query in queries]
+        usable = [
+            i for i, unit in enumerate(units) if unit is not None and unit.shape[0] == self.dim
+        ]
+        if not usable or k <= 0 or not len(self):
+            return results
+
+        count = len(self.ids)
+        scores = self.matrix[:count] @ np.stack([units[i] for i in usable], axis=1)
+        scores[~self.live[:count]] = -np.inf
+        for column, i in enumerate(usable):
+            results[i] = top_k_by_similarity(scores[:, column], self.ids, k)
+        return results
+
+    def _approximate_scores(self, unit: np.ndarray, count: int) -> np.ndarray:
+        """Similarity of the first `count` rows to `unit`, computed on the codes."""
+        scores = np.empty(count, dtype=np.float32)
+        if self.quantization == "binary":
+            query_bits = np.packbits(unit > 0)
+        chunk_size = max(1, _SCAN_CHUNK_BYTES // self.code_dtype.itemsize)
+        for start in range(0, count, chunk_size):
+            end = min(start + chunk_size, count)
+            codes = self.codes[start:end]
+            if self.quantization == "binary":
+                distance = _popcount(codes ^ query_bits).sum(axis=1, dtype=np.int32)
+                scores[start:end] = -distance
+            else:
+                dots = codes["code"].astype(np.float32) @ unit
+                scores[start:end] = dots * codes["scale"]
+        return scores
+
+    def needs_compaction(self) -> bool:
+        return len(self.ids) - len(self.rows) > COMPACTION_THRESHOLD * len(self.ids)
+
+    def compact(self) -> "EmbeddingMatrix":
+        """Return a copy of this sidecar without the rows of deleted ids."""
+        count = len(self.ids)
+        keep = np.flatnonzero(self.live[:count])
+        vectors = np.array(self.matrix[keep])
+        ids = [self.ids[i] for i in keep]
+
+        self.close()
+        compacted = EmbeddingMatrix.create(self.path_prefix, self.dim, self.quantization)
+        for doc_id, vector in zip(ids, vectors):
+            compacted.upsert(doc_id, vector)
+        return compacted
+
+    def flush(self, version: int, fingerprint) -> None:
+        """Sync the matrix to disk and record what it was built from."""
+        self.matrix.flush()
+        if self.codes is not None:
+            self.codes.flush()
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+        meta = {
+            "version": version,
+            "dim": self.dim,
+            "rows": len(self.ids),
+            "quantization": self.quantization,
+            "fingerprint": list(fingerprint),
+        }
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def close(self) -> None:
+        self.matrix = None
+        self.codes = None
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+
+class EmbeddingMatrixRegistry(VectorIndexRegistry):
+    """
+    Owns every embedding matrix sidecar of the process.
+
+    Reuses the vector index registry for registration, lazy building and
+    change hooks; only storage differs - sidecars are written in place and
+    just their metadata is saved on flush. A sidecar cannot be snapshotted,
+    so the background save syncs it under the lock of its own index.
+    """
+
+    kind = "matrix"
+    format_version = 2
+
+    def _path_prefix(self, key) -> str:
+        user_id, memory_type, field_key = key
+        return os.path.join(self._storage_dir(user_id), f"{memory_type}__{field_key}")
+
+    def _new_index(self, key, dim: int) -> EmbeddingMatrix:
+        return EmbeddingMatrix.create(
+            self._path_prefix(key), dim, settings.sqlite_vector_index_quantization
+        )
+
+    def _before_search(self, key, index: EmbeddingMatrix) -> None:
+        pass
+
+    def _load(self, session, key) -> Optional[EmbeddingMatrix]:
+        path_prefix = self._path_prefix(key)
+        try:
+            with open(f"{path_prefix}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        user_id, memory_type, _ = key
+        if meta.get("version") != self.format_version or tuple(
+            meta.get("fingerprint", ())
+        ) != self._fingerprint(session, memory_type, user_id):
+            # written before the table changed; rebuilt from the DB
+            return None
+        quantization = settings.sqlite_vector_index_quantization
+        try:
+            return EmbeddingMatrix.open(
+                path_prefix,
+                meta["dim"],
+                meta["rows"],
+                quantization,
+                codes_current=meta.get("quantization", "none") == quantization,
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding embedding matrix {path_prefix}: {e}")
+            return None
+
+    def _index_from_state(self, state: EmbeddingMatrix) -> EmbeddingMatrix:
+        return state
+
+    def _snapshot(self, session, key) -> Tuple[int, str]:
+        user_id, memory_type, _ = key
+        return self._fingerprint(session, memory_type, user_id)
+
+    def _write(self, key, fingerprint: Tuple[int, str]) -> bool:
+        with self._key_lock(key):
+            index = self._indexes[key]
+            if index.needs_compaction():
+                index = index.compact()
+                with self._lock:
+                    self._indexes[key] = index
+            try:
+                index.flush(self.format_version, fingerprint)
+            except OSError as e:
+                logger.warning(
+                    f"Could not save embedding matrix {index.path_prefix}: {e}"
+                )
+                return False
+        return True
+
+
+embedding_matrix_registry = EmbeddingMatrixRegistry()
+register_memory_change_listener(embedding_matrix_registry)
+
+
+@atexit.register
+def _flush_embedding_matrices() -> None:
+    try:
+        embedding_matrix_registry.flush()
+    except Exception as e:
+        logger.warning(f"Could not flush embedding matrices on exit: {e}")
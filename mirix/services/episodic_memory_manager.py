@@ -1,23 +1,24 @@
 import datetime as dt
-import json
-import re
-import string
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
-from rank_bm25 import BM25Okapi
-from rapidfuzz import fuzz
-from sqlalchemy import func, select, text
+from sqlalchemy import func, select
 
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 from mirix.embeddings import embedding_model
 from mirix.orm.episodic_memory import EpisodicEvent
+from mirix.orm.sqlalchemy_base import defer_embeddings
 from mirix.orm.errors import NoResultFound
 from mirix.schemas.agent import AgentState
 from mirix.schemas.episodic_memory import EpisodicEvent as PydanticEpisodicEvent
 from mirix.schemas.user import User as PydanticUser
-from mirix.services.utils import build_query, update_timezone
-from mirix.settings import settings
+from mirix.services.memory_change_hooks import (
+    notify_memory_delete,
+    notify_memory_upsert,
+)
+from mirix.services.pagination import paginate
+from mirix.services.retrieval_engine import SearchableMemory, memory_retrieval_engine
+from mirix.services.utils import substring_filter, update_timezone
 from mirix.utils import enforce_types
 
 
@@ -28,99 +29,31 @@ class EpisodicMemoryManager:
         from mirix.server.server import db_context
 
         self.session_maker = db_context
-
-    def _clean_text_for_search(self, text: str) -> str:
-        """
-        Clean text by removing punctuation and normalizing whitespace.
-
-        Args:
-            text: Input text to clean
-
-        Returns:
-            Cleaned text with punctuation removed and normalized whitespace
-        """
-        if not text:
-            return ""
-
-        # Remove punctuation using string.punctuation
-        # Create translation table that maps each punctuation character to space
-        translator = str.maketrans(string.punctuation, " " * len(string.punctuation))
-        text = text.translate(translator)
-
-        # Convert to lowercase and normalize whitespace
-        text = re.sub(r"\s+", " ", text.lower().strip())
-
-        return text
-
-    def _preprocess_text_for_bm25(self, text: str) -> List[str]:
-        """
-        Preprocess text for BM25 search by tokenizing and cleaning.
-
-        Args:
-            text: Input text to preprocess
-
-        Returns:
-            List of cleaned tokens
-        """
-        if not text:
-            return []
-
-        # Clean text first
-        cleaned_text = self._clean_text_for_search(text)
-
-        # Split into tokens and filter out empty strings and very short tokens
-        tokens = [
-            token for token in cleaned_text.split() if token.strip() and len(token) > 1
-        ]
-        return tokens
-
-    def _count_word_matches(
-        self, event_data: Dict[str, Any], query_words: List[str], search_field: str = ""
-    ) -> int:
-        """
-        Count how many of the query words are present in the event data.
-
-        Args:
-            event_data: Dictionary containing event data
-            query_words: List of query words to search for
-            search_field: Specific field to search in, or empty string to search all text fields
-
-        Returns:
-            Number of query words found in the event
-        """
-        if not query_words:
-            return 0
-
-        # Determine which text fields to search in
-        if search_field == "summary":
-            search_texts = [event_data.get("summary", "")]
-        elif search_field == "details":
-            search_texts = [event_data.get("details", "")]
-        elif search_field == "actor":
-            search_texts = [event_data.get("actor", "")]
-        elif search_field == "event_type":
-            search_texts = [event_data.get("event_type", "")]
-        else:
-            # Search across all relevant text fields
-            search_texts = [
-                event_data.get("summary", ""),
-                event_data.get("details", ""),
-                event_data.get("actor", ""),
-                event_data.get("event_type", ""),
-            ]
-
-        # Combine all search texts and clean them (remove punctuation)
-        combined_text = " ".join(text for text in search_texts if text)
-        cleaned_combined_text = self._clean_text_for_search(combined_text)
-
-        # Count how many query words are present
-        word_matches = 0
-        for word in query_words:
-            # Query words are already cleaned, so we can do direct comparison
-            if word in cleaned_combined_text:
-                word_matches += 1
-
-        return word_matches
+        memory_retrieval_engine.register(
+            SearchableMemory(
+                memory_type="episodic",
+                model=EpisodicEvent,
+                search_fields=("summary", "details", "actor", "event_type"),
+                default_field="summary",
+                vector_field="summary",
+                result_columns=(
+                    "id",
+                    "created_at",
+                    "occurred_at",
+                    "actor",
+                    "event_type",
+                    "summary",
+                    "details",
+                    "embedding_config",
+                    "organization_id",
+                    "metadata_",
+                    "last_modify",
+                    "tree_path",
+                    "user_id",
+                ),
+                recent_order=EpisodicEvent.occurred_at.desc(),
+            )
+        )
 
     @update_timezone
     @enforce_types
@@ -157,7 +90,7 @@ class EpisodicMemoryManager:
             from sqlalchemy import DateTime, cast, text
 
             query = (
-                select(EpisodicEvent)
+                select(EpisodicEvent).options(*defer_embeddings(EpisodicEvent))
                 .where(EpisodicEvent.user_id == actor.id)
                 .order_by(
                     cast(
@@ -214,7 +147,10 @@ class EpisodicMemoryManager:
         with self.session_maker() as session:
             episodic_memory_item = EpisodicEvent(**episodic_memory_dict)
             episodic_memory_item.create(session)
-            return episodic_memory_item.to_pydantic()
+            event = episodic_memory_item.to_pydantic()
+
+        notify_memory_upsert("episodic", actor.id, event)
+        return event
 
     @enforce_types
     def create_many_episodic_memory(
@@ -241,6 +177,8 @@ class EpisodicMemoryManager:
                     f"Episodic episodic_memory record with id {id} not found."
                 )
 
+        notify_memory_delete("episodic", actor.id, id)
+
     @enforce_types
     def insert_event(
         self,
@@ -255,33 +193,64 @@ class EpisodicMemoryManager:
         tree_path: Optional[List[str]] = None,
         raw_memory_references: Optional[List[str]] = None,
     ) -> PydanticEpisodicEvent:
-        try:
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                details_embedding = embed_model.get_text_embedding(details)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                embedding_config = agent_state.embedding_config
-            else:
-                details_embedding = None
-                summary_embedding = None
-                embedding_config = None
-
-            event = self.create_episodic_memory(
+        return self.insert_events(
+            actor=actor,
+            agent_state=agent_state,
+            events=[
+                {
+                    "event_type": event_type,
+                    "timestamp": timestamp,
+                    "event_actor": event_actor,
+                    "details": details,
+                    "summary": summary,
+                    "tree_path": tree_path,
+                    "raw_memory_references": raw_memory_references,
+                }
+            ],
+            organization_id=organization_id,
+        )[0]
+
+    @enforce_types
+    def insert_events(
+        self,
+        actor: PydanticUser,
+        agent_state: AgentState,
+        events: List[dict],
+        organization_id: str,
+    ) -> List[PydanticEpisodicEvent]:
+        """
+        Insert several events, embedding all their details and summaries in one batch.
+        Each dict holds the arguments of `insert_event`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY and events:
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = embed_model.get_text_embeddings(
+                [event["details"] for event in events]
+                + [event["summary"] for event in events]
+            )
+            details_embeddings = embeddings[: len(events)]
+            summary_embeddings = embeddings[len(events) :]
+            embedding_config = agent_state.embedding_config
+        else:
+            details_embeddings = summary_embeddings = [None] * len(events)
+            embedding_config = None
+
+        return [
+            self.create_episodic_memory(
                 PydanticEpisodicEvent(
-                    occurred_at=timestamp,
-                    event_type=event_type,
+                    occurred_at=event["timestamp"],
+                    event_type=event["event_type"],
                     user_id=actor.id,
-                    actor=event_actor,
-                    summary=summary,
-                    details=details,
-                    tree_path=tree_path or [],
+                    actor=event["event_actor"],
+                    summary=event["summary"],
+                    details=event["details"],
+                    tree_path=event.get("tree_path") or [],
                     organization_id=organization_id,
                     summary_embedding=summary_embedding,
                     details_embedding=details_embedding,
                     embedding_config=embedding_config,
-                    raw_memory_references=raw_memory_references or [],
+                    raw_memory_references=event.get("raw_memory_references") or [],
                     last_modify={
                         "timestamp": datetime.now(dt.timezone.utc).isoformat(),
                         "operation": "created",
@@ -289,11 +258,10 @@ class EpisodicMemoryManager:
                 ),
                 actor=actor,
             )
-
-            return event
-
-        except Exception as e:
-            raise e
+            for event, details_embedding, summary_embedding in zip(
+                events, details_embeddings, summary_embeddings
+            )
+        ]
 
     @update_timezone
     @enforce_types
@@ -311,7 +279,7 @@ class EpisodicMemoryManager:
         """
         with self.session_maker() as session:
             # Query for episodic events within the time window
-            query = select(EpisodicEvent).where(
+            query = select(EpisodicEvent).options(*defer_embeddings(EpisodicEvent)).where(
                 EpisodicEvent.occurred_at.between(start_time, end_time),
                 EpisodicEvent.user_id == actor.id,
             )
@@ -342,6 +310,8 @@ class EpisodicMemoryManager:
         search_method: str = "embedding",
         limit: Optional[int] = 50,
         timezone_str: str = None,
+        queries: Optional[List[str]] = None,
+        embedded_queries: Optional[List[list]] = None,
     ) -> List[PydanticEpisodicEvent]:
         """
         List all episodic events with various search methods.
@@ -350,13 +320,19 @@ class EpisodicMemoryManager:
             agent_state: The agent state containing embedding configuration
             query: Search query string
             embedded_text: Pre-computed embedding for semantic search
+            queries: Several queries searched together instead of `query` (e.g. ";"-separated topics);
+                their rankings are fused, each item appearing once
+            embedded_queries: Pre-computed embeddings of `queries`
             search_field: Field to search in ('summary', 'details', 'actor', 'event_type', etc.)
             search_method: Search method to use:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL,
-                               falls back to in-memory BM25 for SQLite
+                               uses a persistent BM25 index for SQLite
+                - 'fts5_match': SQLite FTS5 index ranked with bm25() inside SQLite
+                               (same as 'bm25' on PostgreSQL or when FTS5 is unavailable)
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
+                - 'hybrid': 'bm25' and 'embedding' run concurrently, fused by reciprocal rank
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
 
@@ -373,393 +349,22 @@ class EpisodicMemoryManager:
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Legacy 'bm25' (SQLite): In-memory processing, slow for large datasets
-        """
-
-        with self.session_maker() as session:
-            # TODO: handle the case where query is None, we need to extract the 50 most recent results
-
-            if query == "":
-                query_stmt = (
-                    select(EpisodicEvent)
-                    .where(EpisodicEvent.user_id == actor.id)
-                    .order_by(EpisodicEvent.occurred_at.desc())
-                )
-                if limit:
-                    query_stmt = query_stmt.limit(limit)
-                result = session.execute(query_stmt)
-                episodic_memory = result.scalars().all()
-                return [event.to_pydantic() for event in episodic_memory]
-
-            else:
-                base_query = select(
-                    EpisodicEvent.id.label("id"),
-                    EpisodicEvent.created_at.label("created_at"),
-                    EpisodicEvent.occurred_at.label("occurred_at"),
-                    EpisodicEvent.actor.label("actor"),
-                    EpisodicEvent.event_type.label("event_type"),
-                    EpisodicEvent.summary.label("summary"),
-                    EpisodicEvent.details.label("details"),
-                    EpisodicEvent.summary_embedding.label("summary_embedding"),
-                    EpisodicEvent.details_embedding.label("details_embedding"),
-                    EpisodicEvent.embedding_config.label("embedding_config"),
-                    EpisodicEvent.organization_id.label("organization_id"),
-                    EpisodicEvent.metadata_.label("metadata_"),
-                    EpisodicEvent.last_modify.label("last_modify"),
-                    EpisodicEvent.tree_path.label("tree_path"),
-                    EpisodicEvent.user_id.label("user_id"),
-                ).where(EpisodicEvent.user_id == actor.id)
-
-                if search_method == "embedding":
-                    embed_query = True
-                    embedding_config = agent_state.embedding_config
-
-                    main_query = build_query(
-                        base_query=base_query,
-                        query_text=query,
-                        embedded_text=embedded_text,
-                        embed_query=embed_query,
-                        embedding_config=embedding_config,
-                        search_field=eval(
-                            "EpisodicEvent." + search_field + "_embedding"
-                        ),
-                        target_class=EpisodicEvent,
-                    )
-
-                elif search_method == "string_match":
-                    search_field = eval("EpisodicEvent." + search_field)
-                    main_query = base_query.where(
-                        func.lower(search_field).contains(query.lower())
-                    )
-
-                elif search_method == "bm25":
-                    # Check if we're using PostgreSQL - use native full-text search if available
-                    if settings.mirix_pg_uri_no_default:
-                        # Use PostgreSQL's native full-text search with ts_rank for BM25-like functionality
-                        return self._postgresql_fulltext_search(
-                            session, base_query, query, search_field, limit, actor
-                        )
-                    else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
-                        # Load all candidate events (memory-intensive, kept for compatibility)
-                        result = session.execute(
-                            select(EpisodicEvent).where(
-                                EpisodicEvent.user_id == actor.id
-                            )
-                        )
-                        all_events = result.scalars().all()
-
-                        if not all_events:
-                            return []
-
-                        # Prepare documents for BM25
-                        documents = []
-                        valid_events = []
-
-                        for event in all_events:
-                            # Determine which field to use for search
-                            if search_field and hasattr(event, search_field):
-                                text_to_search = getattr(event, search_field) or ""
-                            else:
-                                text_to_search = event.summary or ""
-
-                            # Preprocess the text into tokens
-                            tokens = self._preprocess_text_for_bm25(text_to_search)
-
-                            # Only include events that have tokens after preprocessing
-                            if tokens:
-                                documents.append(tokens)
-                                valid_events.append(event)
-
-                        if not documents:
-                            return []
-
-                        # Initialize BM25 with the documents
-                        bm25 = BM25Okapi(documents)
-
-                        # Preprocess the query
-                        query_tokens = self._preprocess_text_for_bm25(query)
-
-                        if not query_tokens:
-                            # If query has no valid tokens, return most recent events
-                            return [
-                                event.to_pydantic() for event in valid_events[:limit]
-                            ]
-
-                        # Get BM25 scores for all documents
-                        scores = bm25.get_scores(query_tokens)
-
-                        # Create scored events list
-                        scored_events = list(zip(scores, valid_events))
-
-                        # Sort by BM25 score in descending order
-                        scored_events.sort(key=lambda x: x[0], reverse=True)
-
-                        # Get top events based on limit
-                        top_events = [event for score, event in scored_events[:limit]]
-                        episodic_memory = top_events
-
-                        # Return the list after converting to Pydantic
-                        return [event.to_pydantic() for event in episodic_memory]
-
-                elif search_method == "fuzzy_match":
-                    # Load all candidate events (kept for backward compatibility)
-                    result = session.execute(
-                        select(EpisodicEvent).where(EpisodicEvent.user_id == actor.id)
-                    )
-                    all_events = result.scalars().all()
-                    scored_events = []
-                    for event in all_events:
-                        # Determine which field to use:
-                        # 1. If a search_field is provided (like "summary" or "details") use that.
-                        # 2. Otherwise, fallback to the summary.
-                        if search_field and hasattr(event, search_field):
-                            text_to_search = getattr(event, search_field)
-                        else:
-                            text_to_search = event.summary
-
-                        # Use fuzz.partial_ratio for short query matching against long text.
-                        score = fuzz.partial_ratio(
-                            query.lower(), text_to_search.lower()
-                        )
-                        scored_events.append((score, event))
-
-                    # Sort events in descending order of fuzzy match score.
-                    scored_events.sort(key=lambda x: x[0], reverse=True)
-                    # Optionally, you could filter out results below a certain score threshold.
-                    top_events = [event for score, event in scored_events[:limit]]
-                    episodic_memory = top_events
-                    # Return the list after converting to Pydantic.
-                    return [event.to_pydantic() for event in episodic_memory]
-
-                if limit:
-                    main_query = main_query.limit(limit)
-
-                results = list(session.execute(main_query))
-
-                episodic_memory = []
-                for row in results:
-                    data = dict(row._mapping)
-                    episodic_memory.append(EpisodicEvent(**data))
-
-                return [event.to_pydantic() for event in episodic_memory]
-
-    def _postgresql_fulltext_search(
-        self, session, base_query, query_text, search_field, limit, actor
-    ):
-        """
-        Efficient PostgreSQL-native full-text search using ts_rank for BM25-like functionality.
-        This method leverages PostgreSQL's built-in full-text search capabilities and GIN indexes.
-
-        Args:
-            session: Database session
-            base_query: Base SQLAlchemy query
-            query_text: Search query string
-            search_field: Field to search in ('summary', 'details', 'actor', 'event_type', etc.)
-            limit: Maximum number of results to return
-
-        Returns:
-            List of EpisodicEvent objects ranked by relevance
+            - SQLite 'bm25': Persistent inverted index, only the query terms' postings are scored
         """
-        from sqlalchemy import func
-
-        # Clean and prepare the search query
-        cleaned_query = self._clean_text_for_search(query_text)
-        if not cleaned_query.strip():
-            return []
-
-        # Split into words and create a tsquery - PostgreSQL will handle the ranking
-        query_words = [word.strip() for word in cleaned_query.split() if word.strip()]
-        if not query_words:
-            return []
-
-        # Create tsquery string with improved logic:
-        # 1. Use AND for multiple words when they form a meaningful phrase
-        # 2. Use OR for broader matching when words seem unrelated
-        # 3. Add prefix matching for partial word matches
-        tsquery_parts = []
-        for word in query_words:
-            # Escape special characters for tsquery
-            escaped_word = (
-                word.replace("'", "''")
-                .replace("&", "")
-                .replace("|", "")
-                .replace("!", "")
-                .replace(":", "")
-            )
-            if escaped_word and len(escaped_word) > 1:  # Skip very short words
-                # Add both exact and prefix matching for better results
-                if len(escaped_word) >= 3:
-                    tsquery_parts.append(f"('{escaped_word}' | '{escaped_word}':*)")
-                else:
-                    tsquery_parts.append(f"'{escaped_word}'")
-
-        if not tsquery_parts:
-            return []
-
-        # Use AND logic for multiple terms to find more relevant documents
-        # but fallback to OR if AND produces no results
-        if len(tsquery_parts) > 1:
-            tsquery_string_and = " & ".join(tsquery_parts)  # AND logic for precision
-            tsquery_string_or = " | ".join(tsquery_parts)  # OR logic for recall
-        else:
-            tsquery_string_and = tsquery_string_or = tsquery_parts[0]
-
-        # Build the PostgreSQL full-text search query using raw SQL with proper parameterization
-        # This avoids the TextClause.op() issue and is more efficient
-
-        # Determine which field to search based on search_field
-        if search_field == "summary":
-            tsvector_sql = "to_tsvector('english', coalesce(summary, ''))"
-            rank_sql = "ts_rank_cd(to_tsvector('english', coalesce(summary, '')), to_tsquery('english', :tsquery), 32)"
-        elif search_field == "details":
-            tsvector_sql = "to_tsvector('english', coalesce(details, ''))"
-            rank_sql = "ts_rank_cd(to_tsvector('english', coalesce(details, '')), to_tsquery('english', :tsquery), 32)"
-        elif search_field == "actor":
-            tsvector_sql = "to_tsvector('english', coalesce(actor, ''))"
-            rank_sql = "ts_rank_cd(to_tsvector('english', coalesce(actor, '')), to_tsquery('english', :tsquery), 32)"
-        elif search_field == "event_type":
-            tsvector_sql = "to_tsvector('english', coalesce(event_type, ''))"
-            rank_sql = "ts_rank_cd(to_tsvector('english', coalesce(event_type, '')), to_tsquery('english', :tsquery), 32)"
-        else:
-            # Search across all relevant text fields with weighting
-            tsvector_sql = """setweight(to_tsvector('english', coalesce(summary, '')), 'A') ||
-                             setweight(to_tsvector('english', coalesce(details, '')), 'B') ||
-                             setweight(to_tsvector('english', coalesce(actor, '')), 'C') ||
-                             setweight(to_tsvector('english', coalesce(event_type, '')), 'D')"""
-            rank_sql = """ts_rank_cd(
-                setweight(to_tsvector('english', coalesce(summary, '')), 'A') ||
-                setweight(to_tsvector('english', coalesce(details, '')), 'B') ||
-                setweight(to_tsvector('english', coalesce(actor, '')), 'C') ||
-                setweight(to_tsvector('english', coalesce(event_type, '')), 'D'),
-                to_tsquery('english', :tsquery), 32)"""
-
-        # Try AND query first for more precise results
-        try:
-            and_query_sql = text(f"""
-                SELECT 
-                    id, created_at, occurred_at, actor, event_type, tree_path,
-                    summary, details, summary_embedding, details_embedding,
-                    embedding_config, organization_id, metadata_, last_modify, user_id,
-                    raw_memory_references,
-                    {rank_sql} as rank_score
-                FROM episodic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
-                    AND user_id = :user_id
-                ORDER BY rank_score DESC, created_at DESC
-                LIMIT :limit_val
-            """)
-
-            results = list(
-                session.execute(
-                    and_query_sql,
-                    {
-                        "tsquery": tsquery_string_and,
-                        "user_id": actor.id,
-                        "limit_val": limit or 50,
-                    },
-                )
-            )
-
-            # If AND query returns sufficient results, use them
-            if len(results) >= min(limit or 10, 10):
-                episodic_memory = []
-                for row in results:
-                    data = dict(row._mapping)
-                    # Remove the rank_score field before creating the object
-                    data.pop("rank_score", None)
-
-                    # Parse JSON fields that are returned as strings from raw SQL
-                    json_fields = ["last_modify", "metadata_", "embedding_config"]
-                    for field in json_fields:
-                        if field in data and isinstance(data[field], str):
-                            try:
-                                data[field] = json.loads(data[field])
-                            except (json.JSONDecodeError, TypeError):
-                                pass
-
-                    # Parse embedding fields
-                    embedding_fields = ["summary_embedding", "details_embedding"]
-                    for field in embedding_fields:
-                        if field in data and data[field] is not None:
-                            data[field] = self._parse_embedding_field(data[field])
-
-                    episodic_memory.append(EpisodicEvent(**data))
-
-                return [event.to_pydantic() for event in episodic_memory]
-
-        except Exception as e:
-            print(f"PostgreSQL AND query error: {e}")
-
-        # If AND query fails or returns too few results, try OR query
-        try:
-            or_query_sql = text(f"""
-                SELECT 
-                    id, created_at, occurred_at, actor, event_type, tree_path,
-                    summary, details, summary_embedding, details_embedding,
-                    embedding_config, organization_id, metadata_, last_modify, user_id,
-                    raw_memory_references,
-                    {rank_sql} as rank_score
-                FROM episodic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
-                    AND user_id = :user_id
-                ORDER BY rank_score DESC, created_at DESC
-                LIMIT :limit_val
-            """)
-
-            results = session.execute(
-                or_query_sql,
-                {
-                    "tsquery": tsquery_string_or,
-                    "user_id": actor.id,
-                    "limit_val": limit or 50,
-                },
-            )
-
-            episodic_memory = []
-            for row in results:
-                data = dict(row._mapping)
-                # Remove the rank_score field before creating the object
-                data.pop("rank_score", None)
-
-                # Parse JSON fields that are returned as strings from raw SQL
-                json_fields = ["last_modify", "metadata_", "embedding_config"]
-                for field in json_fields:
-                    if field in data and isinstance(data[field], str):
-                        try:
-                            data[field] = json.loads(data[field])
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-
-                # Parse embedding fields
-                embedding_fields = ["summary_embedding", "details_embedding"]
-                for field in embedding_fields:
-                    if field in data and data[field] is not None:
-                        data[field] = self._parse_embedding_field(data[field])
-
-                episodic_memory.append(EpisodicEvent(**data))
 
-            return [event.to_pydantic() for event in episodic_memory]
-
-        except Exception as e:
-            # If there's an error with the tsquery (e.g., invalid syntax), fall back to simpler search
-            print(f"PostgreSQL full-text search error: {e}")
-            # Fall back to simple ILIKE search
-            fallback_field = (
-                getattr(EpisodicEvent, search_field)
-                if search_field and hasattr(EpisodicEvent, search_field)
-                else EpisodicEvent.summary
-            )
-            fallback_query = base_query.where(
-                func.lower(fallback_field).contains(query_text.lower())
-            ).order_by(EpisodicEvent.created_at.desc())
-
-            if limit:
-                fallback_query = fallback_query.limit(limit)
-
-            results = session.execute(fallback_query)
-            episodic_memory = [EpisodicEvent(**dict(row._mapping)) for row in results]
-            return [event.to_pydantic() for event in episodic_memory]
+        return memory_retrieval_engine.search(
+            self.session_maker,
+            "episodic",
+            actor.id,
+            query=query,
+            embedded_text=embedded_text,
+            search_field=search_field,
+            search_method=search_method,
+            limit=limit,
+            embedding_config=agent_state.embedding_config,
+            queries=queries,
+            embedded_queries=embedded_queries,
+        )
 
     def update_event(
         self,
@@ -800,72 +405,10 @@ class EpisodicMemoryManager:
             }
 
             selected_event.update(session)
-            return selected_event.to_pydantic()
-
-    def _parse_embedding_field(self, embedding_value):
-        """
-        Helper method to parse embedding field from different PostgreSQL return formats.
-
-        Args:
-            embedding_value: The raw embedding value from PostgreSQL query
-
-        Returns:
-            List of floats or None if parsing fails
-        """
-        if embedding_value is None:
-            return None
-
-        try:
-            # If it's already a list or tuple, convert to list
-            if isinstance(embedding_value, (list, tuple)):
-                return list(embedding_value)
-
-            # If it's a string, try different parsing approaches
-            if isinstance(embedding_value, str):
-                # Remove any whitespace
-                embedding_value = embedding_value.strip()
-
-                # Check if it's a JSON array string: "[-0.006639634,-0.0114432...]"
-                if embedding_value.startswith("[") and embedding_value.endswith("]"):
-                    try:
-                        return json.loads(embedding_value)
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, try manual parsing
-                        # Remove brackets and split by comma
-                        inner = embedding_value[1:-1]  # Remove [ and ]
-                        return [float(x.strip()) for x in inner.split(",") if x.strip()]
-
-                # Try comma-separated values
-                if "," in embedding_value:
-                    return [
-                        float(x.strip())
-                        for x in embedding_value.split(",")
-                        if x.strip()
-                    ]
-
-                # Try space-separated values
-                if " " in embedding_value:
-                    return [
-                        float(x.strip()) for x in embedding_value.split() if x.strip()
-                    ]
-
-            # Try using the original deserialize_vector approach for binary data
-            try:
-                from mirix.helpers.converters import deserialize_vector
-
-                class MockDialect:
-                    name = "postgresql"
-
-                return deserialize_vector(embedding_value, MockDialect())
-            except Exception:
-                pass
+            event = selected_event.to_pydantic()
 
-            # If all else fails, return None to avoid validation errors
-            return None
-
-        except Exception as e:
-            print(f"Warning: Failed to parse embedding field: {e}")
-            return None
+        notify_memory_upsert("episodic", actor.id, event)
+        return event
 
     def list_episodic_items_paginated(
         self,
@@ -873,6 +416,8 @@ class EpisodicMemoryManager:
         search_query: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
+        cursor: Optional[str] = None,
+        exact_total: bool = False,
     ) -> dict:
         """
         List episodic memory items with simple search and pagination (optimized for frontend).
@@ -881,52 +426,43 @@ class EpisodicMemoryManager:
             actor: User requesting the episodic memories
             search_query: Optional search term to filter by (searches in id, summary, details, event_type, actor)
             limit: Maximum number of items to return
-            offset: Number of items to skip (for pagination)
+            offset: Number of items to skip (for pagination); ignored when `cursor` is given
+            cursor: `next_cursor` of the previous page, pages by (occurred_at, id) instead of offset
+            exact_total: Count the matching items even if a recent total is cached
 
         Returns:
             Dictionary containing:
                 - items: List of episodic memory items (Pydantic models)
                 - total: Total count of matching items
-                - page: Current page number
+                - page: Current page number (None when paging by cursor)
                 - pages: Total number of pages
+                - next_cursor: Cursor of the next page, None on the last one
         """
-        from sqlalchemy import func, or_
-
         with self.session_maker() as session:
-            from mirix.orm.episodic_memory import EpisodicEvent
-
-            query = select(EpisodicEvent).where(EpisodicEvent.user_id == actor.id)
-
-            # Apply search filter
-            if search_query and search_query.strip():
-                search_term = f"%{search_query}%"
-                query = query.where(
-                    or_(
-                        EpisodicEvent.id.ilike(search_term),
-                        EpisodicEvent.summary.ilike(search_term),
-                        EpisodicEvent.details.ilike(search_term),
-                        EpisodicEvent.event_type.ilike(search_term),
-                        EpisodicEvent.actor.ilike(search_term),
+            conditions = [EpisodicEvent.user_id == actor.id]
+            search_query = search_query.strip() if search_query else ""
+            if search_query:
+                conditions.append(
+                    substring_filter(
+                        session,
+                        EpisodicEvent,
+                        ["id", "summary", "details", "event_type", "actor"],
+                        search_query,
                     )
                 )
 
-            # Get total count
-            count_query = select(func.count()).select_from(query.subquery())
-            total_count = session.execute(count_query).scalar() or 0
-
-            # Apply ordering and pagination
-            query = query.order_by(EpisodicEvent.occurred_at.desc())
-            query = query.limit(limit).offset(offset)
-
-            result = session.execute(query)
-            items = result.scalars().all()
-
-            current_page = (offset // limit) + 1 if limit > 0 else 1
-            total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
-
-            return {
-                "items": [item.to_pydantic() for item in items],
-                "total": total_count,
-                "page": current_page,
-                "pages": total_pages,
-            }
+            result = paginate(
+                session,
+                EpisodicEvent,
+                conditions,
+                EpisodicEvent.occurred_at,
+                "episodic",
+                actor.id,
+                limit,
+                offset=offset,
+                cursor=cursor,
+                total_key=search_query,
+                exact_total=exact_total,
+            )
+            result["items"] = [item.to_pydantic() for item in result["items"]]
+            return result
@@ -0,0 +1,144 @@
+"""
+The `fuzzy_match` search method of the memory managers.
+
+Memories are ranked by `fuzz.partial_ratio` of the lowercased query against
+one lowercased text field, best first. Instead of loading every row of the
+user and scoring it in a Python loop, only (id, text) pairs are read and
+they are scored in batch by `rapidfuzz.process.cdist`, in C and on
+`settings.fuzzy_match_workers` threads.
+
+Rows are also pruned before scoring. The candidates are the rows whose
+field shares a trigram with the query (plus texts shorter than the query),
+looked up in the FTS5 trigram tables on SQLite (orm/sqlite_fts.py) and
+through the pg_trgm indexes on PostgreSQL (orm/pg_text_search.py). A text
+sharing no trigram with a query of length m scores at most
+`_non_candidate_bound(m)`, so when the limit-th best candidate beats that
+bound the other rows cannot reach the results. Otherwise they are scored
+too, with the limit-th score as `score_cutoff`. Either way the ranking is
+the one of scoring every row.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import func, literal_column, not_, or_, select
+
+from mirix.orm.sqlite_fts import (
+    TRIGRAM_MIN_LENGTH,
+    TRIGRAM_TABLES,
+    is_trigram_enabled,
+    trigram_any_rowids,
+)
+from mirix.settings import settings
+
+
+def _trigrams(text: str) -> List[str]:
+    """Distinct substrings of TRIGRAM_MIN_LENGTH characters, in order."""
+    size = TRIGRAM_MIN_LENGTH
+    return list(dict.fromkeys(text[i : i + size] for i in range(len(text) - size + 1)))
+
+
+def _non_candidate_bound(query_length: int) -> float:
+    """
+    Highest partial_ratio of a query of `query_length` characters against a
+    text at least as long that shares no trigram with it. Without a common
+    trigram, matching characters come in runs of at most two, each run
+    separated by a skipped character.
+    """
+    return 200 * (query_length + 1) / (2.5 * query_length + 1)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _candidate_condition(
+    session, target_class, search_field: str, trigrams: Sequence[str]
+):
+    """Rows sharing any of `trigrams`, served by an index; None without one."""
+    table_name = target_class.__tablename__
+    if search_field not in TRIGRAM_TABLES.get(table_name, ()):
+        return None
+
+    if settings.mirix_pg_uri_no_default:
+        field = getattr(target_class, search_field)
+        return or_(
+            *(field.ilike(f"%{_escape_like(t)}%", escape="\\") for t in trigrams)
+        )
+    if is_trigram_enabled(session.get_bind(), table_name):
+        return literal_column(f"{table_name}.rowid").in_(
+            trigram_any_rowids(table_name, search_field, trigrams)
+        )
+    return None
+
+
+def _score(
+    query: str, rows: Sequence[Tuple[str, Optional[str]]], score_cutoff: float
+) -> List[Tuple[float, str]]:
+    """(score, id) of the rows scoring at least `score_cutoff`, in row order."""
+    if not rows:
+        return []
+    scores = process.cdist(
+        [query],
+        [(text or "").lower() for _, text in rows],
+        scorer=fuzz.partial_ratio,
+        processor=None,
+        score_cutoff=score_cutoff,
+        dtype=np.float64,
+        workers=settings.fuzzy_match_workers,
+    )[0]
+    return [
+        (float(score), item_id)
+        for score, (item_id, _) in zip(scores, rows)
+        if score >= score_cutoff
+    ]
+
+
+def fuzzy_search(
+    session,
+    target_class,
+    search_field: str,
+    query: str,
+    limit: Optional[int],
+    *conditions,
+) -> List[str]:
+    """
+    Ids of the `target_class` rows satisfying `conditions`, best
+    `partial_ratio` of `query` against `search_field` first. Rows of equal
+    score keep the order they were read in.
+    """
+    query = query.lower()
+    field = getattr(target_class, search_field)
+    base_query = select(target_class.id, field)
+    for condition in conditions:
+        base_query = base_query.where(condition)
+
+    def rank(scored: List[Tuple[float, str]]) -> List[str]:
+        # sorted() is stable, so ties stay in row order
+        ranked = sorted(scored, key=lambda pair: -pair[0])
+        return [item_id for _, item_id in ranked[:limit]]
+
+    trigrams = _trigrams(query)
+    candidates = (
+        _candidate_condition(session, target_class, search_field, trigrams)
+        if trigrams
+        else None
+    )
+    if candidates is None:
+        return rank(_score(query, session.execute(base_query).all(), 0))
+
+    # texts shorter than the query are scored against windows of the query,
+    # which the bound does not cover
+    candidates = or_(candidates, func.length(func.coalesce(field, "")) < len(query))
+    scored = _score(query, session.execute(base_query.where(candidates)).all(), 0)
+
+    cutoff = 0.0
+    if limit and len(scored) >= limit:
+        cutoff = sorted((score for score, _ in scored), reverse=True)[limit - 1]
+        # the epsilon absorbs float rounding of scores equal to the bound
+        if cutoff > _non_candidate_bound(len(query)) + 1e-6:
+            return rank(scored)
+
+    others = session.execute(base_query.where(not_(candidates))).all()
+    return rank(scored + _score(query, others, cutoff))
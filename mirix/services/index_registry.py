@@ -0,0 +1,294 @@
+"""
+Shared plumbing for the in-process search indexes of the SQLite backend.
+
+An index registry owns one derived index per (user_id, memory_type, field)
+and is responsible for:
+
+- building an index from the DB on first use,
+- persisting it under `<recall_storage_path>/indexes/<kind>` so a restart
+  does not have to rebuild it, with a fingerprint of the base table that
+  detects files written before the table changed,
+- debounced saving of indexes that changed through the memory change hooks.
+
+Each index has its own lock, taken by its searches and updates, so building
+or saving one index never holds up the others. Saving snapshots the index
+under its lock and writes the snapshot on a background thread.
+
+Subclasses decide what an index is and how it is built and updated.
+"""
+
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+IndexKey = Tuple[str, str, str]
+
+# Minimum number of seconds between two saves of the same dirty index
+FLUSH_INTERVAL_SECONDS = 30.0
+
+# Thread writing the snapshots of dirty indexes to disk
+INDEX_SAVE_POOL = "index-save"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def get_index_executor(pool: str) -> ThreadPoolExecutor:
+    """Single background thread named `pool`, shared by every registry."""
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=pool)
+                _executors[pool] = executor
+    return executor
+
+
+@lru_cache(maxsize=1)
+def _index_storage_root() -> str:
+    from mirix.config import MirixConfig
+
+    return os.path.join(MirixConfig.load().recall_storage_path, "indexes")
+
+
+def get_index_storage_dir(kind: str, *parts: str, root: Optional[str] = None) -> str:
+    """
+    Directory for the on-disk search indexes of type `kind`, created on demand.
+
+    Indexes live under `<recall_storage_path>/indexes`, next to sqlite.db, so
+    that deleting the Mirix data directory also removes them. `root`
+    replaces that directory.
+    """
+    path = os.path.join(root or _index_storage_root(), kind, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class PersistentIndexRegistry:
+    """
+    Base class of the per-user index registries.
+
+    Subclasses set `kind` and `format_version` and implement `_build`,
+    `_index_to_state` and `_index_from_state`. `self._models` maps each
+    registered memory type to its ORM class.
+
+    `self._lock` guards the registry's dictionaries and is only held briefly;
+    an index is searched and updated under `self._key_lock(key)`.
+    """
+
+    kind: str = ""
+    format_version: int = 1
+
+    def __init__(self, storage_root: Optional[str] = None):
+        self._storage_root = storage_root
+        self._models: Dict[str, Any] = {}
+        self._indexes: Dict[IndexKey, Any] = {}
+        # key -> number of changes since the index was last saved
+        self._dirty: Dict[IndexKey, int] = {}
+        self._last_flush: Dict[IndexKey, float] = {}
+        self._saving: Dict[IndexKey, Future] = {}
+        self._key_locks: Dict[IndexKey, threading.RLock] = {}
+        self._lock = threading.RLock()
+        # engine of the last search, for the final flush
+        self._bind = None
+
+    def _build(self, session, key: IndexKey):
+        raise NotImplementedError
+
+    def _index_to_state(self, index) -> dict:
+        raise NotImplementedError
+
+    def _index_from_state(self, state: dict):
+        raise NotImplementedError
+
+    def _storage_dir(self, user_id: str) -> str:
+        return get_index_storage_dir(self.kind, user_id, root=self._storage_root)
+
+    def _index_path(self, key: IndexKey) -> str:
+        user_id, memory_type, field_key = key
+        directory = self._storage_dir(user_id)
+        return os.path.join(directory, f"{memory_type}__{field_key or 'default'}.pkl")
+
+    def _key_lock(self, key: IndexKey) -> threading.RLock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.RLock()
+            return lock
+
+    def _fingerprint(self, session, memory_type: str, user_id: str) -> Tuple[int, str]:
+        model_class = self._models[memory_type]
+        count, last_updated = session.execute(
+            select(func.count(model_class.id), func.max(model_class.updated_at)).where(
+                model_class.user_id == user_id
+            )
+        ).one()
+        return count, str(last_updated)
+
+    def _load(self, session, key: IndexKey) -> Optional[dict]:
+        """Saved state of the index for `key`, if it is still current."""
+        path = self._index_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable {self.kind} index {path}: {e}")
+            return None
+
+        if state.get("version") != self.format_version:
+            return None
+
+        user_id, memory_type, _ = key
+        if tuple(state.get("fingerprint", ())) != self._fingerprint(
+            session, memory_type, user_id
+        ):
+            # the table changed while the index was not loaded
+            return None
+        return state["index"]
+
+    def _get_index(self, session, key: IndexKey):
+        """
+        Return the index for `key`, loading or building it if needed. The
+        caller holds the key's lock.
+        """
+        self._bind = session.get_bind()
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        state = self._load(session, key)
+        if state is not None:
+            index = self._index_from_state(state)
+        else:
+            index = self._build(session, key)
+        with self._lock:
+            self._indexes[key] = index
+            if state is None:
+                self._mark_dirty(key)
+        return index
+
+    def _mark_dirty(self, key: IndexKey) -> None:
+        with self._lock:
+            self._dirty[key] = self._dirty.get(key, 0) + 1
+
+    def _maybe_flush(self, session, key: IndexKey) -> None:
+        """Save the index in the background if due; called under the key's lock."""
+        with self._lock:
+            if key not in self._dirty:
+                return
+            saving = self._saving.get(key)
+            if saving is not None and not saving.done():
+                return
+            now = time.monotonic()
+            if now - self._last_flush.get(key, 0.0) < FLUSH_INTERVAL_SECONDS:
+                return
+            changes = self._dirty[key]
+
+        snapshot = self._snapshot(session, key)
+        try:
+            future = get_index_executor(INDEX_SAVE_POOL).submit(
+                self._save_snapshot, key, changes, snapshot
+            )
+        except RuntimeError:
+            # interpreter shutting down; the exit flush saves it
+            return
+        with self._lock:
+            self._saving[key] = future
+
+    def _snapshot(self, session, key: IndexKey) -> Any:
+        """
+        What `_write` saves of the index for `key`, taken under the key's lock.
+
+        The fingerprint is read first: a row written in between makes the
+        saved index newer than its fingerprint, which only causes a rebuild.
+        """
+        user_id, memory_type, _ = key
+        state = {
+            "version": self.format_version,
+            "fingerprint": self._fingerprint(session, memory_type, user_id),
+            "index": self._index_to_state(self._indexes[key]),
+        }
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _write(self, key: IndexKey, snapshot: Any) -> bool:
+        path = self._index_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save {self.kind} index {path}: {e}")
+            return False
+        return True
+
+    def _save_snapshot(self, key: IndexKey, changes: int, snapshot: Any) -> None:
+        saved = False
+        try:
+            saved = self._write(key, snapshot)
+        finally:
+            with self._lock:
+                if saved:
+                    self._last_flush[key] = time.monotonic()
+                    # changed again since the snapshot: still dirty
+                    if self._dirty.get(key) == changes:
+                        del self._dirty[key]
+
+    def flush(self) -> None:
+        """
+        Persist every index that changed since it was last saved, waiting
+        for the saves in progress. Reads the fingerprints through the engine
+        of the last search.
+        """
+        with self._lock:
+            saving = list(self._saving.values())
+        wait_for_futures(saving)
+        with self._lock:
+            keys = list(self._dirty)
+            bind = self._bind
+        if not keys or bind is None:
+            return
+        with Session(bind) as session:
+            for key in keys:
+                with self._key_lock(key):
+                    with self._lock:
+                        changes = self._dirty.get(key)
+                    if changes is None:
+                        continue
+                    snapshot = self._snapshot(session, key)
+                self._save_snapshot(key, changes, snapshot)
+
+    def _loaded_indexes(
+        self, memory_type: str, user_id: str
+    ) -> Iterator[Tuple[IndexKey, Any]]:
+        """
+        Yield (key, index) for the user's loaded indexes of `memory_type`,
+        each under its lock. Builds in progress are waited for, so they
+        cannot miss a change committed after they read the table.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._key_locks
+                if key[0] == user_id and key[1] == memory_type
+            ]
+        for key in keys:
+            with self._key_lock(key):
+                index = self._indexes.get(key)
+                if index is not None:
+                    yield key, index
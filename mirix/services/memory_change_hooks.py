@@ -0,0 +1,58 @@
+"""
+Change notifications for the memory tables.
+
+The memory managers call `notify_memory_upsert` / `notify_memory_delete`
+after every successful create, update and delete. Derived structures that
+mirror the memory tables (search indexes, caches) register a listener here
+instead of being wired into each manager separately.
+
+Listeners must be cheap and must never break a write: exceptions are
+logged and swallowed, and every listener is expected to be able to rebuild
+itself from the database if it misses an update.
+"""
+
+import threading
+from typing import Any, List, Protocol
+
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class MemoryChangeListener(Protocol):
+    def on_memory_upsert(self, memory_type: str, user_id: str, item: Any) -> None:
+        """Called after `item` (a Pydantic memory item) was created or updated."""
+
+    def on_memory_delete(self, memory_type: str, user_id: str, item_id: str) -> None:
+        """Called after the item with `item_id` was deleted."""
+
+
+_listeners: List[MemoryChangeListener] = []
+_listeners_lock = threading.Lock()
+
+
+def register_memory_change_listener(listener: MemoryChangeListener) -> None:
+    """Register a listener; registering the same object twice is a no-op."""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def notify_memory_upsert(memory_type: str, user_id: str, item: Any) -> None:
+    for listener in list(_listeners):
+        try:
+            listener.on_memory_upsert(memory_type, user_id, item)
+        except Exception as e:
+            logger.warning(
+                f"{type(listener).__name__} failed to apply upsert of {memory_type} item {getattr(item, 'id', None)}: {e}"
+            )
+
+
+def notify_memory_delete(memory_type: str, user_id: str, item_id: str) -> None:
+    for listener in list(_listeners):
+        try:
+            listener.on_memory_delete(memory_type, user_id, item_id)
+        except Exception as e:
+            logger.warning(
+                f"{type(listener).__name__} failed to apply delete of {memory_type} item {item_id}: {e}"
+            )
@@ -0,0 +1,141 @@
+"""
+Concurrent retrieval across memory types.
+
+Building an agent's system prompt reads core, knowledge vault, episodic,
+resource, procedural and semantic memory. Each read opens its own DB
+session, so they can run side by side on a small shared thread pool, and
+the prompt waits for the slowest read instead of the sum of all of them.
+
+The `hybrid` search method runs a lexical and a vector search side by side
+on a second pool, so it can be used from inside a retrieval thread, and
+fuses the two rankings with reciprocal-rank fusion. The rankings of the
+topics of a multi-topic search are fused the same way.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from mirix.log import get_logger
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+# Thread pools, by thread name prefix
+RETRIEVAL_POOL = "MemoryRetrieval"
+SEARCH_POOL = "HybridSearch"
+
+# Rank offset of reciprocal-rank fusion; 60 is the usual choice
+RRF_K = 60
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(pool: str) -> ThreadPoolExecutor:
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.memory_retrieval_workers),
+                    thread_name_prefix=pool,
+                )
+                _executors[pool] = executor
+    return executor
+
+
+def fetch_concurrently(
+    fetchers: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    pool: str = RETRIEVAL_POOL,
+) -> Dict[str, Any]:
+    """
+    Run each fetcher on the shared retrieval pool and collect the results.
+
+    Every fetcher gets `timeout` seconds (default
+    `settings.memory_retrieval_timeout`). Fetchers that fail or time out are
+    logged and left out of the result, so callers can fall back to an empty
+    section instead of failing the whole prompt. The result keeps the order
+    of `fetchers`.
+    """
+    if timeout is None:
+        timeout = settings.memory_retrieval_timeout
+
+    # A single fetch, or one issued from a thread of the same pool, runs
+    # inline and without a timeout: there is nothing to overlap, and waiting
+    # on the pool from inside it could deadlock.
+    if len(fetchers) <= 1 or threading.current_thread().name.startswith(pool):
+        results = {}
+        for name, fetch in fetchers.items():
+            try:
+                results[name] = fetch()
+            except Exception as e:
+                logger.warning(f"Retrieving {name} memory failed: {e}")
+        return results
+
+    executor = _get_executor(pool)
+    futures = {name: executor.submit(fetch) for name, fetch in fetchers.items()}
+    deadline = time.monotonic() + timeout
+
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"Retrieving {name} memory timed out after {timeout}s")
+        except Exception as e:
+            logger.warning(f"Retrieving {name} memory failed: {e}")
+    return results
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Any]],
+    limit: Optional[int] = None,
+    key: Callable[[Any], str] = lambda item: item.id,
+) -> List[Any]:
+    """
+    Fuse rankings of items identified by `key` (default: their `id`): each
+    item scores the sum of 1 / (RRF_K + rank) over the rankings it appears
+    in. Ties keep the order in which the items were first seen.
+    """
+    scores: Dict[str, float] = {}
+    items: Dict[str, Any] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_id = key(item)
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (RRF_K + rank)
+            items.setdefault(item_id, item)
+    fused = sorted(scores, key=lambda item_id: -scores[item_id])
+    return [items[item_id] for item_id in fused[:limit]]
+
+
+def hybrid_search(
+    lexical: Callable[[int], List[Any]],
+    vector: Callable[[int], List[Any]],
+    limit: Optional[int],
+) -> List[Any]:
+    """
+    The `hybrid` search method: run the lexical and the vector search, each
+    called with its number of candidates, concurrently and fuse them.
+
+    Each leg returns at most `limit` candidates (at most
+    `settings.hybrid_search_max_candidates`), so the fused top `limit` costs
+    about as much as one query. A failing leg, e.g. the vector search of an
+    agent without embeddings, leaves the other one's ranking.
+    """
+    candidates = settings.hybrid_search_max_candidates
+    if limit:
+        candidates = min(limit, candidates)
+    rankings = fetch_concurrently(
+        {
+            "lexical": lambda: lexical(candidates),
+            "vector": lambda: vector(candidates),
+        },
+        pool=SEARCH_POOL,
+    )
+    return reciprocal_rank_fusion(list(rankings.values()), limit)
@@ -0,0 +1,120 @@
+"""
+Pagination of the memory listings behind the /memory/* endpoints.
+
+Listings are ordered newest first on (timestamp column, id). A page is
+addressed either by its number (LIMIT/OFFSET) or by the cursor returned with
+the previous page. As in `SqlalchemyBase.list`, the cursor is the id of
+the last item shown; the next page seeks right after its (timestamp, id)
+through the (user_id, timestamp, id) index instead of reading and skipping
+every row before it, so deep pages cost as much as the first one.
+
+Totals are cached per (user, memory type, filter) in a `RetrievalCache`.
+Entries are retired by the memory change hooks on every write of the user's
+table (RawMemoryManager invalidates raw memories itself) and expire after
+`settings.memory_listing_total_ttl` seconds, which bounds the drift caused
+by writes from other processes. `exact_total` counts again.
+"""
+
+from typing import Hashable, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select
+
+from mirix.orm.errors import NoResultFound
+from mirix.orm.sqlalchemy_base import defer_embeddings
+from mirix.services.memory_change_hooks import register_memory_change_listener
+from mirix.services.retrieval_cache import RetrievalCache
+from mirix.settings import settings
+
+
+class ListingTotalCache(RetrievalCache):
+    @property
+    def ttl(self) -> float:
+        return settings.memory_listing_total_ttl
+
+
+listing_total_cache = ListingTotalCache()
+register_memory_change_listener(listing_total_cache)
+
+
+def paginate(
+    session,
+    target_class,
+    conditions: Sequence,
+    order_column,
+    memory_type: str,
+    user_id: Optional[str],
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    total_key: Hashable = None,
+    exact_total: bool = False,
+) -> dict:
+    """
+    One page of the `target_class` rows matching `conditions`, newest first
+    on (`order_column`, id). The embedding columns are not loaded.
+
+    Args:
+        conditions: WHERE clauses of the listing (user, search filter, ...)
+        order_column: Timestamp column the listing is ordered by
+        memory_type, user_id: Owner of the cached total; the memory change
+            hooks retire it when that table of that user is written
+        limit: Maximum number of items to return
+        offset: Number of items to skip; ignored when `cursor` is given
+        cursor: ID of the last item seen, the `next_cursor` of the previous
+            page (keyset pagination)
+        total_key: Whatever besides the user narrows the listing (search
+            term, organization), part of the key of the cached total
+        exact_total: Count the matching rows even if a total is cached
+
+    Returns:
+        Dictionary containing:
+            - items: ORM rows of the page
+            - total: Total count of matching items
+            - page: Current page number (None when paging by cursor)
+            - pages: Total number of pages
+            - next_cursor: Cursor of the next page, None on the last one
+    """
+    user_key = user_id or ""
+    total_query = ("total", total_key)
+    total = None if exact_total else listing_total_cache.get(user_key, memory_type, total_query)
+    if total is None:
+        version = listing_total_cache.version(user_key, memory_type)
+        total = session.execute(
+            select(func.count(target_class.id)).where(*conditions)
+        ).scalar() or 0
+        listing_total_cache.put(user_key, memory_type, total_query, total, version)
+
+    query = (
+        select(target_class)
+        .options(*defer_embeddings(target_class))
+        .where(*conditions)
+        .order_by(order_column.desc(), target_class.id.desc())
+    )
+    if cursor:
+        # only a row of this listing (user, filters) can be its cursor
+        cursor_row = session.execute(
+            select(order_column, target_class.id).where(target_class.id == cursor, *conditions)
+        ).first()
+        if not cursor_row:
+            raise NoResultFound(f"No {target_class.__name__} found with id {cursor}")
+        timestamp, cursor_id = cursor_row
+        query = query.where(
+            or_(
+                order_column < timestamp,
+                and_(order_column == timestamp, target_class.id < cursor_id),
+            )
+        )
+        current_page = None
+    else:
+        query = query.offset(offset)
+        current_page = (offset // limit) + 1 if limit > 0 else 1
+
+    items = list(session.execute(query.limit(limit)).scalars().all())
+
+    return {
+        "items": items,
+        "total": total,
+        "page": current_page,
+        "pages": (total + limit - 1) // limit if limit > 0 else 1,
+        "next_cursor": items[-1].id if limit > 0 and len(items) == limit else None,
+    }
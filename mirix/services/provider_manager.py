@@ -1,5 +1,6 @@
 from typing import List, Optional
 
+from mirix.embeddings import clear_embedding_models
 from mirix.orm.provider import Provider as ProviderModel
 from mirix.schemas.providers import Provider as PydanticProvider
 from mirix.schemas.providers import ProviderUpdate
@@ -72,7 +73,11 @@ class ProviderManager:
 
             new_provider = ProviderModel(**provider.model_dump(exclude_unset=True))
             new_provider.create(session, actor=actor)
-            return new_provider.to_pydantic()
+            created = new_provider.to_pydantic()
+
+        # Embedding clients hold the previous override key
+        clear_embedding_models()
+        return created
 
     @enforce_types
     def update_provider(
@@ -94,7 +99,10 @@ class ProviderManager:
 
             # Commit the updated provider
             existing_provider.update(session, actor=actor)
-            return existing_provider.to_pydantic()
+            provider = existing_provider.to_pydantic()
+
+        clear_embedding_models()
+        return provider
 
     @enforce_types
     def delete_provider_by_id(self, provider_id: str, actor: PydanticUser):
@@ -112,6 +120,8 @@ class ProviderManager:
 
             session.commit()
 
+        clear_embedding_models()
+
     @enforce_types
     def list_providers(
         self,
@@ -1,17 +1,94 @@
 import datetime as dt
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.orm import defer
 
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 from mirix.embeddings import embedding_model
+from mirix.helpers.search_tokenizer import tokenize_for_search
 from mirix.orm.raw_memory import RawMemoryItem
+from mirix.orm.sqlalchemy_base import defer_embeddings
+from mirix.orm.sqlite_fts import fts5_search, is_fts5_enabled
 from mirix.schemas.user import User as PydanticUser
+from mirix.services.pagination import listing_total_cache, paginate
+from mirix.services.utils import fetch_items_by_ids, substring_filter
+from mirix.settings import settings
 from mirix.utils import enforce_types
 
 
+# characters of ocr_text returned by RawMemoryManager.get_raw_memory_sources
+RAW_MEMORY_OCR_PREVIEW_LENGTH = 200
+
+
+class RawMemorySourceCache:
+    """
+    Short-lived LRU of the source details of raw memories, keyed by id.
+
+    The same raw memories are cited by many memories and are resolved again
+    on every page of the memory listings and every system prompt. Entries
+    expire after `settings.raw_memory_source_cache_ttl` seconds and are
+    dropped when this process updates or deletes the raw memory.
+    """
+
+    def __init__(self):
+        # id -> (fetched at, owner user id, details)
+        self._entries: "OrderedDict[str, Tuple[float, str, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, raw_memory_ids: List[str]) -> Dict[str, Tuple[str, dict]]:
+        ttl = settings.raw_memory_source_cache_ttl
+        if ttl <= 0:
+            return {}
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for raw_memory_id in raw_memory_ids:
+                entry = self._entries.get(raw_memory_id)
+                if entry is None:
+                    continue
+                fetched_at, user_id, details = entry
+                if now - fetched_at > ttl:
+                    del self._entries[raw_memory_id]
+                    continue
+                self._entries.move_to_end(raw_memory_id)
+                found[raw_memory_id] = (user_id, details)
+        return found
+
+    def put_many(self, entries: Dict[str, Tuple[str, dict]]) -> None:
+        if settings.raw_memory_source_cache_ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for raw_memory_id, (user_id, details) in entries.items():
+                self._entries[raw_memory_id] = (now, user_id, details)
+                self._entries.move_to_end(raw_memory_id)
+            while len(self._entries) > settings.raw_memory_source_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, raw_memory_id: str) -> None:
+        with self._lock:
+            self._entries.pop(raw_memory_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+raw_memory_source_cache = RawMemorySourceCache()
+
+
+def _invalidate_listing_totals(user_ids) -> None:
+    # raw memories are not written through the memory change hooks; "" keys the listings of all users
+    for user_id in {*user_ids, ""}:
+        listing_total_cache.invalidate(user_id, "raw")
+
+
 class RawMemoryManager:
     """
     Manager class to handle business logic related to RawMemory items.
@@ -88,23 +165,9 @@ class RawMemoryManager:
                     if embedding_config:
                         # Create embedding model instance
                         embed_model = embedding_model(embedding_config)
-                        raw_embedding = embed_model.get_text_embedding(ocr_text)
-                        
-                        # Pad embedding to MAX_EMBEDDING_DIM
-                        import numpy as np
-                        from mirix.constants import MAX_EMBEDDING_DIM
-                        
-                        raw_embedding_np = np.array(raw_embedding)
-                        if len(raw_embedding) < MAX_EMBEDDING_DIM:
-                            ocr_text_embedding = np.pad(
-                                raw_embedding_np, 
-                                (0, MAX_EMBEDDING_DIM - len(raw_embedding)), 
-                                mode="constant"
-                            ).tolist()
-                        else:
-                            ocr_text_embedding = raw_embedding
+                        ocr_text_embedding = embed_model.get_text_embedding(ocr_text)
 
-                        # Update embedding_dim in config to match the actual (padded) embedding length
+                        # Stored at its native dimension; record it in the config
                         embedding_config.embedding_dim = len(ocr_text_embedding)
                         
                         # Use model_dump to ensure all fields are present and correct
@@ -143,9 +206,42 @@ class RawMemoryManager:
             session.add(raw_memory)
             session.commit()
             session.refresh(raw_memory)
+            _invalidate_listing_totals([actor.id])
 
             return raw_memory
 
+    def _embed_ocr_texts(self, texts: List[str]):
+        """
+        Embed OCR texts in as few requests as possible with the default embedding model.
+
+        Returns:
+            (embeddings, embedding_config dict), or (None, None) if no API key is configured
+        """
+        from mirix.services.provider_manager import ProviderManager
+        from mirix.settings import model_settings
+        from mirix.schemas.embedding_config import EmbeddingConfig
+
+        provider_manager = ProviderManager()
+
+        # Check for API keys
+        openai_key = provider_manager.get_openai_override_key() or model_settings.openai_api_key
+        gemini_key = provider_manager.get_gemini_override_key() or model_settings.gemini_api_key
+
+        embedding_config = None
+        if openai_key:
+            embedding_config = EmbeddingConfig.default_config("text-embedding-3-small")
+        elif gemini_key:
+            embedding_config = EmbeddingConfig.default_config("text-embedding-004")
+
+        if not embedding_config:
+            return None, None
+
+        embeddings = embedding_model(embedding_config).get_text_embeddings(texts)
+
+        # Stored at their native dimension; record it in the config
+        embedding_config.embedding_dim = len(embeddings[0]) if embeddings else None
+        return embeddings, embedding_config.model_dump()
+
     def bulk_insert_raw_memories(
         self,
         raw_memory_data_list: List[dict],
@@ -165,15 +261,34 @@ class RawMemoryManager:
                 - google_cloud_url: Optional[str]
                 - metadata: Optional[dict]
                 - organization_id: Optional[str]
-            skip_embeddings: 是否跳过 embedding 生成（默认 True，留给异步任务）
+            skip_embeddings: 是否跳过 embedding 生成（默认 True，留给异步任务）；
+                否则所有 OCR 文本一次批量生成 embedding
 
         Returns:
             创建的 RawMemoryItem 实例列表
         """
+        # 批量生成 embedding（所有 OCR 文本共享少量请求）
+        embeddings_by_index = {}
+        embedding_config_dict = None
+        if not skip_embeddings and BUILD_EMBEDDINGS_FOR_MEMORY:
+            indices = [i for i, data in enumerate(raw_memory_data_list) if data.get("ocr_text")]
+            if indices:
+                try:
+                    embeddings, embedding_config_dict = self._embed_ocr_texts(
+                        [raw_memory_data_list[i]["ocr_text"] for i in indices]
+                    )
+                    if embeddings is None:
+                        print("Warning: No valid API key found for embeddings (OpenAI or Gemini). Skipping embedding generation.")
+                    else:
+                        embeddings_by_index = dict(zip(indices, embeddings))
+                except Exception as e:
+                    print(f"Warning: Failed to generate embeddings for raw memories: {e}")
+                    embedding_config_dict = None
+
         with self.session_maker() as session:
             raw_memories = []
 
-            for data in raw_memory_data_list:
+            for index, data in enumerate(raw_memory_data_list):
                 actor = data["actor"]
                 screenshot_path = data["screenshot_path"]
                 source_app = data["source_app"]
@@ -187,10 +302,7 @@ class RawMemoryManager:
                 # 生成 ID
                 raw_memory_id = f"rawmem-{uuid.uuid4()}"
 
-                # 暂不生成 embedding（留给异步任务）
-                # 这里可以根据 skip_embeddings 参数决定是否生成
-                ocr_text_embedding = None
-                embedding_config_dict = None
+                ocr_text_embedding = embeddings_by_index.get(index)
 
                 # 创建 raw memory 对象
                 raw_memory = RawMemoryItem(
@@ -203,7 +315,7 @@ class RawMemoryManager:
                     google_cloud_url=google_cloud_url,
                     metadata_=metadata or {},
                     ocr_text_embedding=ocr_text_embedding,
-                    embedding_config=embedding_config_dict,
+                    embedding_config=embedding_config_dict if ocr_text_embedding else None,
                     processed=False,
                     processing_count=0,
                     user_id=actor.id,
@@ -216,6 +328,7 @@ class RawMemoryManager:
             # 使用 add_all() 而不是 bulk_save_objects()，以保持对象与 session 的关联
             session.add_all(raw_memories)
             session.commit()
+            _invalidate_listing_totals([data["actor"].id for data in raw_memory_data_list])
 
             # 在返回前，确保所有属性已加载到内存（访问一次 ID 属性）
             # 这样 expunge 后对象仍可访问属性
@@ -249,75 +362,46 @@ class RawMemoryManager:
             success_count = 0
             error_count = 0
 
-            for raw_memory in raw_memory_items:
-                try:
-                    # Skip if no OCR text or embeddings disabled
-                    if not raw_memory.ocr_text or not BUILD_EMBEDDINGS_FOR_MEMORY:
-                        continue
-
-                    # 生成 embedding（复用现有逻辑）
-                    from mirix.services.provider_manager import ProviderManager
-                    from mirix.settings import model_settings
-                    from mirix.schemas.embedding_config import EmbeddingConfig
-                    import numpy as np
-                    from mirix.constants import MAX_EMBEDDING_DIM
-
-                    provider_manager = ProviderManager()
+            # Skip if no OCR text or embeddings disabled
+            pending = [rm for rm in raw_memory_items if rm.ocr_text] if BUILD_EMBEDDINGS_FOR_MEMORY else []
 
-                    # Check for API keys
-                    openai_key = provider_manager.get_openai_override_key() or model_settings.openai_api_key
-                    gemini_key = provider_manager.get_gemini_override_key() or model_settings.gemini_api_key
-
-                    embedding_config = None
-                    if openai_key:
-                        embedding_config = EmbeddingConfig.default_config("text-embedding-3-small")
-                    elif gemini_key:
-                        embedding_config = EmbeddingConfig.default_config("text-embedding-004")
-
-                    if not embedding_config:
-                        logger.warning(f"⚠️  No valid API key for embedding generation, skipping {raw_memory.id}")
-                        continue
-
-                    # Generate embedding
-                    embed_model = embedding_model(embedding_config)
-                    raw_embedding = embed_model.get_text_embedding(raw_memory.ocr_text)
-
-                    # Pad to MAX_EMBEDDING_DIM
-                    raw_embedding_np = np.array(raw_embedding)
-                    if len(raw_embedding) < MAX_EMBEDDING_DIM:
-                        ocr_text_embedding = np.pad(
-                            raw_embedding_np,
-                            (0, MAX_EMBEDDING_DIM - len(raw_embedding)),
-                            mode="constant"
-                        ).tolist()
-                    else:
-                        ocr_text_embedding = raw_embedding
-
-                    embedding_config.embedding_dim = len(ocr_text_embedding)
-                    embedding_config_dict = embedding_config.model_dump()
+            try:
+                if pending:
+                    # 一次批量生成所有 embedding（复用现有逻辑）
+                    embeddings, embedding_config_dict = self._embed_ocr_texts(
+                        [rm.ocr_text for rm in pending]
+                    )
+                    if embeddings is None:
+                        logger.warning(f"⚠️  No valid API key for embedding generation, skipping {len(pending)} items")
+                        pending = []
 
-                    # 更新数据库（新会话）
+                if pending:
+                    # 更新数据库（新会话，一次 commit）
                     with self.session_maker() as session:
                         # 重新获取对象（避免 detached 状态）
-                        stmt = select(RawMemoryItem).where(RawMemoryItem.id == raw_memory.id)
-                        result = session.execute(stmt)
-                        db_raw_memory = result.scalar_one_or_none()
-
-                        if db_raw_memory:
-                            db_raw_memory.ocr_text_embedding = ocr_text_embedding
-                            db_raw_memory.embedding_config = embedding_config_dict
-                            session.commit()
-                            success_count += 1
-                            logger.debug(f"✅ Generated embedding for {raw_memory.id}")
-                        else:
-                            logger.error(f"❌ Raw memory {raw_memory.id} not found in database")
-                            error_count += 1
+                        stmt = select(RawMemoryItem).where(
+                            RawMemoryItem.id.in_([rm.id for rm in pending])
+                        )
+                        db_raw_memories = {rm.id: rm for rm in session.execute(stmt).scalars()}
+
+                        for raw_memory, ocr_text_embedding in zip(pending, embeddings):
+                            db_raw_memory = db_raw_memories.get(raw_memory.id)
+                            if db_raw_memory:
+                                db_raw_memory.ocr_text_embedding = ocr_text_embedding
+                                db_raw_memory.embedding_config = embedding_config_dict
+                                success_count += 1
+                                logger.debug(f"✅ Generated embedding for {raw_memory.id}")
+                            else:
+                                logger.error(f"❌ Raw memory {raw_memory.id} not found in database")
+                                error_count += 1
+                        session.commit()
 
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"❌ Failed to generate embedding for {raw_memory.id}: {e}")
-                    import traceback
-                    traceback.print_exc()
+            except Exception as e:
+                error_count = len(pending)
+                success_count = 0
+                logger.error(f"❌ Failed to generate embeddings for {len(pending)} raw memories: {e}")
+                import traceback
+                traceback.print_exc()
 
             logger.info(f"✅ Background embedding generation completed: {success_count} success, {error_count} errors")
 
@@ -331,6 +415,7 @@ class RawMemoryManager:
         raw_memory_id: str,
         user_id: Optional[str] = None,
         organization_id: Optional[str] = None,
+        include_embedding: bool = False,
     ) -> Optional[RawMemoryItem]:
         """
         Retrieve a raw memory item by its ID.
@@ -339,12 +424,16 @@ class RawMemoryManager:
             raw_memory_id: The ID of the raw memory item to retrieve
             user_id: Optional user ID filter
             organization_id: Optional organization ID filter
+            include_embedding: Also load ocr_text_embedding, which is left
+                unloaded (and unreadable once the item is returned) otherwise
 
         Returns:
             The RawMemoryItem if found, None otherwise
         """
         with self.session_maker() as session:
             query = select(RawMemoryItem).where(RawMemoryItem.id == raw_memory_id)
+            if not include_embedding:
+                query = query.options(*defer_embeddings(RawMemoryItem))
 
             if user_id:
                 query = query.where(RawMemoryItem.user_id == user_id)
@@ -402,6 +491,7 @@ class RawMemoryManager:
         with self.session_maker() as session:
             query = (
                 select(RawMemoryItem)
+                .options(*defer_embeddings(RawMemoryItem))
                 .where(RawMemoryItem.user_id == user_id)
                 .where(RawMemoryItem.organization_id == organization_id)
                 .where(RawMemoryItem.processed == False)
@@ -435,6 +525,7 @@ class RawMemoryManager:
         with self.session_maker() as session:
             query = (
                 select(RawMemoryItem)
+                .options(*defer_embeddings(RawMemoryItem))
                 .where(RawMemoryItem.user_id == user_id)
                 .where(RawMemoryItem.organization_id == organization_id)
                 .where(RawMemoryItem.source_app == source_app)
@@ -467,7 +558,11 @@ class RawMemoryManager:
             return []
 
         with self.session_maker() as session:
-            query = select(RawMemoryItem).where(RawMemoryItem.id.in_(raw_memory_ids))
+            query = (
+                select(RawMemoryItem)
+                .options(*defer_embeddings(RawMemoryItem))
+                .where(RawMemoryItem.id.in_(raw_memory_ids))
+            )
 
             if user_id:
                 query = query.where(RawMemoryItem.user_id == user_id)
@@ -478,6 +573,67 @@ class RawMemoryManager:
             result = session.execute(query)
             return list(result.scalars().all())
 
+    @enforce_types
+    def get_raw_memory_sources(
+        self,
+        raw_memory_ids: List[str],
+        user_id: Optional[str] = None,
+    ) -> Dict[str, dict]:
+        """
+        Source details of raw memories, for display next to the memories that
+        cite them.
+
+        Only id, source_app, source_url, captured_at and the first
+        RAW_MEMORY_OCR_PREVIEW_LENGTH characters of ocr_text are read, with
+        one IN query for all the ids not in `raw_memory_source_cache`.
+
+        Args:
+            raw_memory_ids: IDs of the raw memory items to resolve
+            user_id: Optional user ID filter
+
+        Returns:
+            Dict of raw memory ID -> {"id", "source_app", "source_url",
+            "captured_at", "ocr_text"}; IDs not found are left out
+        """
+        raw_memory_ids = list(dict.fromkeys(raw_memory_ids))
+        found = raw_memory_source_cache.get_many(raw_memory_ids)
+
+        missing = [raw_memory_id for raw_memory_id in raw_memory_ids if raw_memory_id not in found]
+        if missing:
+            query = select(
+                RawMemoryItem.id,
+                RawMemoryItem.user_id,
+                RawMemoryItem.source_app,
+                RawMemoryItem.source_url,
+                RawMemoryItem.captured_at,
+                func.substr(RawMemoryItem.ocr_text, 1, RAW_MEMORY_OCR_PREVIEW_LENGTH),
+            ).where(RawMemoryItem.id.in_(missing))
+
+            with self.session_maker() as session:
+                rows = session.execute(query).all()
+
+            fetched = {
+                raw_memory_id: (
+                    owner_id,
+                    {
+                        "id": raw_memory_id,
+                        "source_app": source_app,
+                        "source_url": source_url,
+                        "captured_at": captured_at,
+                        "ocr_text": ocr_preview or "",
+                    },
+                )
+                for raw_memory_id, owner_id, source_app, source_url, captured_at, ocr_preview in rows
+            }
+            raw_memory_source_cache.put_many(fetched)
+            found.update(fetched)
+
+        return {
+            raw_memory_id: dict(found[raw_memory_id][1])
+            for raw_memory_id in raw_memory_ids
+            if raw_memory_id in found and (not user_id or found[raw_memory_id][0] == user_id)
+        }
+
     @enforce_types
     def delete_raw_memory(self, raw_memory_id: str) -> bool:
         """
@@ -493,8 +649,11 @@ class RawMemoryManager:
             raw_memory = session.get(RawMemoryItem, raw_memory_id)
 
             if raw_memory:
+                user_id = raw_memory.user_id
                 session.delete(raw_memory)
                 session.commit()
+                raw_memory_source_cache.discard(raw_memory_id)
+                _invalidate_listing_totals([user_id])
                 return True
 
             return False
@@ -529,10 +688,13 @@ class RawMemoryManager:
 
             # Update fields if provided
             if ocr_text is not None:
+                text_changed = ocr_text != raw_memory.ocr_text
                 raw_memory.ocr_text = ocr_text
 
                 # Regenerate embedding if text changed and embeddings are enabled
-                if BUILD_EMBEDDINGS_FOR_MEMORY:
+                if BUILD_EMBEDDINGS_FOR_MEMORY and (
+                    text_changed or raw_memory.ocr_text_embedding is None
+                ):
                     try:
                         # Determine which embedding provider to use
                         from mirix.services.provider_manager import ProviderManager
@@ -559,23 +721,9 @@ class RawMemoryManager:
                         if embedding_config:
                             # Create embedding model instance
                             embed_model = embedding_model(embedding_config)
-                            raw_embedding = embed_model.get_text_embedding(ocr_text)
-                            
-                            # Pad embedding to MAX_EMBEDDING_DIM
-                            import numpy as np
-                            from mirix.constants import MAX_EMBEDDING_DIM
-                            
-                            raw_embedding_np = np.array(raw_embedding)
-                            if len(raw_embedding) < MAX_EMBEDDING_DIM:
-                                raw_memory.ocr_text_embedding = np.pad(
-                                    raw_embedding_np, 
-                                    (0, MAX_EMBEDDING_DIM - len(raw_embedding)), 
-                                    mode="constant"
-                                ).tolist()
-                            else:
-                                raw_memory.ocr_text_embedding = raw_embedding
+                            raw_memory.ocr_text_embedding = embed_model.get_text_embedding(ocr_text)
 
-                            # Update embedding_dim in config to match the actual (padded) embedding length
+                            # Stored at its native dimension; record it in the config
                             embedding_config.embedding_dim = len(raw_memory.ocr_text_embedding)
                             
                             # Use model_dump to ensure all fields are present and correct
@@ -608,6 +756,9 @@ class RawMemoryManager:
 
             session.commit()
             session.refresh(raw_memory)
+            raw_memory_source_cache.discard(raw_memory_id)
+            # a changed ocr_text or source_url moves the item in or out of search listings
+            _invalidate_listing_totals([raw_memory.user_id])
 
             return raw_memory
 
@@ -619,6 +770,7 @@ class RawMemoryManager:
         start_time: datetime,
         end_time: datetime,
         limit: int = 1000,
+        include_ocr_text: bool = True,
     ) -> List[RawMemoryItem]:
         """
         Get raw memory items within a specific time range.
@@ -629,13 +781,20 @@ class RawMemoryManager:
             start_time: Start of the time range
             end_time: End of the time range
             limit: Maximum number of items to return (default: 1000)
+            include_ocr_text: Load ocr_text; callers that only need the
+                timeline (source_app, captured_at) skip it
 
         Returns:
             List of RawMemoryItem instances within the time range
         """
+        deferred = defer_embeddings(RawMemoryItem)
+        if not include_ocr_text:
+            deferred.append(defer(RawMemoryItem.ocr_text))
+
         with self.session_maker() as session:
             query = (
                 select(RawMemoryItem)
+                .options(*deferred)
                 .where(RawMemoryItem.user_id == user_id)
                 .where(RawMemoryItem.organization_id == organization_id)
                 .where(RawMemoryItem.captured_at >= start_time)
@@ -654,6 +813,9 @@ class RawMemoryManager:
         search_query: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
+        search_method: str = "string_match",
+        cursor: Optional[str] = None,
+        exact_total: bool = False,
     ) -> dict:
         """
         List raw memory items with optional search and pagination.
@@ -663,52 +825,91 @@ class RawMemoryManager:
             organization_id: Optional organization ID to filter by
             search_query: Optional search keyword (searches in id, source_app, source_url, ocr_text)
             limit: Maximum number of items to return per page (default: 50)
-            offset: Number of items to skip (for pagination)
+            offset: Number of items to skip (for pagination); ignored when `cursor` is given
+            search_method: 'string_match' (substring match, newest first) or
+                'fts5_match' (SQLite FTS5 keyword match ranked by bm25(); needs
+                user_id and falls back to 'string_match' when unavailable or
+                when paging by cursor)
+            cursor: `next_cursor` of the previous page, pages by (captured_at, id) instead of offset
+            exact_total: Count the matching items even if a recent total is cached
 
         Returns:
             Dictionary containing:
                 - items: List of RawMemoryItem instances
                 - total: Total count of matching items
-                - page: Current page number (1-indexed)
+                - page: Current page number (1-indexed, None when paging by cursor)
                 - pages: Total number of pages
+                - next_cursor: Cursor of the next page, None on the last one
         """
-        from sqlalchemy import func, or_
-
+        search_query = search_query.strip() if search_query else ""
         with self.session_maker() as session:
-            # Build base query
-            query = select(RawMemoryItem)
+            if (
+                search_method == "fts5_match"
+                and search_query
+                and user_id
+                and not cursor
+                and not settings.mirix_pg_uri_no_default
+                and is_fts5_enabled(session.get_bind(), "raw_memory")
+            ):
+                return self._list_raw_memories_fts5(
+                    user_id, organization_id, search_query, limit, offset
+                )
 
-            # Apply filters
+            conditions = []
             if user_id:
-                query = query.where(RawMemoryItem.user_id == user_id)
+                conditions.append(RawMemoryItem.user_id == user_id)
             if organization_id:
-                query = query.where(RawMemoryItem.organization_id == organization_id)
-
-            # Apply search filter
-            if search_query and search_query.strip():
-                search_term = f"%{search_query}%"
-                query = query.where(
-                    or_(
-                        RawMemoryItem.id.ilike(search_term),
-                        RawMemoryItem.source_app.ilike(search_term),
-                        RawMemoryItem.source_url.ilike(search_term),
-                        RawMemoryItem.ocr_text.ilike(search_term),
+                conditions.append(RawMemoryItem.organization_id == organization_id)
+            if search_query:
+                conditions.append(
+                    substring_filter(
+                        session,
+                        RawMemoryItem,
+                        ["id", "source_app", "source_url", "ocr_text"],
+                        search_query,
                     )
                 )
 
-            # Get total count (before pagination)
-            count_query = select(func.count()).select_from(query.subquery())
-            total_count = session.execute(count_query).scalar() or 0
+            return paginate(
+                session,
+                RawMemoryItem,
+                conditions,
+                RawMemoryItem.captured_at,
+                "raw",
+                user_id,
+                limit,
+                offset=offset,
+                cursor=cursor,
+                total_key=(organization_id, search_query),
+                exact_total=exact_total,
+            )
 
-            # Apply ordering and pagination
-            query = query.order_by(RawMemoryItem.captured_at.desc())
-            query = query.limit(limit).offset(offset)
+    def _list_raw_memories_fts5(
+        self,
+        user_id: str,
+        organization_id: Optional[str],
+        search_query: str,
+        limit: int,
+        offset: int,
+    ) -> dict:
+        """Relevance-ranked variant of list_raw_memories backed by raw_memory_fts."""
+        tokens = tokenize_for_search(search_query)
 
-            # Execute query
-            result = session.execute(query)
-            items = list(result.scalars().all())
+        with self.session_maker() as session:
+            ranked_ids = fts5_search(
+                session,
+                RawMemoryItem.__tablename__,
+                tokens,
+                user_id,
+                limit=None,
+                filters={"organization_id": [organization_id]}
+                if organization_id
+                else None,
+            )
+            total_count = len(ranked_ids)
+            page_ids = ranked_ids[offset : offset + limit]
+            items = fetch_items_by_ids(session, RawMemoryItem, page_ids)
 
-            # Calculate pagination metadata
             current_page = (offset // limit) + 1 if limit > 0 else 1
             total_pages = (total_count + limit - 1) // limit if limit > 0 else 1
 
@@ -717,4 +918,5 @@ class RawMemoryManager:
                 "total": total_count,
                 "page": current_page,
                 "pages": total_pages,
+                "next_cursor": None,
             }
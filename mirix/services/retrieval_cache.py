@@ -0,0 +1,133 @@
+"""
+Cache of the memories retrieved for an agent's system prompt.
+
+Every chat turn retrieves the same memory types again, usually with the
+same topic and with no memory written in between. Results are cached per
+(user, memory type, query), where the query holds the search method, the
+normalized topic and whatever else changes the result.
+
+Each entry remembers the write version of its (user, memory type) at the
+time it was fetched. Versions are bumped through the memory change hooks
+on every create, update and delete, so an entry is served only if its
+table has not been written since. Versions live in this process; entries
+also expire after `settings.retrieval_cache_ttl` seconds to bound the
+staleness caused by writes from other processes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from mirix.log import get_logger
+from mirix.services.embedding_cache import normalize_text
+from mirix.services.memory_change_hooks import register_memory_change_listener
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+
+def normalize_topic(topic: Optional[str]) -> str:
+    return normalize_text(topic) if topic else ""
+
+
+class RetrievalCache:
+    """LRU of retrieval results, invalidated by per-user, per-table write versions."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._versions: Dict[Tuple[str, str], int] = {}
+        # key -> (write version, fetched at, value)
+        self._entries: "OrderedDict[tuple, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self._hit_age_total = 0.0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.retrieval_cache_max_entries
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return settings.retrieval_cache_ttl
+
+    def version(self, user_id: str, memory_type: str) -> int:
+        """Current write version; take it before fetching the value to `put`."""
+        return self._versions.get((user_id, memory_type), 0)
+
+    def get(self, user_id: str, memory_type: str, query: Hashable) -> Optional[Any]:
+        if not settings.retrieval_cache:
+            return None
+        key = (user_id, memory_type, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            version, fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if version != self.version(user_id, memory_type):
+                self.stale += 1
+            elif age > self.ttl:
+                self.expired += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._hit_age_total += age
+                return value
+
+            self.misses += 1
+            del self._entries[key]
+            return None
+
+    def put(
+        self, user_id: str, memory_type: str, query: Hashable, value: Any, version: int
+    ) -> None:
+        if not settings.retrieval_cache:
+            return
+        key = (user_id, memory_type, query)
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, memory_type: str) -> None:
+        """Retire the entries of (user, memory type), e.g. after a write the hooks do not see."""
+        with self._lock:
+            key = (user_id, memory_type)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def on_memory_upsert(self, memory_type: str, user_id: str, item) -> None:
+        self.invalidate(user_id, memory_type)
+
+    def on_memory_delete(self, memory_type: str, user_id: str, item_id: str) -> None:
+        self.invalidate(user_id, memory_type)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit, miss and staleness counters since the process started."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                # misses on an entry invalidated by a write, or older than the ttl
+                "stale": self.stale,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_hit_age_seconds": self._hit_age_total / self.hits if self.hits else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+retrieval_cache = RetrievalCache()
+register_memory_change_listener(retrieval_cache)
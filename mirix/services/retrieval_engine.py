@@ -0,0 +1,695 @@
+"""
+One search engine behind the `list_*` methods of every memory manager.
+
+Episodic, semantic, procedural, resource and knowledge vault memory used
+to carry their own copy of each search method. Each manager now declares
+its table once, as a `SearchableMemory`, and `memory_retrieval_engine`
+runs the search:
+
+    embedding     build_query(): pgvector, or the SQLite vector index
+    string_match  lower(field) LIKE '%query%'
+    bm25          PostgreSQL ts_rank_cd over the GIN-indexed tsvectors,
+                  or the SQLite BM25 inverted index (services/bm25_index.py)
+    fts5_match    the SQLite FTS5 tables (orm/sqlite_fts.py)
+    fuzzy_match   services/fuzzy_search.py
+    hybrid        bm25 and embedding side by side, fused by reciprocal rank
+
+Several queries, such as the ";"-separated topics of a turn, are searched
+together: one UNION ALL of per-query top-k statements on PostgreSQL, one
+matrix-matrix product of the SQLite vector index, one pass over the BM25
+index. Their rankings are fused by reciprocal rank.
+
+Registering a memory also registers it with the BM25, vector and
+embedding-matrix registries, which keep their indexes in sync through the
+memory change hooks. The ids ranked by the lexical methods are cached in
+`retrieval_cache` until the table is written, and every search is timed;
+`stats()` reports both.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    String,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    type_coerce,
+    union_all,
+)
+
+from mirix.embeddings import embedding_model
+from mirix.helpers.search_tokenizer import tokenize_for_search
+from mirix.log import get_logger
+from mirix.orm.pg_text_search import PG_TEXT_SEARCH_FIELDS, search_tsvector, tsquery_sql
+from mirix.orm.sqlalchemy_base import defer_embeddings
+from mirix.orm.sqlite_fts import fts5_search, is_fts5_enabled
+from mirix.services.bm25_index import (
+    BM25IndexRegistry,
+    BM25InvertedIndex,
+    bm25_index_registry,
+)
+from mirix.services.embedding_matrix import (
+    EmbeddingMatrixRegistry,
+    embedding_matrix_registry,
+)
+from mirix.services.fuzzy_search import fuzzy_search
+from mirix.services.memory_retrieval import hybrid_search, reciprocal_rank_fusion
+from mirix.services.retrieval_cache import retrieval_cache
+from mirix.services.utils import build_query, fetch_items_by_ids, rank_by_vector_index
+from mirix.services.vector_index import VectorIndexRegistry, vector_index_registry
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+SEARCH_METHODS = (
+    "embedding",
+    "string_match",
+    "bm25",
+    "fts5_match",
+    "fuzzy_match",
+    "hybrid",
+)
+
+
+@dataclass(frozen=True)
+class SearchableMemory:
+    """How one memory table is searched."""
+
+    # key of the memory type in the index registries and the change hooks
+    memory_type: str
+    model: Any
+    # text fields a `search_field` may name
+    search_fields: Tuple[str, ...]
+    # field searched when `search_field` names none (bm25 text, fuzzy_match)
+    default_field: str
+    # field of the vector leg of hybrid when `search_field` has no embedding
+    vector_field: str
+    # columns of the embedding and string_match results
+    result_columns: Tuple[str, ...]
+    # order of the listing returned for an empty query
+    recent_order: Any
+    # fields whose joined text bm25 ranks when `search_field` names none
+    # (default: `default_field` alone)
+    document_fields: Tuple[str, ...] = ()
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+
+def _field_text(item, field: str) -> str:
+    value = getattr(item, field, None)
+    if isinstance(value, list):
+        return " ".join(str(part) for part in value)
+    return str(value) if value else ""
+
+
+def _tsqueries(query_text: str) -> Optional[Tuple[str, str]]:
+    """(AND, OR) tsquery strings of the query; None if it has no usable word."""
+    tsquery_parts = []
+    # the tokenizer's words: a CJK character standing alone is one
+    for word in tokenize_for_search(query_text):
+        escaped_word = (
+            word.replace("'", "''")
+            .replace("&", "")
+            .replace("|", "")
+            .replace("!", "")
+            .replace(":", "")
+        )
+        if len(escaped_word) >= 3:
+            # exact and prefix matches
+            tsquery_parts.append(f"('{escaped_word}' | '{escaped_word}':*)")
+        elif escaped_word:
+            tsquery_parts.append(f"'{escaped_word}'")
+
+    if not tsquery_parts:
+        return None
+    return " & ".join(tsquery_parts), " | ".join(tsquery_parts)
+
+
+def _rankings_by_query(rows, count: int) -> List[List[str]]:
+    """Split (id, query, position) rows of a UNION ALL into one ranking per query."""
+    rankings: List[List[Tuple[int, str]]] = [[] for _ in range(count)]
+    for item_id, number, position in rows:
+        rankings[number].append((position, item_id))
+    return [[item_id for _, item_id in sorted(ranking)] for ranking in rankings]
+
+
+def _fuse(rankings: Sequence[List[str]], limit: Optional[int]) -> List[str]:
+    """One ranking of ids out of the rankings of several queries."""
+    if len(rankings) == 1:
+        return rankings[0][:limit]
+    return reciprocal_rank_fusion(rankings, limit, key=lambda item_id: item_id)
+
+
+class MemoryRetrievalEngine:
+    """
+    Registry of searchable memory types and the search methods over them.
+
+    The index registries default to the process-wide ones kept in sync by the
+    memory change hooks. `build_query` ranks embeddings with those, so an
+    engine given its own vector registries ranks with the `cosine_distance`
+    UDF.
+    """
+
+    def __init__(
+        self,
+        bm25_registry: Optional[BM25IndexRegistry] = None,
+        vector_registry: Optional[VectorIndexRegistry] = None,
+        matrix_registry: Optional[EmbeddingMatrixRegistry] = None,
+    ):
+        self._bm25_registry = bm25_registry or bm25_index_registry
+        self._vector_registry = vector_registry or vector_index_registry
+        self._matrix_registry = matrix_registry or embedding_matrix_registry
+        self._memories: Dict[str, SearchableMemory] = {}
+        self._lock = threading.Lock()
+        # (memory_type, search_method) -> [searches, cached, total seconds, max seconds, results]
+        self._timings: Dict[Tuple[str, str], List[float]] = {}
+        # search method -> backend returning the ranked ids
+        self._rankers: Dict[str, Callable[..., List[str]]] = {
+            "bm25": self._bm25_search,
+            "fts5_match": self._fts5_search,
+            "fuzzy_match": self._fuzzy_search,
+        }
+        # search method -> backend narrowing and ordering the result query
+        self._query_builders: Dict[str, Callable] = {
+            "embedding": self._embedding_search,
+            "string_match": self._string_match_search,
+        }
+
+    def register(self, memory: SearchableMemory) -> None:
+        """Declare a memory table and register it with the index registries."""
+        self._memories[memory.memory_type] = memory
+        self._bm25_registry.register_memory_type(
+            memory.memory_type,
+            memory.model,
+            lambda item, field_key: self.document_tokens(memory, item, field_key),
+        )
+        self._vector_registry.register_memory_type(memory.memory_type, memory.model)
+        self._matrix_registry.register_memory_type(memory.memory_type, memory.model)
+
+    def field_key(self, memory: SearchableMemory, search_field: str) -> str:
+        """Normalize `search_field` to the key of the BM25 index it selects."""
+        return search_field if search_field in memory.search_fields else ""
+
+    def document_tokens(self, memory: SearchableMemory, item, field_key: str) -> List[str]:
+        """Tokens of the text `bm25` ranks an item on (ORM row or Pydantic item)."""
+        fields = (field_key,) if field_key else memory.document_fields or (memory.default_field,)
+        return tokenize_for_search(" ".join(_field_text(item, field) for field in fields))
+
+    def search(
+        self,
+        session_maker,
+        memory_type: str,
+        user_id: str,
+        query: str = "",
+        embedded_text: Optional[List[float]] = None,
+        search_field: str = "",
+        search_method: str = "embedding",
+        limit: Optional[int] = 50,
+        embedding_config=None,
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        queries: Optional[Sequence[str]] = None,
+        embedded_queries: Optional[Sequence[List[float]]] = None,
+    ) -> list:
+        """
+        Pydantic items of `memory_type` of the user matching `query`, best
+        first. `filters` maps columns to the values they may take.
+
+        `queries` searches several non-empty queries (e.g. the topics of a
+        turn) instead of `query`, in one statement or index lookup per
+        table; their rankings are fused by reciprocal rank, so each item
+        appears once. `embedded_queries` are their embeddings, computed in
+        one batch when missing.
+        """
+        memory = self._memories[memory_type]
+        queries = list(queries) if queries else [query]
+        if len(queries) == 1:
+            query = queries[0]
+            if embedded_queries:
+                embedded_text = embedded_queries[0]
+            embedded_queries = None
+        if any(queries) and search_method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method: {search_method}")
+
+        if search_method == "hybrid" and any(queries):
+            vector_field = search_field
+            if not hasattr(memory.model, f"{search_field}_embedding"):
+                vector_field = memory.vector_field
+            arguments = dict(
+                session_maker=session_maker,
+                memory_type=memory_type,
+                user_id=user_id,
+                queries=queries,
+                embedding_config=embedding_config,
+                filters=filters,
+            )
+            return hybrid_search(
+                lambda candidates: self.search(
+                    search_field=search_field,
+                    search_method="bm25",
+                    limit=candidates,
+                    **arguments,
+                ),
+                lambda candidates: self.search(
+                    embedded_text=embedded_text,
+                    search_field=vector_field,
+                    search_method="embedding",
+                    limit=candidates,
+                    embedded_queries=embedded_queries,
+                    **arguments,
+                ),
+                limit,
+            )
+
+        conditions = self._conditions(memory, filters)
+        started = time.perf_counter()
+        cached = False
+        with session_maker() as session:
+            if search_method == "fts5_match" and (
+                settings.mirix_pg_uri_no_default
+                or not is_fts5_enabled(session.get_bind(), memory.table_name)
+            ):
+                # PostgreSQL uses its native full-text search behind 'bm25'
+                search_method = "bm25"
+
+            if not any(queries):
+                statement = (
+                    select(memory.model)
+                    .options(*defer_embeddings(memory.model))
+                    .where(memory.model.user_id == user_id, *conditions)
+                    .order_by(memory.recent_order)
+                )
+                if limit:
+                    statement = statement.limit(limit)
+                rows = session.execute(statement).scalars().all()
+                search_method = "recent"
+
+            elif search_method in self._rankers:
+                ranked_ids, cached = self._ranked_ids(
+                    session, memory, user_id, search_method, queries, search_field, limit, filters
+                )
+                rows = fetch_items_by_ids(session, memory.model, ranked_ids)
+
+            elif search_method == "embedding" and len(queries) > 1:
+                if not embedded_queries:
+                    # every query embedded in one request
+                    embedded_queries = embedding_model(embedding_config).get_text_embeddings(
+                        queries
+                    )
+                rankings = self._embedding_rankings(
+                    session, memory, user_id, embedded_queries, search_field, limit, conditions
+                )
+                rows = fetch_items_by_ids(session, memory.model, _fuse(rankings, limit))
+
+            else:
+                base_query = select(
+                    *(getattr(memory.model, c).label(c) for c in memory.result_columns)
+                ).where(memory.model.user_id == user_id, *conditions)
+                statement = self._query_builders[search_method](
+                    session,
+                    memory,
+                    user_id,
+                    base_query,
+                    queries,
+                    embedded_text,
+                    search_field,
+                    limit,
+                    embedding_config,
+                    bool(conditions),
+                )
+                if limit:
+                    statement = statement.limit(limit)
+                rows = [memory.model(**dict(row._mapping)) for row in session.execute(statement)]
+
+            items = [row.to_pydantic() for row in rows]
+
+        if len(queries) > 1 and search_method != "recent":
+            search_method = f"{search_method}/multi"
+        self._record(memory_type, search_method, time.perf_counter() - started, len(items), cached)
+        return items
+
+    def _conditions(self, memory: SearchableMemory, filters) -> list:
+        return [
+            getattr(memory.model, column).in_(values)
+            for column, values in (filters or {}).items()
+        ]
+
+    def _ranked_ids(
+        self, session, memory, user_id, search_method, queries, search_field, limit, filters
+    ) -> Tuple[List[str], bool]:
+        """
+        Ids ranked by a lexical method, fused over `queries`, and whether they
+        came from `retrieval_cache` (where they stay until the table is written).
+        """
+        cache_key = (
+            "ranked_ids",
+            search_method,
+            search_field,
+            tuple(queries),
+            limit,
+            tuple(sorted((k, tuple(v)) for k, v in (filters or {}).items())),
+        )
+        ranked_ids = retrieval_cache.get(user_id, memory.memory_type, cache_key)
+        if ranked_ids is not None:
+            return ranked_ids, True
+
+        version = retrieval_cache.version(user_id, memory.memory_type)
+        rankings = self._rankers[search_method](
+            session, memory, user_id, queries, search_field, limit, filters
+        )
+        ranked_ids = _fuse(rankings, limit)
+        retrieval_cache.put(user_id, memory.memory_type, cache_key, ranked_ids, version)
+        return ranked_ids, False
+
+    def _embedding_search(
+        self,
+        session,
+        memory,
+        user_id,
+        base_query,
+        queries,
+        embedded_text,
+        search_field,
+        limit,
+        embedding_config,
+        filtered,
+    ):
+        return build_query(
+            base_query=base_query,
+            query_text=queries[0],
+            embedded_text=embedded_text,
+            embed_query=True,
+            embedding_config=embedding_config,
+            search_field=getattr(memory.model, search_field + "_embedding"),
+            target_class=memory.model,
+            session=session,
+            # the vector index cannot apply the filters itself
+            user_id=None if filtered else user_id,
+            limit=limit,
+        )
+
+    def _embedding_rankings(
+        self, session, memory, user_id, embedded_queries, search_field, limit, conditions
+    ) -> List[List[str]]:
+        """
+        Ids closest to each query embedding, closest first: one UNION ALL of
+        per-query top-k statements on PostgreSQL, one matrix-matrix product
+        of the SQLite vector index otherwise.
+        """
+        field = getattr(memory.model, search_field + "_embedding")
+        if settings.mirix_pg_uri_no_default:
+            statements = []
+            for number, embedded_query in enumerate(embedded_queries):
+                distance = field.cosine_distance(embedded_query)
+                statement = select(
+                    memory.model.id,
+                    literal(number).label("query"),
+                    func.row_number()
+                    .over(
+                        order_by=(
+                            distance.asc(),
+                            memory.model.created_at.asc(),
+                            memory.model.id.asc(),
+                        )
+                    )
+                    .label("position"),
+                ).where(
+                    memory.model.user_id == user_id,
+                    func.vector_dims(field) == len(embedded_query),
+                    *conditions,
+                )
+                statement = statement.order_by(
+                    distance.asc(), memory.model.created_at.asc(), memory.model.id.asc()
+                )
+                if limit:
+                    statement = statement.limit(limit)
+                statements.append(select(statement.subquery()))
+            return _rankings_by_query(session.execute(union_all(*statements)), len(embedded_queries))
+
+        if not conditions:
+            rankings = rank_by_vector_index(
+                session, field, embedded_queries, memory.model, user_id, limit
+            )
+            if rankings is not None:
+                return rankings
+
+        # filtered, or no vector index: one ranking statement per query
+        base_query = select(memory.model.id).where(memory.model.user_id == user_id, *conditions)
+        rankings = []
+        for embedded_query in embedded_queries:
+            statement = build_query(
+                base_query=base_query,
+                embedded_text=embedded_query,
+                search_field=field,
+                target_class=memory.model,
+                session=session,
+                user_id=None if conditions else user_id,
+                limit=limit,
+            )
+            if limit:
+                statement = statement.limit(limit)
+            rankings.append(list(session.execute(statement).scalars()))
+        return rankings
+
+    def _string_match_search(
+        self,
+        session,
+        memory,
+        user_id,
+        base_query,
+        queries,
+        embedded_text,
+        search_field,
+        limit,
+        embedding_config,
+        filtered,
+    ):
+        field_text = func.lower(self._text_expression(memory, search_field))
+        return base_query.where(or_(*(field_text.contains(query.lower()) for query in queries)))
+
+    def _text_expression(self, memory: SearchableMemory, field: str):
+        """SQL text of `field`; JSON fields are flattened like their tsvector."""
+        column = getattr(memory.model, field)
+        if isinstance(column.type, String):
+            return column
+        expression = PG_TEXT_SEARCH_FIELDS.get(memory.table_name, {}).get(field)
+        if settings.mirix_pg_uri_no_default and expression:
+            return literal_column(expression)
+        return type_coerce(column, String)
+
+    def _bm25_search(
+        self, session, memory, user_id, queries, search_field, limit, filters
+    ) -> List[List[str]]:
+        conditions = self._conditions(memory, filters)
+        if settings.mirix_pg_uri_no_default:
+            return self._postgresql_fulltext_search(
+                session, memory, user_id, queries, search_field, limit, conditions
+            )
+
+        field_key = self.field_key(memory, search_field)
+        # documents matching no query only pad the ranking of a single one
+        fill = len(queries) == 1
+        if not conditions:
+            # persistent inverted index maintained through the memory change
+            # hooks (see services/bm25_index.py)
+            return [
+                self._bm25_registry.search(
+                    session,
+                    memory.memory_type,
+                    user_id,
+                    field_key,
+                    tokenize_for_search(query),
+                    limit,
+                    fill,
+                )
+                for query in queries
+            ]
+
+        # The per-user index cannot serve a filtered search: BM25 statistics
+        # of the filtered subset differ from the full corpus.
+        index = BM25InvertedIndex()
+        statement = (
+            select(memory.model)
+            .options(*defer_embeddings(memory.model))
+            .where(memory.model.user_id == user_id, *conditions)
+        )
+        for item in session.execute(statement).scalars():
+            index.upsert(item.id, self.document_tokens(memory, item, field_key))
+        return [index.search(tokenize_for_search(query), limit, fill) for query in queries]
+
+    def _postgresql_fulltext_search(
+        self, session, memory, user_id, queries, search_field, limit, conditions
+    ) -> List[List[str]]:
+        """
+        ts_rank_cd over the same tsvector expressions as the GIN indexes (see
+        orm/pg_text_search.py), every query ranked in one UNION ALL
+        statement. All words of a query are required first; the queries that
+        find too few rows that way run again, together, with any word enough.
+        """
+        tsqueries = {
+            number: tsquery
+            for number, tsquery in enumerate(_tsqueries(query) for query in queries)
+            if tsquery is not None
+        }
+        rankings: List[List[str]] = [[] for _ in queries]
+        if not tsqueries:
+            return rankings
+
+        tsvector_sql = search_tsvector(memory.table_name, search_field)
+        try:
+            found = self._fulltext_rankings(
+                session,
+                memory,
+                user_id,
+                tsvector_sql,
+                {number: and_query for number, (and_query, _) in tsqueries.items()},
+                limit,
+                conditions,
+            )
+            too_few = {
+                number: or_query
+                for number, (and_query, or_query) in tsqueries.items()
+                if len(found[number]) < min(limit or 10, 10) and and_query != or_query
+            }
+            if too_few:
+                found.update(
+                    self._fulltext_rankings(
+                        session, memory, user_id, tsvector_sql, too_few, limit, conditions
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"PostgreSQL full-text search failed, falling back to LIKE: {e}")
+            session.rollback()
+            fallback_field = getattr(
+                memory.model, self.field_key(memory, search_field) or memory.default_field
+            )
+            found = {}
+            for number in tsqueries:
+                statement = (
+                    select(memory.model.id)
+                    .where(
+                        memory.model.user_id == user_id,
+                        func.lower(fallback_field).contains(queries[number].lower()),
+                        *conditions,
+                    )
+                    .order_by(memory.model.created_at.desc())
+                )
+                if limit:
+                    statement = statement.limit(limit)
+                found[number] = list(session.execute(statement).scalars())
+
+        for number, ranked_ids in found.items():
+            rankings[number] = ranked_ids
+        return rankings
+
+    def _fulltext_rankings(
+        self, session, memory, user_id, tsvector_sql, tsqueries, limit, conditions
+    ) -> Dict[int, List[str]]:
+        """Ids matching each of `tsqueries` (query number -> tsquery), best first."""
+        statements = []
+        parameters = {}
+        for number, tsquery in tsqueries.items():
+            parameter = f"tsquery_{number}"
+            parameters[parameter] = tsquery
+            query_sql = tsquery_sql(parameter)
+            rank = func.ts_rank_cd(text(tsvector_sql), text(query_sql), 32)
+            order = (rank.desc(), memory.model.created_at.desc())
+            statement = (
+                select(
+                    memory.model.id,
+                    literal(number).label("query"),
+                    func.row_number().over(order_by=order).label("position"),
+                )
+                .where(
+                    memory.model.user_id == user_id,
+                    text(f"{tsvector_sql} @@ {query_sql}"),
+                    *conditions,
+                )
+                .order_by(*order)
+                .limit(limit or 50)
+            )
+            statements.append(select(statement.subquery()))
+
+        rankings = _rankings_by_query(
+            session.execute(union_all(*statements), parameters), max(tsqueries) + 1
+        )
+        return {number: rankings[number] for number in tsqueries}
+
+    def _fts5_search(
+        self, session, memory, user_id, queries, search_field, limit, filters
+    ) -> List[List[str]]:
+        # ranked entirely inside SQLite by the FTS5 shadow table
+        return [
+            fts5_search(
+                session,
+                memory.table_name,
+                tokenize_for_search(query),
+                user_id,
+                search_field=search_field,
+                limit=limit,
+                filters=filters,
+            )
+            for query in queries
+        ]
+
+    def _fuzzy_search(
+        self, session, memory, user_id, queries, search_field, limit, filters
+    ) -> List[List[str]]:
+        field = search_field if search_field in memory.search_fields else memory.default_field
+        return [
+            fuzzy_search(
+                session,
+                memory.model,
+                field,
+                query,
+                limit,
+                memory.model.user_id == user_id,
+                *self._conditions(memory, filters),
+            )
+            for query in queries
+        ]
+
+    def _record(
+        self, memory_type: str, search_method: str, seconds: float, results: int, cached: bool
+    ) -> None:
+        logger.debug(
+            f"{search_method} search of {memory_type} memory: {results} results "
+            f"in {seconds * 1000:.1f} ms{' (cached ranking)' if cached else ''}"
+        )
+        with self._lock:
+            timing = self._timings.setdefault((memory_type, search_method), [0, 0, 0.0, 0.0, 0])
+            timing[0] += 1
+            timing[1] += cached
+            timing[2] += seconds
+            timing[3] = max(timing[3], seconds)
+            timing[4] += results
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per "memory_type/search_method": searches, cached rankings, latencies and results."""
+        with self._lock:
+            return {
+                f"{memory_type}/{search_method}": {
+                    "searches": searches,
+                    "cached_rankings": cached,
+                    "mean_ms": total / searches * 1000,
+                    "max_ms": longest * 1000,
+                    "mean_results": results / searches,
+                }
+                for (memory_type, search_method), (
+                    searches,
+                    cached,
+                    total,
+                    longest,
+                    results,
+                ) in self._timings.items()
+            }
+
+
+memory_retrieval_engine = MemoryRetrievalEngine()
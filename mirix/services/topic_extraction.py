@@ -0,0 +1,193 @@
+"""
+Local extraction of the retrieval topic from a user's recent messages.
+
+The default `llm` extractor asks the agent's model for the topic with a
+forced `update_topic` tool call, which costs a full LLM round-trip before
+memory retrieval can start. The `local` extractor instead ranks key
+phrases RAKE-style: candidate phrases are runs of content words between
+stopwords and punctuation, each word scores its degree over frequency,
+weighted by its idf in the user's memories. The idf comes from the BM25
+indexes that are already loaded, so extraction never touches the DB.
+
+Chinese and Japanese text has no spaces: runs of CJK characters are split
+at common function characters and scored on character bigrams.
+
+Agents pick an extractor through `metadata_["topic_extractor"]`, falling
+back to `settings.topic_extractor`. Either way the topics come back joined
+by ";"; `split_topics` turns them into the queries of one multi-topic
+retrieval.
+"""
+
+import json
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from mirix.helpers.search_tokenizer import CJK_RANGES
+
+TOPIC_EXTRACTORS = ("llm", "local")
+
+# Longest phrase kept, in words (or CJK characters)
+MAX_PHRASE_WORDS = 4
+MAX_CJK_PHRASE_CHARS = 8
+
+# Later messages weigh more: each older message counts this much less
+RECENCY_DECAY = 0.5
+
+_CJK = CJK_RANGES
+_CJK_RE = re.compile(f"[{_CJK}]")
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+(?:['’\-][^\W_{_CJK}]+)*")
+# Anything else between two tokens (other than whitespace) ends a phrase
+_BREAK_RE = re.compile(r"[^\s]")
+
+# Common function characters split a CJK run into phrases
+_CJK_STOP_RE = re.compile(
+    "[的了是在我你他她它们和与及也就都而着吗呢吧啊呀哦这那有个想要请把被给对从到为以会能可"
+    "をはがのにでともへやからまでよりですますかなね]+"
+)
+
+STOPWORDS = frozenset(
+    """
+    a about above after again against all also am an and any are aren't as at
+    be because been before being below between both but by can can't cannot
+    could couldn't did didn't do does doesn't doing don't down during each few
+    for from further get gets got had hadn't has hasn't have haven't having he
+    her here hers herself him himself his how i i'm i've if in into is isn't it
+    it's its itself just let let's like me more most much my myself need no nor
+    not now of off on once only or other ought our ours ourselves out over own
+    please same she should shouldn't so some such than that that's the their
+    theirs them themselves then there there's these they they're this those
+    through to too under until up us very want was wasn't we we're were weren't
+    what what's when where which while who whom why will with won't would
+    wouldn't yes yet you you're your yours yourself yourselves tell know think
+    show help thanks thank hi hello hey okay ok sure maybe really something
+    anything everything one two make made use using used way thing things
+    """.split()
+)
+
+
+def _unwrap(text: str) -> str:
+    """The user text inside a packaged `{"type": "user_message", ...}` message."""
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            packaged = json.loads(stripped)
+        except ValueError:
+            return text
+        if isinstance(packaged, dict) and isinstance(packaged.get("message"), str):
+            return packaged["message"]
+    return text
+
+
+def _cjk_phrases(run: str) -> List[Tuple[str, List[str]]]:
+    """Split a CJK run at function characters; score each piece on its bigrams."""
+    phrases = []
+    for piece in _CJK_STOP_RE.split(run):
+        for start in range(0, len(piece), MAX_CJK_PHRASE_CHARS):
+            chunk = piece[start : start + MAX_CJK_PHRASE_CHARS]
+            if len(chunk) >= 2:
+                bigrams = [chunk[i : i + 2] for i in range(len(chunk) - 1)]
+                phrases.append((chunk, bigrams))
+    return phrases
+
+
+def candidate_phrases(text: str) -> List[Tuple[str, List[str]]]:
+    """(phrase, words) candidates of `text`, in order of appearance."""
+    phrases = []
+    current: List[str] = []
+
+    def close():
+        for start in range(0, len(current), MAX_PHRASE_WORDS):
+            words = current[start : start + MAX_PHRASE_WORDS]
+            phrases.append((" ".join(words), words))
+        current.clear()
+
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        if _BREAK_RE.search(text, position, match.start()):
+            close()
+        position = match.end()
+
+        token = match.group()
+        if _CJK_RE.match(token):
+            close()
+            phrases.extend(_cjk_phrases(token))
+            continue
+
+        word = token.lower()
+        if word in STOPWORDS or len(word) < 2 or word.isdigit():
+            close()
+        else:
+            current.append(word)
+    close()
+    return phrases
+
+
+def _idf(user_id: Optional[str], words: Sequence[str]) -> Dict[str, float]:
+    """Smoothed idf of each word in the user's memories, 1.0 without statistics."""
+    if user_id is None:
+        return dict.fromkeys(words, 1.0)
+
+    from mirix.services.bm25_index import bm25_index_registry
+
+    frequencies, corpus_size = bm25_index_registry.document_frequencies(user_id, words)
+    if not corpus_size:
+        return dict.fromkeys(words, 1.0)
+    return {
+        word: math.log((corpus_size + 1) / (frequency + 1)) + 1
+        for word, frequency in frequencies.items()
+    }
+
+
+def extract_topics(
+    texts: Sequence[str], user_id: Optional[str] = None, max_topics: int = 5
+) -> Optional[str]:
+    """
+    Key phrases of `texts` (oldest first), best first and separated by ";"
+    like the topics of the `llm` extractor. None if nothing qualifies.
+    """
+    phrase_weights: Dict[str, float] = defaultdict(float)
+    phrase_words: Dict[str, List[str]] = {}
+    word_frequency: Dict[str, int] = defaultdict(int)
+    word_degree: Dict[str, int] = defaultdict(int)
+
+    for age, text in enumerate(reversed(texts)):
+        weight = RECENCY_DECAY**age
+        for phrase, words in candidate_phrases(_unwrap(text or "")):
+            phrase_weights[phrase] += weight
+            phrase_words[phrase] = words
+            for word in words:
+                word_frequency[word] += 1
+                word_degree[word] += len(words)
+
+    if not phrase_weights:
+        return None
+
+    idf = _idf(user_id, list(word_frequency))
+    word_scores = {
+        word: word_degree[word] / word_frequency[word] * idf[word]
+        for word in word_frequency
+    }
+    ranked = sorted(
+        phrase_weights,
+        key=lambda phrase: -phrase_weights[phrase]
+        * sum(word_scores[word] for word in phrase_words[phrase]),
+    )
+
+    topics = []
+    for phrase in ranked:
+        # a phrase already covered by a better one adds nothing to retrieval
+        if any(phrase in topic for topic in topics):
+            continue
+        topics.append(phrase)
+        if len(topics) == max_topics:
+            break
+    return "; ".join(topics)
+
+
+def split_topics(topics: Optional[str]) -> List[str]:
+    """The distinct non-empty topics of a ";"-separated topic string, in order."""
+    if not topics:
+        return []
+    return list(dict.fromkeys(topic.strip() for topic in topics.split(";") if topic.strip()))
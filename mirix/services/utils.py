@@ -1,16 +1,24 @@
 from functools import wraps
 from typing import List, Optional
 
-import numpy as np
 import pytz
-from sqlalchemy import func
+from sqlalchemy import case, func, literal_column, or_, select
 
-from mirix.constants import (
-    MAX_EMBEDDING_DIM,
-)
 from mirix.embeddings import embedding_model
+from mirix.orm.sqlite_fts import (
+    TRIGRAM_MIN_LENGTH,
+    TRIGRAM_TABLES,
+    is_trigram_enabled,
+    trigram_rowids,
+)
+from mirix.orm.sqlalchemy_base import defer_embeddings
 from mirix.orm.sqlite_functions import adapt_array
 from mirix.schemas.embedding_config import EmbeddingConfig
+from mirix.services.embedding_matrix import embedding_matrix_registry
+from mirix.services.vector_index import (
+    VECTOR_INDEX_RERANK_FACTOR,
+    vector_index_registry,
+)
 from mirix.settings import settings
 
 
@@ -23,9 +31,17 @@ def build_query(
     embedding_config: Optional[EmbeddingConfig] = None,
     ascending: bool = True,
     target_class: object = None,
+    session=None,
+    user_id: Optional[str] = None,
+    limit: Optional[int] = None,
 ):
     """
     Build a query based on the query text
+
+    On SQLite, passing `session`, `user_id` and `limit` lets the ranking come
+    from the in-process vector index (services/vector_index.py) or embedding
+    matrix (services/embedding_matrix.py) instead of evaluating the
+    `cosine_distance` UDF on every row of the user.
     """
 
     if embed_query:
@@ -39,16 +55,16 @@ def build_query(
             embedded_text = embedding_model(embedding_config).get_text_embedding(
                 query_text
             )
-            embedded_text = np.array(embedded_text)
-            embedded_text = np.pad(
-                embedded_text,
-                (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]),
-                mode="constant",
-            ).tolist()
 
     main_query = base_query.order_by(None)
 
     if embedded_text:
+        # Embeddings are stored at the native dimension of their model; only
+        # those of the same dimension as the query are comparable to it
+        main_query = main_query.where(
+            func.vector_dims(search_field) == len(embedded_text)
+        )
+
         # Check which database type we're using
         if settings.mirix_pg_uri_no_default:
             # PostgreSQL with pgvector - use direct cosine_distance method
@@ -64,6 +80,23 @@ def build_query(
                     target_class.created_at.desc(),
                     target_class.id.asc(),
                 )
+        elif (
+            settings.sqlite_vector_index
+            and session is not None
+            and user_id is not None
+            and limit
+            and _vector_search_registry().memory_type_for(target_class) is not None
+        ):
+            main_query = _order_by_vector_index(
+                main_query,
+                session,
+                search_field,
+                embedded_text,
+                target_class,
+                user_id,
+                limit,
+                ascending,
+            )
         else:
             # SQLite with custom vector type
             query_embedding_binary = adapt_array(embedded_text)
@@ -88,6 +121,144 @@ def build_query(
     return main_query
 
 
+def _vector_search_registry():
+    # quantized codes live next to the float32 rows of the embedding matrix
+    if (
+        settings.sqlite_vector_index_backend == "matrix"
+        or settings.sqlite_vector_index_quantization != "none"
+    ):
+        return embedding_matrix_registry
+    return vector_index_registry
+
+
+def _order_by_vector_index(
+    main_query,
+    session,
+    search_field,
+    embedded_text: List[float],
+    target_class,
+    user_id: str,
+    limit: int,
+    ascending: bool,
+):
+    """
+    Restrict `main_query` to the nearest neighbours found by the vector index.
+
+    With `sqlite_vector_index_exact_rerank`, more candidates than needed are
+    taken from the index and ordered by the exact `cosine_distance` UDF, which
+    costs a handful of UDF calls instead of one per row of the user.
+    """
+    registry = _vector_search_registry()
+    # the embedding matrix ranks with its float32 rows already
+    exact_rerank = (
+        settings.sqlite_vector_index_exact_rerank and registry is vector_index_registry
+    )
+    candidates = registry.search(
+        session,
+        registry.memory_type_for(target_class),
+        user_id,
+        search_field.key,
+        embedded_text,
+        limit * VECTOR_INDEX_RERANK_FACTOR if exact_rerank else limit,
+        nprobe=settings.sqlite_vector_index_nprobe,
+    )
+    candidate_ids = [doc_id for doc_id, _ in candidates]
+    main_query = main_query.where(target_class.id.in_(candidate_ids))
+    if not candidate_ids:
+        return main_query
+
+    if exact_rerank:
+        distance = func.cosine_distance(search_field, adapt_array(embedded_text))
+    else:
+        distance = case(
+            {doc_id: rank for rank, doc_id in enumerate(candidate_ids)},
+            value=target_class.id,
+        )
+    created_at = target_class.created_at.asc() if ascending else target_class.created_at.desc()
+    return main_query.order_by(distance.asc(), created_at, target_class.id.asc())
+
+
+def rank_by_vector_index(
+    session,
+    search_field,
+    embedded_texts: List[List[float]],
+    target_class,
+    user_id: str,
+    limit: Optional[int],
+) -> Optional[List[List[str]]]:
+    """
+    Ids of the nearest neighbours of each of `embedded_texts`, closest first,
+    from one batched search of the SQLite vector index. None when
+    `build_query` would not use the index either.
+    """
+    registry = _vector_search_registry()
+    memory_type = registry.memory_type_for(target_class)
+    if not (settings.sqlite_vector_index and limit and memory_type is not None):
+        return None
+
+    rankings = registry.search_many(
+        session,
+        memory_type,
+        user_id,
+        search_field.key,
+        embedded_texts,
+        limit,
+        nprobe=settings.sqlite_vector_index_nprobe,
+    )
+    return [[doc_id for doc_id, _ in ranking] for ranking in rankings]
+
+
+def fetch_items_by_ids(session, target_class, ids: List[str], *conditions) -> list:
+    """
+    Load ORM rows for `ids` and return them in the same order as `ids`.
+
+    Used by the search paths that rank ids outside of the main query (FTS5,
+    in-process indexes). Ids that no longer exist or fail `conditions` are
+    dropped. The embedding columns are not loaded.
+    """
+    if not ids:
+        return []
+
+    query = (
+        select(target_class)
+        .options(*defer_embeddings(target_class))
+        .where(target_class.id.in_(ids))
+    )
+    for condition in conditions:
+        query = query.where(condition)
+
+    rows = {row.id: row for row in session.execute(query).scalars().all()}
+    return [rows[item_id] for item_id in ids if item_id in rows]
+
+
+def substring_filter(session, target_class, columns: List[str], search_query: str):
+    """
+    Condition matching rows with `search_query` in any of `columns`,
+    case-insensitively - the `ilike '%term%'` of the paginated listings.
+
+    On SQLite, terms of TRIGRAM_MIN_LENGTH characters or more are looked up
+    in the FTS5 trigram table of the base table (orm/sqlite_fts.py) instead
+    of scanning every row, when the database of `session` has one. Terms
+    containing LIKE wildcards keep the `ilike` so the results do not change.
+    On PostgreSQL the `ilike` itself is served by the pg_trgm indexes
+    (orm/pg_text_search.py).
+    """
+    table_name = target_class.__tablename__
+    if (
+        not settings.mirix_pg_uri_no_default
+        and is_trigram_enabled(session.get_bind(), table_name)
+        and TRIGRAM_TABLES.get(table_name) == list(columns)
+        and len(search_query) >= TRIGRAM_MIN_LENGTH
+        and not any(wildcard in search_query for wildcard in "%_")
+    ):
+        return literal_column(f"{table_name}.rowid").in_(
+            trigram_rowids(table_name, search_query)
+        )
+
+    search_term = f"%{search_query}%"
+    return or_(*(getattr(target_class, column).ilike(search_term) for column in columns))
+
+
 def update_timezone(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -0,0 +1,536 @@
+"""
+In-process approximate nearest neighbour indexes for SQLite embedding search.
+
+PostgreSQL ranks embeddings with pgvector. On SQLite, ordering by the
+`cosine_distance` UDF decodes and normalizes every stored vector of the user
+in Python on every query. Instead, each (user, memory type, embedding column)
+gets an IVF index of L2-normalized float32 vectors:
+
+- Below `BRUTE_FORCE_MAX_VECTORS` vectors the index is a single list that is
+  scanned exactly with one matrix-vector product.
+- Above it, the vectors are clustered with spherical k-means into ~sqrt(n)
+  inverted lists, and a query only scans the `nprobe` lists whose centroids
+  are closest to it. Lists are retrained when the index doubles or halves,
+  on a background thread: searches keep using the current lists until the
+  retrained index, with the changes made in the meantime, replaces them.
+
+New and updated memories are added incrementally through the memory change
+hooks; the index is persisted like the BM25 indexes (see index_registry.py).
+"""
+
+import atexit
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from mirix.log import get_logger
+from mirix.services.index_registry import (
+    IndexKey,
+    PersistentIndexRegistry,
+    get_index_executor,
+)
+from mirix.services.memory_change_hooks import register_memory_change_listener
+
+logger = get_logger(__name__)
+
+# Up to this many vectors, a query scans everything (exact and still fast)
+BRUTE_FORCE_MAX_VECTORS = 20000
+
+# Number of inverted lists scanned per query once the index is clustered
+DEFAULT_NPROBE = 16
+
+# Candidates fetched per requested result when results are re-ranked exactly
+VECTOR_INDEX_RERANK_FACTOR = 4
+
+KMEANS_ITERATIONS = 8
+KMEANS_MAX_TRAINING_VECTORS = 50000
+
+# Rows scored per matrix product while assigning vectors to centroids
+_ASSIGN_CHUNK_SIZE = 16384
+
+# Thread clustering the vector indexes that grew or shrank
+INDEX_TRAIN_POOL = "index-train"
+
+
+def as_unit_vector(vector) -> Optional[np.ndarray]:
+    """Float32 copy of `vector` scaled to unit length, or None if unusable."""
+    if vector is None:
+        return None
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    if not vector.size or not np.isfinite(norm) or norm == 0:
+        return None
+    return vector / norm
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK_SIZE):
+        chunk = vectors[start : start + _ASSIGN_CHUNK_SIZE]
+        assignment[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _spherical_kmeans(
+    vectors: np.ndarray, nlist: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity; returns unit centroids."""
+    if len(vectors) > KMEANS_MAX_TRAINING_VECTORS:
+        sample = rng.choice(len(vectors), KMEANS_MAX_TRAINING_VECTORS, replace=False)
+        vectors = vectors[sample]
+
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = _nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=nlist)
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # re-seed clusters that lost all their members
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def top_k_by_similarity(
+    scores: np.ndarray, ids: Sequence[Optional[str]], k: int
+) -> List[Tuple[str, float]]:
+    """The `k` best (id, cosine distance) pairs for cosine `scores` of `ids`."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(ids[i], float(1.0 - scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+class _InvertedList:
+    """Growable contiguous block of vectors and their ids."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, doc_id: str, vector: np.ndarray) -> int:
+        position = len(self.ids)
+        if position == len(self.vectors):
+            grown = np.empty((2 * len(self.vectors), self.vectors.shape[1]), np.float32)
+            grown[:position] = self.vectors
+            self.vectors = grown
+        self.vectors[position] = vector
+        self.ids.append(doc_id)
+        return position
+
+    def pop(self, position: int) -> Optional[str]:
+        """Remove the entry at `position`; returns the id moved into its slot."""
+        last = len(self.ids) - 1
+        moved = None
+        if position != last:
+            self.vectors[position] = self.vectors[last]
+            self.ids[position] = self.ids[last]
+            moved = self.ids[position]
+        self.ids.pop()
+        return moved
+
+    def active(self) -> np.ndarray:
+        return self.vectors[: len(self.ids)]
+
+
+class IVFVectorIndex:
+    """Inverted-file index over unit vectors, searched by cosine distance."""
+
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[_InvertedList] = [_InvertedList(dim)]
+        self.locations: Dict[str, Tuple[int, int]] = {}
+        self.trained_size = 0
+        self._rng = np.random.default_rng(seed)
+        # (id, unit vector or None for a removal) while a retrained copy is built
+        self._changes: Optional[List[Tuple[str, Optional[np.ndarray]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.locations
+
+    def upsert(self, doc_id: str, vector) -> None:
+        """Add or replace the vector of `doc_id`; unusable vectors remove it."""
+        self.remove(doc_id)
+        unit = as_unit_vector(vector)
+        if unit is None or unit.shape[0] != self.dim:
+            return
+
+        list_no = 0
+        if self.centroids is not None:
+            list_no = int(np.argmax(self.centroids @ unit))
+        position = self.lists[list_no].append(doc_id, unit)
+        self.locations[doc_id] = (list_no, position)
+        if self._changes is not None:
+            self._changes.append((doc_id, unit))
+
+    def remove(self, doc_id: str) -> None:
+        location = self.locations.pop(doc_id, None)
+        if location is None:
+            return
+        if self._changes is not None:
+            self._changes.append((doc_id, None))
+        list_no, position = location
+        moved = self.lists[list_no].pop(position)
+        if moved is not None:
+            self.locations[moved] = (list_no, position)
+
+    def needs_training(self) -> bool:
+        size = len(self)
+        if self.centroids is None:
+            return size > BRUTE_FORCE_MAX_VECTORS
+        return size > 2 * self.trained_size or size < self.trained_size // 2
+
+    def train(self) -> None:
+        """(Re)cluster all vectors into ~sqrt(n) inverted lists."""
+        self._train(*self.snapshot())
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray]:
+        """Copy of the ids and vectors, to train a replacement from."""
+        ids: List[str] = []
+        for inverted_list in self.lists:
+            ids.extend(inverted_list.ids)
+        vectors = np.concatenate([inverted_list.active() for inverted_list in self.lists])
+        return ids, vectors
+
+    def record_changes(self) -> None:
+        """Keep the upserts and removals from now on, for `replay`."""
+        self._changes = []
+
+    def take_changes(self) -> List[Tuple[str, Optional[np.ndarray]]]:
+        changes, self._changes = self._changes or [], None
+        return changes
+
+    def replay(self, changes: List[Tuple[str, Optional[np.ndarray]]]) -> None:
+        for doc_id, unit in changes:
+            if unit is None:
+                self.remove(doc_id)
+            else:
+                self.upsert(doc_id, unit)
+
+    @classmethod
+    def trained(
+        cls, dim: int, ids: List[str], vectors: np.ndarray
+    ) -> "IVFVectorIndex":
+        """A new index of `ids` and `vectors`, clustered."""
+        index = cls(dim)
+        index._train(ids, vectors)
+        return index
+
+    def _train(self, ids: List[str], vectors: np.ndarray) -> None:
+        if len(ids) <= BRUTE_FORCE_MAX_VECTORS:
+            self.centroids = None
+            nlist = 1
+            assignment = np.zeros(len(ids), dtype=np.int64)
+        else:
+            nlist = int(np.sqrt(len(ids)))
+            self.centroids = _spherical_kmeans(vectors, nlist, self._rng)
+            assignment = _nearest_centroids(vectors, self.centroids)
+
+        self._fill_lists(ids, vectors, assignment, nlist)
+        self.trained_size = len(ids)
+
+    def _fill_lists(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        assignment: np.ndarray,
+        nlist: int,
+    ) -> None:
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist))))
+        self.lists = []
+        self.locations = {}
+        for list_no in range(nlist):
+            members = order[bounds[list_no] : bounds[list_no + 1]]
+            inverted_list = _InvertedList(self.dim, max(64, len(members)))
+            inverted_list.vectors[: len(members)] = vectors[members]
+            inverted_list.ids = [ids[i] for i in members]
+            for position, doc_id in enumerate(inverted_list.ids):
+                self.locations[doc_id] = (list_no, position)
+            self.lists.append(inverted_list)
+
+    def search(
+        self, query, k: int, nprobe: int = DEFAULT_NPROBE
+    ) -> List[Tuple[str, float]]:
+        """Return up to `k` (id, cosine distance) pairs, closest first."""
+        unit = as_unit_vector(query)
+        if unit is None or unit.shape[0] != self.dim or k <= 0 or not len(self):
+            return []
+
+        if self.centroids is None:
+            probed = [0]
+        else:
+            centroid_scores = self.centroids @ unit
+            nprobe = min(nprobe, len(centroid_scores))
+            probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        scores = []
+        ids: List[str] = []
+        for list_no in probed:
+            inverted_list = self.lists[list_no]
+            if len(inverted_list):
+                scores.append(inverted_list.active() @ unit)
+                ids.extend(inverted_list.ids)
+        if not ids:
+            return []
+
+        return top_k_by_similarity(np.concatenate(scores), ids, k)
+
+    def search_many(
+        self, queries: Sequence, k: int, nprobe: int = DEFAULT_NPROBE
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        `search` for several queries with one matrix-matrix product. Every
+        list probed by any query is scored against all of them, so each
+        query sees at least the lists it would probe on its own.
+        """
+        results: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        units = [as_unit_vector(query) for query in queries]
+        usable = [
+            i for i, unit in enumerate(units) if unit is not None and unit.shape[0] == self.dim
+        ]
+        if not usable or k <= 0 or not len(self):
+            return results
+        unit_matrix = np.stack([units[i] for i in usable], axis=1)
+
+        if self.centroids is None:
+            probed = [0]
+        else:
+            centroid_scores = self.centroids @ unit_matrix
+            nprobe = min(nprobe, len(centroid_scores))
+            probed = np.unique(
+                np.argpartition(-centroid_scores, nprobe - 1, axis=0)[:nprobe]
+            )
+
+        scores = []
+        ids: List[str] = []
+        for list_no in probed:
+            inverted_list = self.lists[list_no]
+            if len(inverted_list):
+                scores.append(inverted_list.active() @ unit_matrix)
+                ids.extend(inverted_list.ids)
+        if not ids:
+            return results
+
+        scores = np.concatenate(scores)
+        for column, i in enumerate(usable):
+            results[i] = top_k_by_similarity(scores[:, column], ids, k)
+        return results
+
+    def to_state(self) -> dict:
+        ids: List[str] = []
+        list_sizes = []
+        blocks = []
+        for inverted_list in self.lists:
+            ids.extend(inverted_list.ids)
+            list_sizes.append(len(inverted_list))
+            blocks.append(inverted_list.active())
+        return {
+            "dim": self.dim,
+            "centroids": self.centroids,
+            "trained_size": self.trained_size,
+            "ids": ids,
+            "list_sizes": list_sizes,
+            "vectors": np.concatenate(blocks),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "IVFVectorIndex":
+        index = cls(state["dim"])
+        index.centroids = state["centroids"]
+        index.trained_size = state["trained_size"]
+        list_sizes = np.asarray(state["list_sizes"], dtype=np.int64)
+        assignment = np.repeat(np.arange(len(list_sizes)), list_sizes)
+        index._fill_lists(state["ids"], state["vectors"], assignment, len(list_sizes))
+        return index
+
+
+class VectorIndexRegistry(PersistentIndexRegistry):
+    """
+    Owns every vector index of the process.
+
+    Embeddings are stored at the native dimension of their model, so a
+    column can hold vectors of several dimensions. Indexes are keyed by
+    (user_id, memory_type, "<embedding column>@<dim>") and each one only
+    holds the vectors of that dimension. They are built from the DB on
+    first use.
+    """
+
+    kind = "ivf"
+    format_version = 2
+
+    def __init__(self, storage_root: Optional[str] = None):
+        super().__init__(storage_root)
+        self._memory_types: Dict[type, str] = {}
+        self._training: Dict[IndexKey, Future] = {}
+
+    def register_memory_type(self, memory_type: str, model_class) -> None:
+        """Enable vector indexes for the embedding columns of `model_class`."""
+        self._models[memory_type] = model_class
+        self._memory_types[model_class] = memory_type
+
+    def memory_type_for(self, model_class) -> Optional[str]:
+        return self._memory_types.get(model_class)
+
+    @staticmethod
+    def _split_field(field_key: str) -> Tuple[str, int]:
+        column, dim = field_key.rsplit("@", 1)
+        return column, int(dim)
+
+    def _new_index(self, key, dim: int) -> IVFVectorIndex:
+        return IVFVectorIndex(dim)
+
+    def _build(self, session, key) -> IVFVectorIndex:
+        user_id, memory_type, field_key = key
+        column, dim = self._split_field(field_key)
+        model_class = self._models[memory_type]
+        rows = session.execute(
+            select(model_class.id, getattr(model_class, column)).where(
+                model_class.user_id == user_id,
+                getattr(model_class, column).isnot(None),
+            )
+        )
+
+        index = self._new_index(key, dim)
+        for doc_id, vector in rows:
+            if len(vector) == dim:
+                index.upsert(doc_id, vector)
+        logger.info(
+            f"Built {self.kind} vector index for {memory_type}.{column} ({dim}d) of user {user_id} ({len(index)} vectors)"
+        )
+        return index
+
+    def _before_search(self, key, index: IVFVectorIndex) -> None:
+        """Retrain `index` in the background once it outgrew its lists."""
+        training = self._training.get(key)
+        if training is not None and not training.done():
+            return
+        if not index.needs_training():
+            return
+        ids, vectors = index.snapshot()
+        index.record_changes()
+        try:
+            self._training[key] = get_index_executor(INDEX_TRAIN_POOL).submit(
+                self._retrain, key, index, ids, vectors
+            )
+        except RuntimeError:
+            # interpreter shutting down
+            index.take_changes()
+
+    def _retrain(self, key, index: IVFVectorIndex, ids, vectors) -> None:
+        """Cluster a copy of `index`, then swap it in with the changes since."""
+        user_id, memory_type, field_key = key
+        logger.info(
+            f"Clustering vector index for {memory_type}.{field_key} of user {user_id} ({len(ids)} vectors)"
+        )
+        try:
+            trained = IVFVectorIndex.trained(index.dim, ids, vectors)
+        except Exception as e:
+            logger.warning(
+                f"Could not cluster vector index for {memory_type}.{field_key}: {e}"
+            )
+            trained = None
+        with self._key_lock(key):
+            changes = index.take_changes()
+            if trained is None:
+                return
+            trained.replay(changes)
+            with self._lock:
+                self._indexes[key] = trained
+            self._mark_dirty(key)
+
+    def _index_to_state(self, index: IVFVectorIndex) -> dict:
+        return index.to_state()
+
+    def _index_from_state(self, state: dict) -> IVFVectorIndex:
+        return IVFVectorIndex.from_state(state)
+
+    def search(
+        self,
+        session,
+        memory_type: str,
+        user_id: str,
+        column: str,
+        query_vector,
+        k: int,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> List[Tuple[str, float]]:
+        """Return up to `k` (id, cosine distance) pairs, closest first."""
+        key = (user_id, memory_type, f"{column}@{len(query_vector)}")
+        with self._key_lock(key):
+            index = self._get_index(session, key)
+            self._before_search(key, index)
+            result = index.search(query_vector, k, nprobe)
+            self._maybe_flush(session, key)
+            return result
+
+    def search_many(
+        self,
+        session,
+        memory_type: str,
+        user_id: str,
+        column: str,
+        query_vectors: Sequence,
+        k: int,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> List[List[Tuple[str, float]]]:
+        """`search` for several query vectors of the same dimension at once."""
+        if not query_vectors:
+            return []
+        key = (user_id, memory_type, f"{column}@{len(query_vectors[0])}")
+        with self._key_lock(key):
+            index = self._get_index(session, key)
+            self._before_search(key, index)
+            result = index.search_many(query_vectors, k, nprobe)
+            self._maybe_flush(session, key)
+            return result
+
+    # MemoryChangeListener
+
+    def on_memory_upsert(self, memory_type: str, user_id: str, item) -> None:
+        for key, index in self._loaded_indexes(memory_type, user_id):
+            column, dim = self._split_field(key[2])
+            vector = getattr(item, column, None)
+            if vector is not None and len(vector) == dim:
+                index.upsert(item.id, vector)
+            elif item.id in index:
+                # no embedding, or one of another dimension
+                index.remove(item.id)
+            else:
+                continue
+            self._mark_dirty(key)
+
+    def on_memory_delete(self, memory_type: str, user_id: str, item_id: str) -> None:
+        for key, index in self._loaded_indexes(memory_type, user_id):
+            if item_id in index:
+                index.remove(item_id)
+                self._mark_dirty(key)
+
+
+vector_index_registry = VectorIndexRegistry()
+register_memory_change_listener(vector_index_registry)
+
+
+@atexit.register
+def _flush_vector_indexes() -> None:
+    try:
+        vector_index_registry.flush()
+    except Exception as e:
+        logger.warning(f"Could not flush vector indexes on exit: {e}")
@@ -143,6 +143,47 @@ class Settings(BaseSettings):
     pg_pool_recycle: int = 1800  # When to recycle connections
     pg_echo: bool = False  # Logging
 
+    # in-process vector index for SQLite embedding search
+    sqlite_vector_index: bool = True
+    sqlite_vector_index_backend: str = "ivf"  # "ivf" (approximate) or "matrix" (exact)
+    sqlite_vector_index_nprobe: int = 16  # inverted lists scanned per query
+    sqlite_vector_index_exact_rerank: bool = False
+    # "int8" or "binary" codes scanned before an exact rerank; uses the matrix backend
+    sqlite_vector_index_quantization: str = "none"
+
+    # content-addressed embedding cache (services/embedding_cache.py)
+    embedding_cache: bool = True
+    embedding_cache_memory_entries: int = 4096
+    embedding_cache_disk_entries: int = 100000
+
+    # concurrent per-memory-type retrieval for the system prompt (agent/agent.py)
+    memory_retrieval_workers: int = 8
+    memory_retrieval_timeout: float = 10.0  # seconds per memory type
+    # search method of the system prompt's retrieval: "bm25", "embedding" or "hybrid"
+    memory_search_method: str = "bm25"
+    # candidates taken from each of the lexical and vector legs of "hybrid" search
+    hybrid_search_max_candidates: int = 100
+    # results of the search_in_memory tool per memory type, and of its merged "all" search
+    search_in_memory_limit: int = 10
+    search_in_memory_all_limit: int = 50
+
+    # retrieved memories reused across turns until their table is written (services/retrieval_cache.py)
+    retrieval_cache: bool = True
+    retrieval_cache_max_entries: int = 1024
+    retrieval_cache_ttl: float = 300.0  # seconds
+    # source details of cited raw memories shown next to memories (RawMemoryManager.get_raw_memory_sources)
+    raw_memory_source_cache_max_entries: int = 4096
+    raw_memory_source_cache_ttl: float = 60.0  # seconds; 0 disables the cache
+    # totals of the /memory/* listings reused until their table is written (services/pagination.py)
+    memory_listing_total_ttl: float = 60.0  # seconds
+
+    # "llm" or "local" topic extraction before memory retrieval (services/topic_extraction.py);
+    # an agent overrides it with metadata_["topic_extractor"]
+    topic_extractor: str = "llm"
+
+    # threads scoring the fuzzy_match search (services/fuzzy_search.py); -1 uses every core
+    fuzzy_match_workers: int = -1
+
     # multi agent settings
     multi_agent_send_message_max_retries: int = 3
     multi_agent_send_message_timeout: int = 20 * 60
@@ -162,6 +203,8 @@ class Settings(BaseSettings):
 
     # event loop parallelism
     event_loop_threadpool_max_workers: int = 43
+    # threads running the blocking database calls of the FastAPI endpoints (server/db_executor.py)
+    db_executor_workers: int = 16
 
     # experimental toggle
     use_experimental: bool = False
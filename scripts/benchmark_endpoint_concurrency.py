@@ -0,0 +1,147 @@
+"""
+Measure how memory browsing load affects chat streaming on a running server.
+
+Probes the server alone, then again while `--browsers` clients page through
+the /memory/* endpoints as fast as they can. A probe is a round of /health
+requests, which answer straight from the event loop, and, with `--message`,
+one /send_streaming_message chat whose SSE events are timed. Blocking
+database work on the event loop shows up as the load raising the /health
+latency and the gaps between streamed events.
+
+Usage:
+    python scripts/benchmark_endpoint_concurrency.py
+        [--url http://localhost:47283] [--browsers 32] [--probes 50]
+        [--message "What did I work on yesterday?"]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+
+MEMORY_ENDPOINTS = (
+    "/memory/episodic",
+    "/memory/semantic",
+    "/memory/procedural",
+    "/memory/resources",
+    "/memory/raw",
+)
+
+
+def summarize(name, latencies):
+    if not latencies:
+        return f"  {name}: no samples"
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"  {name}: p50 {statistics.median(ordered) * 1000:.1f} ms, "
+        f"p95 {p95 * 1000:.1f} ms, max {ordered[-1] * 1000:.1f} ms ({len(ordered)} samples)"
+    )
+
+
+async def probe_health(client, probes):
+    latencies = []
+    for _ in range(probes):
+        start = time.perf_counter()
+        (await client.get("/health")).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+async def probe_chat(client, message):
+    """Time to the first SSE event and the gaps between the following ones."""
+    gaps = []
+    first_event = None
+    start = last = time.perf_counter()
+    async with client.stream(
+        "POST", "/send_streaming_message", json={"message": message}, timeout=None
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            now = time.perf_counter()
+            if first_event is None:
+                first_event = now - start
+            else:
+                gaps.append(now - last)
+            last = now
+            if json.loads(line[len("data: "):]).get("type") in ("final", "error"):
+                break
+    return first_event, gaps
+
+
+async def browse(client, stop, stats):
+    """Page through the memory listings with their cursors until stopped."""
+    cursors = {}
+    while not stop.is_set():
+        for endpoint in MEMORY_ENDPOINTS:
+            params = {"limit": 50}
+            if cursors.get(endpoint):
+                params["cursor"] = cursors[endpoint]
+            start = time.perf_counter()
+            try:
+                response = await client.get(endpoint, params=params)
+                body = response.json()
+            except (httpx.HTTPError, ValueError):
+                stats["errors"] += 1
+                continue
+            stats["latencies"].append(time.perf_counter() - start)
+            cursors[endpoint] = body.get("next_cursor") if isinstance(body, dict) else None
+
+
+async def probe(client, args, label):
+    print(f"{label}:")
+    health, chat = await asyncio.gather(
+        probe_health(client, args.probes),
+        probe_chat(client, args.message) if args.message else asyncio.sleep(0),
+    )
+    print(summarize("/health", health))
+    if chat:
+        first_event, gaps = chat
+        print(f"  chat: first event after {first_event * 1000:.1f} ms")
+        print(summarize("chat event gaps", gaps))
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.browsers + 8)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        await probe(client, args, "Idle")
+
+        stop = asyncio.Event()
+        stats = {"latencies": [], "errors": 0}
+        browsers = [asyncio.create_task(browse(client, stop, stats)) for _ in range(args.browsers)]
+        await asyncio.sleep(1)  # let the load ramp up
+        started = time.perf_counter()
+        try:
+            await probe(client, args, f"Under load ({args.browsers} memory browsers)")
+        finally:
+            stop.set()
+            await asyncio.gather(*browsers)
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"Browsing: {len(stats['latencies']) / elapsed:.1f} requests/s, "
+            f"{stats['errors']} errors"
+        )
+        print(summarize("/memory/*", stats["latencies"]))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:47283")
+    parser.add_argument("--browsers", type=int, default=32)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--message", help="chat message to stream during each probe")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
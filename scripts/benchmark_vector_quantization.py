@@ -0,0 +1,115 @@
+"""
+Measure the recall and speed of quantized embedding search on real data.
+
+Loads the embeddings of one column from sqlite.db, holds out some of them
+as queries, and compares the `int8` and `binary` quantizations of the
+embedding matrix (MIRIX_SQLITE_VECTOR_INDEX_QUANTIZATION) against exact
+float32 search.
+
+Usage:
+    python scripts/benchmark_vector_quantization.py
+        [--db ~/.mirix/sqlite.db] [--table raw_memory]
+        [--column ocr_text_embedding] [--user-id USER] [--queries 100] [-k 10]
+"""
+
+import argparse
+import collections
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mirix.helpers.vector_codec import decode_vector
+from mirix.services.embedding_matrix import QUANTIZATIONS, EmbeddingMatrix
+
+
+def load_vectors(db_path, table, column, user_id=None):
+    """Embeddings of `table.column` with the most common dimension."""
+    query = f'SELECT id, "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL'
+    params = ()
+    if user_id:
+        query += " AND user_id = ?"
+        params = (user_id,)
+
+    conn = sqlite3.connect(db_path)
+    by_dim = collections.defaultdict(dict)
+    for doc_id, data in conn.execute(query, params):
+        vector = decode_vector(data)
+        if vector is not None and np.any(vector):
+            by_dim[len(vector)][doc_id] = vector
+    conn.close()
+    if not by_dim:
+        return {}
+    return max(by_dim.values(), key=len)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="path to sqlite.db (default: Mirix config)")
+    parser.add_argument("--table", default="raw_memory")
+    parser.add_argument("--column", default="ocr_text_embedding")
+    parser.add_argument("--user-id")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.db:
+        db_path = os.path.expanduser(args.db)
+    else:
+        from mirix.config import MirixConfig
+
+        db_path = os.path.join(MirixConfig.load().recall_storage_path, "sqlite.db")
+
+    vectors = load_vectors(db_path, args.table, args.column, args.user_id)
+    if len(vectors) <= args.queries:
+        print(f"Not enough embeddings in {args.table}.{args.column} ({len(vectors)})")
+        return 1
+
+    rng = np.random.default_rng(0)
+    ids = list(vectors)
+    held_out = set(rng.choice(len(ids), size=args.queries, replace=False).tolist())
+    queries = [vectors[ids[i]] for i in sorted(held_out)]
+    corpus = [(ids[i], vectors[ids[i]]) for i in range(len(ids)) if i not in held_out]
+    dim = len(queries[0])
+    print(
+        f"{args.table}.{args.column}: {len(corpus)} vectors of dimension {dim}, "
+        f"{len(queries)} held-out queries, k={args.k}"
+    )
+
+    exact = None
+    with tempfile.TemporaryDirectory() as directory:
+        for quantization in QUANTIZATIONS:
+            matrix = EmbeddingMatrix.create(
+                os.path.join(directory, quantization), dim, quantization
+            )
+            for doc_id, vector in corpus:
+                matrix.upsert(doc_id, vector)
+
+            start = time.perf_counter()
+            results = [
+                {doc_id for doc_id, _ in matrix.search(query, args.k)} for query in queries
+            ]
+            latency = (time.perf_counter() - start) / len(queries) * 1000
+            if exact is None:
+                exact = results
+            recall = np.mean(
+                [len(a & b) / max(len(a), 1) for a, b in zip(exact, results)]
+            )
+
+            scanned = dim * 4 if matrix.code_dtype is None else matrix.code_dtype.itemsize
+            print(
+                f"  {quantization:>6}: recall@{args.k} {recall:.3f}, "
+                f"{latency:.2f} ms/query, {scanned} bytes scanned per vector "
+                f"({dim * 4 / scanned:.1f}x less than float32)"
+            )
+            matrix.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
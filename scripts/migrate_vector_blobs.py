@@ -0,0 +1,134 @@
+"""
+Rewrite stored embeddings into the current storage format:
+
+- SQLite: raw float32 with a header (mirix.helpers.vector_codec) instead of
+  the legacy base64 encoding;
+- SQLite and PostgreSQL: the native dimension of the embedding model instead
+  of zero-padding to MAX_EMBEDDING_DIM. On PostgreSQL the `vector(1536)`
+  columns are first relaxed to `vector`, which is a metadata-only change.
+
+The padding is found from `embedding_config.embedding_dim` when it is
+consistent with the stored vector, and from the run of trailing zeros
+otherwise (rounded up to a multiple of 64, like every common model size).
+
+The server runs the same migration at startup (mirix/orm/vector_migration.py);
+this script runs it by hand, and can count the rows to check or VACUUM the
+database afterwards. It is online and safe to interrupt and run again.
+
+Usage:
+    python scripts/migrate_vector_blobs.py [--db ~/.mirix/sqlite.db]
+        [--batch-size 500] [--dry-run] [--vacuum]
+    python scripts/migrate_vector_blobs.py --postgres [--batch-size 500]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mirix.orm.sqlite_functions import register_functions
+from mirix.orm.vector_migration import (
+    count_candidates,
+    count_pg_candidates,
+    find_pg_vector_columns,
+    find_vector_columns,
+    migrate_pg_vectors,
+    migrate_sqlite_vectors,
+)
+
+
+def default_db_path():
+    from mirix.config import MirixConfig
+
+    return os.path.join(MirixConfig.load().recall_storage_path, "sqlite.db")
+
+
+def connect_sqlite(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    # the server's SQL functions: vector_dims, and mirix_cjk_segment which the
+    # FTS5 triggers call on every UPDATE of a memory table
+    register_functions(conn, None)
+    return conn
+
+
+def migrate_sqlite(args):
+    db_path = os.path.expanduser(args.db or default_db_path())
+    if not os.path.exists(db_path):
+        print(f"No database at {db_path}")
+        return 1
+
+    conn = connect_sqlite(db_path)
+
+    print(f"Migrating vector columns of {db_path}")
+    if args.dry_run:
+        for table, column, _ in find_vector_columns(conn):
+            count = count_candidates(conn, table, column)
+            print(f"  {table}.{column}: {count} rows to check")
+    else:
+        for table, column, converted, unreadable in migrate_sqlite_vectors(
+            conn, args.batch_size
+        ):
+            message = f"  {table}.{column}: {converted} rows converted"
+            if unreadable:
+                message += f", {unreadable} unreadable rows left unchanged"
+            print(message)
+
+    if args.vacuum and not args.dry_run:
+        print("Running VACUUM...")
+        conn.execute("VACUUM")
+    conn.close()
+    return 0
+
+
+def migrate_postgres(args):
+    from sqlalchemy import create_engine
+
+    from mirix.settings import settings
+
+    engine = create_engine(settings.mirix_pg_uri)
+    print(f"Migrating vector columns of {settings.mirix_pg_uri}")
+    with engine.connect() as connection:
+        if args.dry_run:
+            for table, column, _, _ in find_pg_vector_columns(connection):
+                count = count_pg_candidates(connection, table, column)
+                print(f"  {table}.{column}: {count} rows to check")
+            return 0
+        for table, column, converted, _ in migrate_pg_vectors(
+            connection, args.batch_size
+        ):
+            print(f"  {table}.{column}: {converted} rows converted")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="path to sqlite.db (default: Mirix config)")
+    parser.add_argument(
+        "--postgres",
+        action="store_true",
+        help="migrate the PostgreSQL database of MIRIX_PG_URI instead",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the rows to check"
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="VACUUM afterwards to return the freed space (locks the database)",
+    )
+    args = parser.parse_args()
+
+    start = time.time()
+    status = migrate_postgres(args) if args.postgres else migrate_sqlite(args)
+    print(f"Done in {time.time() - start:.1f}s")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
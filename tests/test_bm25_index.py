@@ -0,0 +1,86 @@
+"""
+Tests for the incremental BM25 inverted index used by the SQLite `bm25`
+search method.
+
+The index must rank exactly like rebuilding `rank_bm25.BM25Okapi` over the
+current documents, including after updates and deletes and after a round
+trip through its persisted state.
+
+Usage:
+    pytest tests/test_bm25_index.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from rank_bm25 import BM25Okapi
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.bm25_index import BM25InvertedIndex
+
+VOCABULARY = [
+    "meeting", "project", "deadline", "python", "sqlite", "search",
+    "memory", "coffee", "review", "design", "budget", "travel",
+]
+
+
+def _legacy_ranking(documents, query_tokens, limit):
+    """The ranking the managers computed before the index existed."""
+    ids = [doc_id for doc_id, tokens in documents.items() if tokens]
+    if not ids:
+        return []
+    if not query_tokens:
+        return ids[:limit]
+    scores = BM25Okapi([documents[doc_id] for doc_id in ids]).get_scores(query_tokens)
+    scored = list(zip(scores, ids))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [doc_id for _, doc_id in scored[:limit]]
+
+
+def _random_tokens(rng):
+    return [rng.choice(VOCABULARY) for _ in range(rng.randint(0, 8))]
+
+
+def test_matches_bm25okapi_under_updates():
+    rng = random.Random(7)
+
+    for _ in range(50):
+        index = BM25InvertedIndex()
+        documents = {}
+
+        for step in range(40):
+            action = rng.random()
+            if action < 0.6 or not documents:
+                doc_id = f"doc-{step}"
+                documents[doc_id] = _random_tokens(rng)
+                index.upsert(doc_id, documents[doc_id])
+            elif action < 0.8:
+                doc_id = rng.choice(list(documents))
+                documents[doc_id] = _random_tokens(rng)
+                index.upsert(doc_id, documents[doc_id])
+            else:
+                doc_id = rng.choice(list(documents))
+                del documents[doc_id]
+                index.remove(doc_id)
+
+        if rng.random() < 0.5:
+            index = BM25InvertedIndex.from_state(index.to_state())
+
+        query = [rng.choice(VOCABULARY + ["unknown"]) for _ in range(rng.randint(0, 3))]
+        limit = rng.randint(1, 15)
+        assert index.search(query, limit) == _legacy_ranking(documents, query, limit)
+
+
+def test_empty_documents_are_not_ranked():
+    index = BM25InvertedIndex()
+    index.upsert("a", [])
+    assert index.search(["memory"], 10) == []
+    assert index.row_count == 1
+
+    index.upsert("a", ["memory"])
+    index.upsert("b", ["coffee"])
+    assert index.search(["memory"], 10) == ["a", "b"]
+    assert index.row_count == 2
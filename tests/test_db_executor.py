@@ -0,0 +1,54 @@
+"""
+Tests for the thread pool running the blocking database calls of the
+FastAPI endpoints.
+
+Usage:
+    pytest tests/test_db_executor.py
+"""
+
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.server.db_executor import DB_POOL, run_db
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_calls_run_on_the_pool_with_the_request_context():
+    def call(a, b=0):
+        return threading.current_thread().name, request_id.get(), a + b
+
+    async def main():
+        request_id.set("req-1")
+        return await run_db(call, 1, b=2)
+
+    thread_name, seen_request_id, result = asyncio.run(main())
+    assert thread_name.startswith(DB_POOL)
+    assert seen_request_id == "req-1"
+    assert result == 3
+
+
+def test_blocking_calls_leave_the_event_loop_free():
+    async def main():
+        gaps = []
+
+        async def tick():
+            last = time.monotonic()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+
+        await asyncio.gather(tick(), *(run_db(time.sleep, 0.2) for _ in range(4)))
+        return max(gaps)
+
+    # a single sleep on the loop itself would leave a 0.2 s gap
+    assert asyncio.run(main()) < 0.1
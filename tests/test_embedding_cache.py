@@ -0,0 +1,116 @@
+"""
+Tests for the content-addressed embedding cache.
+
+Usage:
+    pytest tests/test_embedding_cache.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.embedding_cache import (
+    CachedEmbeddingModel,
+    EmbeddingCache,
+    embedding_cache_key,
+)
+
+
+class CountingModel:
+    dimension = 4
+
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+
+    def get_text_embedding(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0, 2.0, 3.0]
+
+    def get_text_embeddings(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 2.0, 3.0] for text in texts]
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / "embedding_cache.db")
+    model = CountingModel()
+    cached = CachedEmbeddingModel(
+        model, "openai", "text-embedding-3-small", EmbeddingCache(path, 2, 100)
+    )
+
+    first = cached.get_text_embedding("hello  world")
+    # same normalized text: no second API call
+    assert cached.get_text_embedding(" hello world\n") == first
+    assert model.calls == 1
+    assert cached.dimension == 4
+
+    # a new process only has the disk tier
+    restarted = CachedEmbeddingModel(
+        model, "openai", "text-embedding-3-small", EmbeddingCache(path, 2, 100)
+    )
+    assert np.allclose(restarted.get_text_embedding("hello world"), first)
+    assert model.calls == 1
+    assert restarted._cache.stats()["disk_hits"] == 1
+
+    # other models do not share entries
+    other = CachedEmbeddingModel(model, "openai", "other-model", EmbeddingCache(path))
+    other.get_text_embedding("hello world")
+    assert model.calls == 2
+
+
+def test_lru_eviction_and_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), memory_entries=2)
+    keys = [embedding_cache_key("openai", "m", text) for text in ("a", "b", "c")]
+    for key in keys:
+        cache.put(key, [1.0, 0.0])
+
+    assert cache.get(keys[2]) == [1.0, 0.0]
+    assert cache.get(keys[0]) == [1.0, 0.0]  # evicted from memory, found on disk
+    assert cache.get(embedding_cache_key("openai", "m", "d")) is None
+    assert cache.stats() == {
+        "memory_hits": 1,
+        "disk_hits": 1,
+        "misses": 1,
+        "hit_rate": 2 / 3,
+        "memory_entries": 2,
+    }
+
+
+def test_batch_only_sends_misses_once(tmp_path):
+    model = CountingModel()
+    cached = CachedEmbeddingModel(
+        model, "openai", "text-embedding-3-small", EmbeddingCache(str(tmp_path / "c.db"))
+    )
+    cached.get_text_embedding("cached")
+
+    texts = ["a", "cached", "bb", "a ", "ccc"]
+    embeddings = cached.get_text_embeddings(texts)
+    assert [e[0] for e in embeddings] == [1.0, 6.0, 2.0, 1.0, 3.0]
+    # one request, without the cached text or the duplicate
+    assert model.batches == [["a", "bb", "ccc"]]
+
+    assert cached.get_text_embeddings(["bb", "ccc"]) == embeddings[2:5:2]
+    assert cached.get_text_embeddings([]) == []
+    assert len(model.batches) == 1
+
+
+def test_embedding_clients_are_memoized():
+    from mirix.embeddings import clear_embedding_models, embedding_model
+    from mirix.schemas.embedding_config import EmbeddingConfig
+
+    config = EmbeddingConfig(
+        embedding_endpoint_type="hugging-face",
+        embedding_endpoint="http://localhost:8080",
+        embedding_model="BAAI/bge-large-en-v1.5",
+        embedding_dim=1024,
+    )
+    model = embedding_model(config)
+    assert embedding_model(config.model_copy()) is model
+
+    clear_embedding_models()
+    assert embedding_model(config) is not model
@@ -0,0 +1,107 @@
+"""
+Tests for the memory-mapped embedding matrix used by the `matrix` backend
+of SQLite embedding search.
+
+Usage:
+    pytest tests/test_embedding_matrix.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.embedding_matrix import INITIAL_CAPACITY, EmbeddingMatrix
+
+
+def _exact_top_k(vectors, query, k):
+    ids = list(vectors)
+    matrix = np.array([vectors[doc_id] for doc_id in ids])
+    similarities = matrix @ query / np.linalg.norm(matrix, axis=1)
+    return [ids[i] for i in np.argsort(-similarities)[:k]]
+
+
+def test_exact_under_updates_and_reopen(tmp_path):
+    rng = np.random.default_rng(0)
+    prefix = str(tmp_path / "episodic__summary_embedding")
+    matrix = EmbeddingMatrix.create(prefix, 16)
+    vectors = {}
+
+    # enough inserts to grow the memmap past its initial capacity
+    for step in range(3 * INITIAL_CAPACITY):
+        action = rng.random()
+        if action < 0.6 or not vectors:
+            doc_id = f"doc-{step}"
+        else:
+            doc_id = list(vectors)[rng.integers(len(vectors))]
+        if action < 0.85:
+            vectors[doc_id] = rng.normal(size=16)
+            matrix.upsert(doc_id, vectors[doc_id])
+        else:
+            del vectors[doc_id]
+            matrix.remove(doc_id)
+
+    query = rng.normal(size=16)
+    expected = _exact_top_k(vectors, query, 10)
+    assert [doc_id for doc_id, _ in matrix.search(query, 10)] == expected
+
+    matrix.flush(1, (len(vectors), "now"))
+    row_count = len(matrix.ids)
+    matrix.close()
+    reopened = EmbeddingMatrix.open(prefix, 16, row_count)
+    assert len(reopened) == len(vectors)
+    assert [doc_id for doc_id, _ in reopened.search(query, 10)] == expected
+
+    compacted = reopened.compact()
+    assert len(compacted.ids) == len(vectors)
+    assert [doc_id for doc_id, _ in compacted.search(query, 10)] == expected
+
+
+def test_unusable_vectors_are_not_stored(tmp_path):
+    matrix = EmbeddingMatrix.create(str(tmp_path / "m"), 4)
+    matrix.upsert("none", None)
+    matrix.upsert("zero", [0, 0, 0, 0])
+    matrix.upsert("wrong-dim", [1, 2, 3])
+    assert len(matrix) == 0
+
+    matrix.upsert("a", [1, 0, 0, 0])
+    matrix.upsert("a", None)
+    assert "a" not in matrix
+    assert matrix.search([1, 0, 0, 0], 5) == []
+
+
+@pytest.mark.parametrize("quantization, min_recall", [("int8", 0.95), ("binary", 0.85)])
+def test_quantized_search_recall(tmp_path, quantization, min_recall):
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(50, 256))
+    vectors = {
+        f"doc-{i}": centers[rng.integers(50)] + rng.normal(scale=0.8, size=256)
+        for i in range(3000)
+    }
+
+    prefix = str(tmp_path / quantization)
+    matrix = EmbeddingMatrix.create(prefix, 256, quantization)
+    for doc_id, vector in vectors.items():
+        matrix.upsert(doc_id, vector)
+    for doc_id in list(vectors)[::10]:
+        del vectors[doc_id]
+        matrix.remove(doc_id)
+
+    queries = [centers[rng.integers(50)] + rng.normal(scale=0.8, size=256) for _ in range(20)]
+    results = [[doc_id for doc_id, _ in matrix.search(query, 10)] for query in queries]
+    hits = sum(
+        len(set(_exact_top_k(vectors, query, 10)) & set(result))
+        for query, result in zip(queries, results)
+    )
+    assert hits / 200 >= min_recall
+
+    # codes written for another setting are rebuilt from the float32 rows
+    matrix.flush(1, (len(vectors), "now"))
+    row_count = len(matrix.ids)
+    matrix.close()
+    reopened = EmbeddingMatrix.open(prefix, 256, row_count, quantization, codes_current=False)
+    assert [[doc_id for doc_id, _ in reopened.search(query, 10)] for query in queries] == results
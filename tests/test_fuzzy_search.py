@@ -0,0 +1,119 @@
+"""
+Tests for the `fuzzy_match` search: the candidates pruned through the
+trigram tables must rank exactly like scoring every row.
+
+Usage:
+    pytest tests/test_fuzzy_search.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from rapidfuzz import fuzz
+from sqlalchemy import Column, String, create_engine, event
+from sqlalchemy.orm import Session, declarative_base
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import mirix.orm.sqlite_functions  # noqa: F401  (registers mirix_cjk_segment)
+from mirix.orm import sqlite_fts
+from mirix.services.fuzzy_search import _non_candidate_bound, fuzzy_search
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "episodic_memory"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+    summary = Column(String)
+    details = Column(String)
+    event_type = Column(String)
+    actor = Column(String)
+
+
+def _engine(tmp_path, summaries):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuzzy.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Event(id=f"ep-{i}", user_id="u", summary=summary)
+            for i, summary in enumerate(summaries)
+        )
+        session.add(Event(id="other", user_id="v", summary=summaries[0]))
+        session.commit()
+    assert sqlite_fts.ensure_fts5_tables(engine)
+    assert sqlite_fts.is_trigram_enabled(engine, "episodic_memory")
+    return engine
+
+
+def _brute_force(session, query, limit):
+    events = session.query(Event).filter(Event.user_id == "u").all()
+    scored = [
+        (fuzz.partial_ratio(query.lower(), (event.summary or "").lower()), event.id)
+        for event in events
+    ]
+    scored.sort(key=lambda pair: -pair[0])
+    return scored[:limit]
+
+
+def test_pruned_ranking_matches_full_scoring(tmp_path):
+    rng = random.Random(7)
+    words = ["meeting", "budget", "kyoto", "trip", "python", "build", "lunch", "Q3"]
+    summaries = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(1, 6))) for _ in range(200)
+    ]
+    summaries += ["", None, "ab", "Budget review with finance"]
+    engine = _engine(tmp_path, summaries)
+
+    with Session(engine) as session:
+        for query in ["budget", "Kyoto trp", "pyhton bild", "zzz", "ab", "b", ""]:
+            for limit in [1, 5, 50, None]:
+                ranked = fuzzy_search(
+                    session, Event, "summary", query, limit, Event.user_id == "u"
+                )
+                expected = _brute_force(session, query, limit)
+                scores = {
+                    item_id: score
+                    for score, item_id in _brute_force(session, query, None)
+                }
+                # same length and same scores in the same order; ids may only
+                # differ among rows of equal score
+                assert [scores[item_id] for item_id in ranked] == [
+                    score for score, _ in expected
+                ], (query, limit)
+                assert "other" not in ranked
+
+
+def test_strong_candidates_skip_the_other_rows(tmp_path):
+    summaries = ["weekly budget meeting", "budget for the kyoto trip"]
+    summaries += [f"unrelated note number {i}" for i in range(50)]
+    engine = _engine(tmp_path, summaries)
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    with Session(engine) as session:
+        ranked = fuzzy_search(session, Event, "summary", "budget", 2, Event.user_id == "u")
+
+    assert ranked == ["ep-0", "ep-1"]
+    # one query, for the candidates only
+    assert len(statements) == 1
+    assert "NOT" not in statements[0]
+
+
+def test_bound_is_above_texts_without_a_common_trigram():
+    rng = random.Random(3)
+    for _ in range(20000):
+        query = "".join(rng.choice("abc") for _ in range(rng.randint(3, 8)))
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(len(query), 12)))
+        query_grams = {query[i : i + 3] for i in range(len(query) - 2)}
+        if any(text[i : i + 3] in query_grams for i in range(len(text) - 2)):
+            continue
+        assert fuzz.partial_ratio(query, text) <= _non_candidate_bound(len(query)) + 1e-6
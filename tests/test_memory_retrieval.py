@@ -0,0 +1,116 @@
+"""
+Tests for concurrent retrieval across memory types and hybrid search.
+
+Usage:
+    pytest tests/test_memory_retrieval.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.memory_retrieval import (
+    fetch_concurrently,
+    hybrid_search,
+    reciprocal_rank_fusion,
+)
+
+
+def _sleep_then(seconds, value):
+    def fetch():
+        time.sleep(seconds)
+        return value
+
+    return fetch
+
+
+def test_fetches_overlap_and_keep_order():
+    start = time.monotonic()
+    results = fetch_concurrently(
+        {name: _sleep_then(0.2, name) for name in ("core", "episodic", "semantic")},
+        timeout=5,
+    )
+    assert list(results.items()) == [
+        ("core", "core"),
+        ("episodic", "episodic"),
+        ("semantic", "semantic"),
+    ]
+    assert time.monotonic() - start < 0.5
+
+
+def test_failures_and_timeouts_are_left_out():
+    def broken():
+        raise RuntimeError("database is locked")
+
+    results = fetch_concurrently(
+        {
+            "core": _sleep_then(0, "core"),
+            "episodic": broken,
+            "semantic": _sleep_then(1, "late"),
+        },
+        timeout=0.2,
+    )
+    assert results == {"core": "core"}
+
+
+def test_nested_fetches_run_inline():
+    def outer():
+        return fetch_concurrently(
+            {"a": threading.current_thread, "b": threading.current_thread}
+        )
+
+    results = fetch_concurrently({"x": outer, "y": _sleep_then(0, None)}, timeout=5)
+    inner = results["x"]
+    assert inner["a"] is inner["b"]
+
+
+class _Item:
+    def __init__(self, id):
+        self.id = id
+
+
+def _ids(items):
+    return [item.id for item in items]
+
+
+def test_rank_fusion_favours_items_found_by_both():
+    lexical = [_Item(i) for i in ("a", "b", "c")]
+    vector = [_Item(i) for i in ("c", "d", "a")]
+    assert _ids(reciprocal_rank_fusion([lexical, vector])) == ["a", "c", "b", "d"]
+    assert _ids(reciprocal_rank_fusion([lexical, vector], limit=2)) == ["a", "c"]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_rank_fusion_interleaves_disjoint_rankings():
+    # e.g. the per-memory-type results of search_in_memory("all")
+    episodic = [{"memory_type": "episodic", "id": i} for i in ("x", "y", "z")]
+    semantic = [{"memory_type": "semantic", "id": i} for i in ("x", "w")]
+    fused = reciprocal_rank_fusion(
+        [episodic, semantic], limit=4, key=lambda r: (r["memory_type"], r["id"])
+    )
+    assert [(r["memory_type"][0], r["id"]) for r in fused] == [
+        ("e", "x"),
+        ("s", "x"),
+        ("e", "y"),
+        ("s", "w"),
+    ]
+
+
+def test_hybrid_search_caps_legs_and_survives_a_failing_leg():
+    requested = []
+
+    def lexical(candidates):
+        requested.append(candidates)
+        return [_Item(f"doc-{i}") for i in range(candidates)]
+
+    def vector(candidates):
+        requested.append(candidates)
+        raise RuntimeError("agent has no embedding config")
+
+    results = hybrid_search(lexical, vector, limit=3)
+    assert _ids(results) == ["doc-0", "doc-1", "doc-2"]
+    assert requested == [3, 3]
@@ -0,0 +1,96 @@
+"""
+Tests for the migration of stored vectors (mirix/orm/vector_migration.py and
+scripts/migrate_vector_blobs.py) on a SQLite database set up by the server,
+with its FTS5 tables and triggers.
+
+Usage:
+    pytest tests/test_migrate_vector_blobs.py
+"""
+
+import base64
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import mirix.orm.sqlite_functions  # noqa: F401  (registers mirix_cjk_segment)
+from mirix.helpers.vector_codec import decode_vector, is_encoded_vector
+from mirix.orm.sqlite_fts import ensure_fts5_tables
+from mirix.orm.vector_migration import ensure_native_vectors, migrate_column
+
+spec = importlib.util.spec_from_file_location(
+    "migrate_vector_blobs", project_root / "scripts" / "migrate_vector_blobs.py"
+)
+migrate_vector_blobs = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(migrate_vector_blobs)
+
+
+def padded_vector():
+    """A 768-dimension vector in the legacy base64 format, padded to 1536."""
+    padded = np.zeros(1536, dtype=np.float32)
+    padded[:768] = 0.5
+    return base64.b64encode(padded.tobytes())
+
+
+def make_database(db_path):
+    """A database of an older version with one padded vector."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE episodic_memory (id TEXT PRIMARY KEY, summary TEXT, details TEXT, "
+            "actor TEXT, event_type TEXT, summary_embedding BINARY, embedding_config JSON)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO episodic_memory VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ("ev-1", "写代码 review", "", "user", "activity",
+             padded_vector(), '{"embedding_dim": 768}'),
+        )
+    assert ensure_fts5_tables(engine)
+    return engine
+
+
+def test_migrates_a_table_with_fts_triggers(tmp_path):
+    db_path = tmp_path / "sqlite.db"
+    make_database(db_path).dispose()
+
+    conn = migrate_vector_blobs.connect_sqlite(str(db_path))
+    converted, unreadable = migrate_column(
+        conn, "episodic_memory", "summary_embedding", True, batch_size=10
+    )
+    assert (converted, unreadable) == (1, 0)
+
+    data = conn.execute("SELECT summary_embedding FROM episodic_memory").fetchone()[0]
+    assert is_encoded_vector(data)
+    assert len(decode_vector(data)) == 768
+    # the UPDATE went through the FTS triggers
+    assert conn.execute(
+        "SELECT count(*) FROM episodic_memory_fts WHERE episodic_memory_fts MATCH '\"代码\"'"
+    ).fetchone()[0] == 1
+    conn.close()
+
+
+def test_startup_migrates_each_column_once(tmp_path):
+    engine = make_database(tmp_path / "sqlite.db")
+
+    assert ensure_native_vectors(engine) == 1
+    with engine.connect() as connection:
+        data = connection.exec_driver_sql(
+            "SELECT summary_embedding FROM episodic_memory"
+        ).scalar()
+        assert len(decode_vector(data)) == 768
+        assert connection.exec_driver_sql(
+            "SELECT table_name, column_name FROM vector_column_migration"
+        ).fetchall() == [("episodic_memory", "summary_embedding")]
+
+    # recorded columns are not scanned again
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE episodic_memory SET summary_embedding = ?", (padded_vector(),)
+        )
+    assert ensure_native_vectors(engine) == 0
+    engine.dispose()
@@ -0,0 +1,103 @@
+"""
+Tests for the offset and keyset pagination of the /memory/* listings, on
+SQLite.
+
+Usage:
+    pytest tests/test_pagination.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Column, DateTime, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.orm.errors import NoResultFound
+from mirix.services import pagination
+from mirix.services.memory_change_hooks import notify_memory_upsert
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "episodic_memory"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+    occurred_at = Column(DateTime)
+    summary = Column(String)
+
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def session_maker(tmp_path):
+    pagination.listing_total_cache.invalidate("u", "episodic")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(engine)
+    session_maker = sessionmaker(engine)
+    with session_maker() as session:
+        # pairs of events share a timestamp, the id breaks the tie
+        session.add_all(
+            Event(id=f"ev-{i:02d}", user_id="u", occurred_at=START + timedelta(hours=i // 2))
+            for i in range(11)
+        )
+        session.add(Event(id="other", user_id="v", occurred_at=START))
+        session.commit()
+    return session_maker
+
+
+def page(session_maker, **kwargs):
+    with session_maker() as session:
+        result = pagination.paginate(
+            session, Event, [Event.user_id == "u"], Event.occurred_at, "episodic", "u", 4, **kwargs
+        )
+        result["items"] = [item.id for item in result["items"]]
+        return result
+
+
+def test_cursor_pages_match_offset_pages(session_maker):
+    offset_pages = [page(session_maker, offset=offset) for offset in (0, 4, 8)]
+    assert [p["page"] for p in offset_pages] == [1, 2, 3]
+    assert offset_pages[0]["items"] == ["ev-10", "ev-09", "ev-08", "ev-07"]
+
+    cursor, cursor_pages = None, []
+    while True:
+        result = page(session_maker, cursor=cursor)
+        cursor_pages.append(result["items"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor_pages == [p["items"] for p in offset_pages]
+    assert offset_pages[-1]["next_cursor"] is None
+    assert page(session_maker, cursor="ev-07")["page"] is None
+    with pytest.raises(NoResultFound):
+        page(session_maker, cursor="missing")
+    # the row of another user is no cursor of this listing
+    with pytest.raises(NoResultFound):
+        page(session_maker, cursor="other")
+
+
+def test_total_is_cached_until_the_memory_is_written(session_maker):
+    assert page(session_maker)["total"] == 11
+    assert page(session_maker)["pages"] == 3
+
+    with session_maker() as session:
+        session.add(Event(id="ev-11", user_id="u", occurred_at=START))
+        session.commit()
+    # the write bypassed the hooks: the cached total is served until asked for an exact one
+    assert page(session_maker)["total"] == 11
+    assert page(session_maker, exact_total=True)["total"] == 12
+
+    with session_maker() as session:
+        session.add(Event(id="ev-12", user_id="u", occurred_at=START))
+        session.commit()
+    notify_memory_upsert("episodic", "u", None)
+    assert page(session_maker)["total"] == 13
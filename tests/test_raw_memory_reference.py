@@ -0,0 +1,93 @@
+"""
+Tests for the raw_memory_reference link table kept in sync with the
+`raw_memory_references` arrays of the memory tables, on SQLite.
+
+Usage:
+    pytest tests/test_raw_memory_reference.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import JSON, Column, String, create_engine, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.orm import raw_memory_reference
+from mirix.orm.raw_memory_reference import (
+    RawMemoryReference,
+    backfill_raw_memory_references,
+    track_raw_memory_references,
+)
+
+Base = declarative_base()
+
+
+class Note(Base):
+    __tablename__ = "note_memory"
+
+    id = Column(String, primary_key=True)
+    raw_memory_references = Column(JSON, default=list, nullable=False)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(raw_memory_reference, "TRACKED_MEMORY_MODELS", {})
+    engine = create_engine(f"sqlite:///{tmp_path / 'references.db'}")
+    Base.metadata.create_all(engine)
+    RawMemoryReference.__table__.create(engine)
+    return engine
+
+
+def links(engine):
+    with engine.connect() as connection:
+        return sorted(
+            connection.execute(
+                select(
+                    RawMemoryReference.raw_memory_id,
+                    RawMemoryReference.memory_type,
+                    RawMemoryReference.memory_id,
+                )
+            ).all()
+        )
+
+
+def test_links_follow_inserts_updates_and_deletes(db):
+    track_raw_memory_references(Note, "note")
+    session_maker = sessionmaker(db)
+
+    with session_maker() as session:
+        session.add(Note(id="n1", raw_memory_references=["r1", "r2", "r1"]))
+        session.add(Note(id="n2", raw_memory_references=[]))
+        session.commit()
+    assert links(db) == [("r1", "note", "n1"), ("r2", "note", "n1")]
+
+    with session_maker() as session:
+        session.get(Note, "n1").raw_memory_references = ["r2", "r3"]
+        session.get(Note, "n2").raw_memory_references = ["r1"]
+        session.commit()
+    assert links(db) == [("r1", "note", "n2"), ("r2", "note", "n1"), ("r3", "note", "n1")]
+
+    with session_maker() as session:
+        session.delete(session.get(Note, "n1"))
+        session.commit()
+    assert links(db) == [("r1", "note", "n2")]
+
+
+def test_backfill_fills_an_empty_link_table_once(db):
+    with db.begin() as connection:
+        connection.execute(
+            Note.__table__.insert(),
+            [
+                {"id": "n1", "raw_memory_references": ["r1", "r2"]},
+                {"id": "n2", "raw_memory_references": []},
+            ],
+        )
+    raw_memory_reference.TRACKED_MEMORY_MODELS["note"] = Note
+
+    assert backfill_raw_memory_references(db) == 2
+    assert links(db) == [("r1", "note", "n1"), ("r2", "note", "n1")]
+    assert backfill_raw_memory_references(db) == 0
@@ -0,0 +1,66 @@
+"""
+Tests for the versioned cache of memories retrieved for the system prompt.
+
+Usage:
+    pytest tests/test_retrieval_cache.py
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.memory_change_hooks import notify_memory_delete, notify_memory_upsert
+from mirix.services.retrieval_cache import RetrievalCache, normalize_topic, retrieval_cache
+
+
+def test_writes_invalidate_only_their_user_and_table():
+    cache = RetrievalCache(max_entries=10, ttl=60)
+    query = ("bm25", normalize_topic("  python   packaging "), "UTC")
+    assert query[1] == "python packaging"
+
+    for user_id in ("alice", "bob"):
+        for memory_type in ("episodic", "semantic"):
+            version = cache.version(user_id, memory_type)
+            cache.put(user_id, memory_type, query, f"{user_id}-{memory_type}", version)
+
+    cache.on_memory_upsert("episodic", "alice", None)
+    assert cache.get("alice", "episodic", query) is None
+    assert cache.get("alice", "semantic", query) == "alice-semantic"
+    assert cache.get("bob", "episodic", query) == "bob-episodic"
+
+    cache.on_memory_delete("semantic", "bob", "sem-1")
+    assert cache.get("bob", "semantic", query) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stale"]) == (2, 2, 2)
+
+
+def test_value_fetched_across_a_write_is_not_served():
+    cache = RetrievalCache(max_entries=10, ttl=60)
+    version = cache.version("alice", "episodic")
+    # a write lands while the query is running
+    cache.on_memory_upsert("episodic", "alice", None)
+    cache.put("alice", "episodic", "q", "old", version)
+    assert cache.get("alice", "episodic", "q") is None
+
+
+def test_ttl_and_lru_bound():
+    cache = RetrievalCache(max_entries=2, ttl=0)
+    cache.put("alice", "episodic", "q", "value", 0)
+    assert cache.get("alice", "episodic", "q") is None
+    assert cache.stats()["expired"] == 1
+
+    cache = RetrievalCache(max_entries=2, ttl=60)
+    for query in ("a", "b", "c"):
+        cache.put("alice", "resource", query, query, 0)
+    assert cache.get("alice", "resource", "a") is None
+    assert cache.get("alice", "resource", "c") == "c"
+
+
+def test_shared_cache_listens_to_memory_hooks():
+    version = retrieval_cache.version("carol", "procedural")
+    notify_memory_upsert("procedural", "carol", None)
+    notify_memory_delete("procedural", "carol", "proc-1")
+    assert retrieval_cache.version("carol", "procedural") == version + 2
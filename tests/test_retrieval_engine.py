@@ -0,0 +1,188 @@
+"""
+Tests for the search engine shared by the memory managers' `list_*`
+methods, on SQLite.
+
+Usage:
+    pytest tests/test_retrieval_engine.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import JSON, Column, DateTime, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import mirix.orm.sqlite_functions  # noqa: F401  (registers mirix_cjk_segment)
+from mirix.orm.sqlite_fts import ensure_fts5_tables
+from mirix.services.bm25_index import BM25IndexRegistry
+from mirix.services.embedding_matrix import EmbeddingMatrixRegistry
+from mirix.services.retrieval_engine import (
+    MemoryRetrievalEngine,
+    SearchableMemory,
+    _tsqueries,
+)
+from mirix.services.vector_index import VectorIndexRegistry
+from mirix.settings import settings
+
+Base = declarative_base()
+
+
+class Procedure(Base):
+    __tablename__ = "procedural_memory"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    entry_type = Column(String)
+    summary = Column(String)
+    steps = Column(JSON)
+
+    def to_pydantic(self):
+        return self.id
+
+
+PROCEDURES = [
+    ("proc-1", "workflow", "Deploy the web service", ["build the image", "push to registry"]),
+    ("proc-2", "guide", "Brew coffee", ["grind beans", "pour water"]),
+    ("proc-3", "workflow", "Release a python package", ["bump version", "build wheel", "upload"]),
+]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # the SQLite search paths, whatever MIRIX_PG_URI says
+    monkeypatch.setattr(type(settings), "mirix_pg_uri_no_default", None)
+    db = create_engine(f"sqlite:///{tmp_path / 'engine.db'}")
+    Base.metadata.create_all(db)
+    session_maker = sessionmaker(db)
+    with session_maker() as session:
+        session.add_all(
+            Procedure(id=item_id, user_id="u", entry_type=entry_type, summary=summary, steps=steps)
+            for item_id, entry_type, summary, steps in PROCEDURES
+        )
+        session.add(Procedure(id="other", user_id="v", summary="Deploy the web service"))
+        session.commit()
+    # the search tables of this database, as the server sets them up
+    assert ensure_fts5_tables(db)
+
+    # private registries, left out of the process-wide ones and their exit flush
+    index_root = str(tmp_path / "indexes")
+    search_engine = MemoryRetrievalEngine(
+        BM25IndexRegistry(index_root),
+        VectorIndexRegistry(index_root),
+        EmbeddingMatrixRegistry(index_root),
+    )
+    search_engine.register(
+        SearchableMemory(
+            memory_type="procedural",
+            model=Procedure,
+            search_fields=("summary", "steps", "entry_type"),
+            default_field="summary",
+            vector_field="summary",
+            result_columns=("id", "user_id", "created_at", "entry_type", "summary", "steps"),
+            recent_order=Procedure.id.desc(),
+            document_fields=("summary", "entry_type", "steps"),
+        )
+    )
+    return search_engine, session_maker
+
+
+def test_document_tokens_and_field_keys(engine):
+    search_engine, _ = engine
+    memory = search_engine._memories["procedural"]
+    item = Procedure(summary="Brew coffee", entry_type="guide", steps=["grind beans"])
+
+    assert search_engine.document_tokens(memory, item, "") == [
+        "brew",
+        "coffee",
+        "guide",
+        "grind",
+        "beans",
+    ]
+    assert search_engine.document_tokens(memory, item, "steps") == ["grind", "beans"]
+    # only the declared text fields select their own index
+    assert search_engine.field_key(memory, "steps") == "steps"
+    assert search_engine.field_key(memory, "id") == ""
+
+
+def test_tsqueries_keep_single_cjk_characters():
+    # the words of tokenize_for_search, the segmentation of the tsvectors
+    assert _tsqueries("猫") == ("'猫'", "'猫'")
+    assert _tsqueries("a 数据库") == ("'数据' & '据库'", "'数据' | '据库'")
+    assert _tsqueries("deploy it") == (
+        "('deploy' | 'deploy':*) & 'it'",
+        "('deploy' | 'deploy':*) | 'it'",
+    )
+    assert _tsqueries("a ! ?") is None
+
+
+def test_search_methods(engine):
+    search_engine, session_maker = engine
+
+    def search(query, method, **kwargs):
+        return search_engine.search(
+            session_maker, "procedural", "u", query=query, search_method=method, **kwargs
+        )
+
+    assert search("build", "bm25", search_field="steps", limit=2) == ["proc-3", "proc-1"]
+    assert search("deploy", "bm25", filters={"entry_type": ["workflow"]}) == ["proc-1", "proc-3"]
+    assert search("PYTHON", "string_match", search_field="summary") == ["proc-3"]
+    assert search("brew cofee", "fuzzy_match", limit=1) == ["proc-2"]
+    assert search("coffee", "fts5_match") == ["proc-2"]
+    assert search("", "embedding", limit=2) == ["proc-3", "proc-2"]
+    with pytest.raises(ValueError):
+        search("coffee", "grep")
+
+
+def test_rankings_are_cached_and_timed(engine):
+    search_engine, session_maker = engine
+    for _ in range(2):
+        assert search_engine.search(
+            session_maker, "procedural", "u", query="coffee", search_method="bm25", limit=1
+        ) == ["proc-2"]
+
+    stats = search_engine.stats()["procedural/bm25"]
+    assert stats["searches"] == 2
+    assert stats["cached_rankings"] == 1
+    assert stats["mean_results"] == 1
+
+
+def test_several_queries_are_fused(engine):
+    search_engine, session_maker = engine
+
+    def search(queries, method, **kwargs):
+        return search_engine.search(
+            session_maker, "procedural", "u", queries=queries, search_method=method, **kwargs
+        )
+
+    # the best match of each query first, every item once
+    assert search(["coffee", "python package"], "bm25", limit=2) == ["proc-2", "proc-3"]
+    assert search(["web", "PACKAGE"], "string_match", search_field="summary") == [
+        "proc-1",
+        "proc-3",
+    ]
+    # a single query is the plain search
+    assert search(["coffee"], "bm25", limit=1) == ["proc-2"]
+    assert "procedural/bm25/multi" in search_engine.stats()
+
+
+def test_built_indexes_are_saved_in_the_background(engine, tmp_path):
+    search_engine, session_maker = engine
+    search_engine.search(
+        session_maker, "procedural", "u", query="coffee", search_method="bm25"
+    )
+    registry = search_engine._bm25_registry
+    registry.flush()
+    assert not registry._dirty
+    assert (tmp_path / "indexes" / "bm25" / "u" / "procedural__default.pkl").exists()
+
+    # a new process loads the saved index instead of building it
+    reloaded = BM25IndexRegistry(str(tmp_path / "indexes"))
+    reloaded._models = registry._models
+    with session_maker() as session:
+        assert reloaded._load(session, ("u", "procedural", "")) is not None
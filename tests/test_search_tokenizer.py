@@ -0,0 +1,160 @@
+"""
+Tests for the tokenizer shared by the BM25 indexes and the full-text
+search tables, for CJK search through the SQLite FTS5 tables, and for the
+trigram tables behind the substring searches.
+
+Usage:
+    pytest tests/test_search_tokenizer.py
+"""
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import Column, String, column, create_engine, or_, select, table
+from sqlalchemy.orm import Session, declarative_base
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import mirix.orm.sqlite_functions  # noqa: F401  (registers mirix_cjk_segment)
+from mirix.helpers.search_tokenizer import segment_cjk, tokenize_for_search
+from mirix.orm import sqlite_fts
+from mirix.services.utils import substring_filter
+
+Base = declarative_base()
+
+
+class RawMemory(Base):
+    __tablename__ = "raw_memory"
+
+    id = Column(String, primary_key=True)
+    source_app = Column(String)
+    source_url = Column(String)
+    ocr_text = Column(String)
+
+
+def test_text_without_cjk_is_tokenized_as_before():
+    assert tokenize_for_search("Hello, World! It's a pg_trgm test.") == [
+        "hello",
+        "world",
+        "it",
+        "pg",
+        "trgm",
+        "test",
+    ]
+    assert tokenize_for_search("") == []
+
+
+def test_cjk_runs_become_bigrams():
+    assert tokenize_for_search("数据库（PostgreSQL）索引，优化。猫") == [
+        "数据",
+        "据库",
+        "postgresql",
+        "索引",
+        "优化",
+        "猫",
+    ]
+    assert tokenize_for_search("東京の天気") == ["東京", "京の", "の天", "天気"]
+    assert segment_cjk("abc数据库") == "abc 数据 据库 "
+
+
+def test_fts5_serves_chinese_queries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fts.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE episodic_memory (id TEXT PRIMARY KEY, user_id TEXT, "
+            "created_at TEXT, summary TEXT, details TEXT, actor TEXT, event_type TEXT)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO episodic_memory VALUES "
+            "('ep-1', 'u', '1', '我想了解数据库索引的优化方法', '', 'user', 'chat'),"
+            "('ep-2', 'u', '2', 'Python packaging', '', 'user', 'chat')"
+        )
+        # an index from before CJK segmentation is dropped and rebuilt
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE episodic_memory_fts USING fts5("
+            "summary, details, actor, event_type, "
+            "content='episodic_memory', content_rowid='rowid')"
+        )
+    assert sqlite_fts.ensure_fts5_tables(engine)
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE episodic_memory SET summary = '东京的数据中心' WHERE id = 'ep-2'"
+        )
+
+    with Session(engine) as session:
+
+        def search(query):
+            return sqlite_fts.fts5_search(
+                session, "episodic_memory", tokenize_for_search(query), "u"
+            )
+
+        assert search("数据库索引") == ["ep-1", "ep-2"]
+        assert search("东京") == ["ep-2"]
+        assert search("packaging") == []
+
+
+def raw_memory_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE raw_memory (id TEXT PRIMARY KEY, source_app TEXT, "
+            "source_url TEXT, ocr_text TEXT)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO raw_memory VALUES "
+            "('raw-1', 'Chrome', 'https://docs.python.org', 'Packaging Guide'),"
+            "('raw-2', 'Slack', NULL, 'lunch at noon'),"
+            "('raw-3', 'Terminal', NULL, '数据库索引')"
+        )
+    return engine
+
+
+def test_trigram_table_matches_ilike(tmp_path):
+    engine = raw_memory_engine(tmp_path / "trgm.db")
+    assert sqlite_fts.ensure_fts5_tables(engine)
+    assert sqlite_fts.is_trigram_enabled(engine, "raw_memory")
+    # availability is per database: another engine has no trigram tables
+    other = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    assert not sqlite_fts.is_trigram_enabled(other, "raw_memory")
+
+    with engine.begin() as connection:
+        # rows written afterwards are indexed by the triggers
+        connection.exec_driver_sql(
+            "INSERT INTO raw_memory VALUES ('raw-4', 'Code', NULL, 'python tests')"
+        )
+        connection.exec_driver_sql("DELETE FROM raw_memory WHERE id = 'raw-2'")
+
+    raw_memory = table(
+        "raw_memory",
+        *(column(name) for name in sqlite_fts.TRIGRAM_TABLES["raw_memory"]),
+    )
+
+    def ids(condition):
+        with Session(engine) as session:
+            query = select(raw_memory.c.id).where(condition).order_by(raw_memory.c.id)
+            return list(session.execute(query).scalars())
+
+    def trigram(term):
+        return column("rowid").in_(sqlite_fts.trigram_rowids("raw_memory", term))
+
+    for term in ["PYTHON", "kagi", "lunch", "数据库", "raw-", "slack"]:
+        scan = or_(*(c.ilike(f"%{term}%") for c in raw_memory.c))
+        assert ids(trigram(term)) == ids(scan), term
+    assert ids(trigram("python")) == ["raw-1", "raw-4"]
+
+
+def test_substring_filter_uses_the_tables_of_its_database(tmp_path):
+    indexed = raw_memory_engine(tmp_path / "indexed.db")
+    assert sqlite_fts.ensure_fts5_tables(indexed)
+    # a database without trigram tables, e.g. one set up by an older version
+    plain = raw_memory_engine(tmp_path / "plain.db")
+
+    columns = sqlite_fts.TRIGRAM_TABLES["raw_memory"]
+    for engine, uses_trigrams in [(indexed, True), (plain, False)]:
+        with Session(engine) as session:
+            condition = substring_filter(session, RawMemory, columns, "python")
+            assert ("raw_memory_trgm" in str(condition)) == uses_trigrams
+            query = select(RawMemory.id).where(condition)
+            assert list(session.execute(query).scalars()) == ["raw-1"]
@@ -0,0 +1,65 @@
+"""
+Tests for the local topic extractor used before memory retrieval.
+
+Usage:
+    pytest tests/test_topic_extraction.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services.bm25_index import BM25InvertedIndex, bm25_index_registry
+from mirix.services.topic_extraction import candidate_phrases, extract_topics, split_topics
+
+
+def test_phrases_split_at_stopwords_and_punctuation():
+    text = "Can you help me fix the setuptools build error? The wheel build fails."
+    phrases = [phrase for phrase, _ in candidate_phrases(text)]
+    assert phrases == ["fix", "setuptools build error", "wheel build fails"]
+
+
+def test_packaged_user_message_is_unwrapped():
+    packaged = json.dumps(
+        {"type": "user_message", "message": "Plan my trip to Kyoto", "time": "now"}
+    )
+    topics = extract_topics([packaged])
+    assert "kyoto" in topics
+    assert "user_message" not in topics
+
+
+def test_cjk_text_is_split_into_phrases():
+    phrases = [phrase for phrase, _ in candidate_phrases("我想了解数据库索引的优化方法")]
+    assert "优化方法" in phrases
+    assert all("的" not in phrase for phrase in phrases)
+
+
+def test_nothing_to_extract():
+    assert extract_topics(["hi, thanks!"]) is None
+    assert extract_topics([]) is None
+
+
+def test_recent_messages_and_rare_words_rank_first():
+    assert extract_topics(["python packaging", "kyoto trip"]).startswith("kyoto trip")
+
+    # "meeting" is in every memory of the user, "budget" in just one
+    index = BM25InvertedIndex()
+    for i in range(10):
+        index.upsert(f"ep-{i}", ["meeting", "budget"] if i == 0 else ["meeting"])
+    key = ("topic-user", "episodic", "")
+    bm25_index_registry._indexes[key] = index
+    try:
+        topics = extract_topics(["budget; meeting"], user_id="topic-user")
+    finally:
+        del bm25_index_registry._indexes[key]
+    assert topics == "budget; meeting"
+    assert extract_topics(["meeting; budget"]) == "meeting; budget"
+
+
+def test_topics_are_split_for_retrieval():
+    assert split_topics("kyoto trip; Budget review ;;kyoto trip") == ["kyoto trip", "Budget review"]
+    assert split_topics(None) == []
+    assert split_topics(" ; ") == []
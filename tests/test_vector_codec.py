@@ -0,0 +1,58 @@
+"""
+Tests for the on-disk encoding of embedding vectors in SQLite.
+
+Usage:
+    pytest tests/test_vector_codec.py
+"""
+
+import base64
+import sys
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.helpers.vector_codec import (
+    HEADER_SIZE,
+    decode_vector,
+    encode_vector,
+    is_encoded_vector,
+    vector_dims,
+)
+
+
+def test_round_trip_without_copy():
+    vector = np.random.default_rng(0).normal(size=1536).astype(np.float32)
+    data = encode_vector(vector)
+
+    assert is_encoded_vector(data)
+    assert len(data) == HEADER_SIZE + 1536 * 4
+    decoded = decode_vector(data)
+    assert np.array_equal(decoded, vector)
+    assert not decoded.flags.owndata
+    assert np.array_equal(decode_vector(memoryview(data)), vector)
+
+
+def test_reads_legacy_base64():
+    vector = np.arange(8, dtype=np.float32)
+    legacy = base64.b64encode(vector.tobytes())
+
+    assert not is_encoded_vector(legacy)
+    assert np.array_equal(decode_vector(legacy), vector)
+
+
+def test_vector_dims_of_both_formats():
+    for dim in (1, 2, 3, 384, 768, 1536):
+        vector = np.ones(dim, dtype=np.float32)
+        assert vector_dims(encode_vector(vector)) == dim
+        assert vector_dims(base64.b64encode(vector.tobytes())) == dim
+    assert vector_dims(None) is None
+
+
+def test_malformed_data():
+    assert decode_vector(None) is None
+    assert decode_vector(b"") is None
+    assert decode_vector(encode_vector([1.0, 2.0])[:-1]) is None
+    assert decode_vector(b"!not base64!") is None
@@ -0,0 +1,157 @@
+"""
+Tests for the IVF vector index used by SQLite embedding search.
+
+Usage:
+    pytest tests/test_vector_index.py
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mirix.services import vector_index
+from mirix.services.vector_index import IVFVectorIndex, VectorIndexRegistry
+
+
+def _exact_top_k(vectors, query, k):
+    ids = list(vectors)
+    matrix = np.array([vectors[doc_id] for doc_id in ids])
+    similarities = matrix @ query / np.linalg.norm(matrix, axis=1)
+    return [ids[i] for i in np.argsort(-similarities)[:k]]
+
+
+def test_small_index_is_exact_under_updates():
+    rng = np.random.default_rng(0)
+    index = IVFVectorIndex(32)
+    vectors = {}
+
+    for step in range(2000):
+        action = rng.random()
+        if action < 0.6 or not vectors:
+            doc_id = f"doc-{step}"
+        else:
+            doc_id = list(vectors)[rng.integers(len(vectors))]
+        if action < 0.85:
+            vectors[doc_id] = rng.normal(size=32)
+            index.upsert(doc_id, vectors[doc_id])
+        else:
+            del vectors[doc_id]
+            index.remove(doc_id)
+
+    query = rng.normal(size=32)
+    expected = _exact_top_k(vectors, query, 10)
+    assert [doc_id for doc_id, _ in index.search(query, 10)] == expected
+
+    restored = IVFVectorIndex.from_state(index.to_state())
+    assert [doc_id for doc_id, _ in restored.search(query, 10)] == expected
+
+
+def test_clustered_index_recall(monkeypatch):
+    monkeypatch.setattr(vector_index, "BRUTE_FORCE_MAX_VECTORS", 1000)
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(50, 64))
+    vectors = {
+        f"doc-{i}": centers[rng.integers(50)] + rng.normal(scale=0.5, size=64)
+        for i in range(5000)
+    }
+
+    index = IVFVectorIndex(64)
+    for doc_id, vector in vectors.items():
+        index.upsert(doc_id, vector)
+    assert index.needs_training()
+    index.train()
+    assert index.centroids is not None
+
+    # vectors added after training go to their nearest list
+    for i in range(5000, 5200):
+        vectors[f"doc-{i}"] = centers[rng.integers(50)] + rng.normal(scale=0.5, size=64)
+        index.upsert(f"doc-{i}", vectors[f"doc-{i}"])
+
+    hits = 0
+    for _ in range(20):
+        query = centers[rng.integers(50)] + rng.normal(scale=0.5, size=64)
+        expected = set(_exact_top_k(vectors, query, 10))
+        hits += len(expected & {doc_id for doc_id, _ in index.search(query, 10)})
+    assert hits / 200 >= 0.9
+
+
+def test_unusable_vectors_are_not_indexed():
+    index = IVFVectorIndex(4)
+    index.upsert("none", None)
+    index.upsert("zero", [0, 0, 0, 0])
+    index.upsert("wrong-dim", [1, 2, 3])
+    assert len(index) == 0
+
+    index.upsert("a", [1, 0, 0, 0])
+    index.upsert("a", None)
+    assert "a" not in index
+
+
+def test_batched_search_matches_single_searches(monkeypatch):
+    monkeypatch.setattr(vector_index, "BRUTE_FORCE_MAX_VECTORS", 500)
+    rng = np.random.default_rng(2)
+    index = IVFVectorIndex(16)
+    for i in range(2000):
+        index.upsert(f"doc-{i}", rng.normal(size=16))
+
+    queries = [rng.normal(size=16) for _ in range(4)] + [np.zeros(16), rng.normal(size=8)]
+    for trained in (False, True):
+        if trained:
+            index.train()
+        results = index.search_many(queries, 10, nprobe=4)
+        assert results[-2:] == [[], []]
+        for query, result in zip(queries[:-2], results):
+            single = index.search(query, 10, nprobe=4)
+            if not trained:
+                assert [doc_id for doc_id, _ in result] == [doc_id for doc_id, _ in single]
+            # probing the lists of every query never loses a neighbour
+            assert result[-1][1] <= single[-1][1] + 1e-6
+
+
+def test_retraining_runs_in_the_background(monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_index, "BRUTE_FORCE_MAX_VECTORS", 500)
+    rng = np.random.default_rng(3)
+    index = IVFVectorIndex(16)
+    for i in range(1000):
+        index.upsert(f"doc-{i}", rng.normal(size=16))
+    query = rng.normal(size=16)
+    expected = index.search(query, 5)
+
+    registry = VectorIndexRegistry(str(tmp_path))
+    key = ("u", "episodic", "summary_embedding@16")
+    registry._indexes[key] = index
+
+    clustering, release = threading.Event(), threading.Event()
+    spherical_kmeans = vector_index._spherical_kmeans
+
+    def slow_kmeans(*args):
+        clustering.set()
+        release.wait(5)
+        return spherical_kmeans(*args)
+
+    monkeypatch.setattr(vector_index, "_spherical_kmeans", slow_kmeans)
+    with registry._key_lock(key):
+        registry._before_search(key, index)
+    assert clustering.wait(5)
+
+    # searches and changes go to the current lists meanwhile
+    assert index.search(query, 5) == expected
+    registry.on_memory_delete("episodic", "u", "doc-0")
+    new_vector = rng.normal(size=16)
+    registry.on_memory_upsert(
+        "episodic", "u", SimpleNamespace(id="new", summary_embedding=new_vector)
+    )
+
+    release.set()
+    registry._training[key].result(5)
+    trained = registry._indexes[key]
+    assert trained is not index and trained.centroids is not None
+    assert len(trained) == 1000
+    assert "doc-0" not in trained
+    assert trained.search(new_vector, 1, nprobe=len(trained.lists))[0][0] == "new"